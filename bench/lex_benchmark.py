@@ -0,0 +1,64 @@
+import os
+import sys
+import time
+
+# appending the directory of lex.py in the sys.path list
+sys.path.append(f"{os.path.dirname(__file__)}/../src")
+
+from lex import Lexer, TokenType
+
+SAMPLE = """\
+数目 = 0
+总和 = 0
+当 数目 < 100:
+    # 累加
+    如果 数目 / 2 == 0 与 非 假:
+        总和 = 总和 + 数目 * 2
+    或则 数目 >= 50:
+        印出("大于五十")
+    否则:
+        继续
+    数目 = 数目 + 1.5
+印出(总和)
+"""
+
+def lexAll(source: str, engine: str) -> list:
+    """
+    Lex the whole source and return the token stream as (kind, text, count) tuples.
+
+    Parameters:
+    source (str): The source code to lex.
+    engine (str): The lexer engine to use.
+    """
+    lexer = Lexer(source, engine)
+    tokens = []
+    token = lexer.getToken()
+    while token.kind != TokenType.EOF:
+        tokens.append((token.kind, token.text, token.count))
+        token = lexer.getToken()
+    return tokens
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    source = SAMPLE * repeat
+    print(f"Lexing {len(source)} characters ({source.count(chr(10))} lines)")
+
+    results = {}
+    for engine in (Lexer.CHAR_ENGINE, Lexer.REGEX_ENGINE):
+        start = time.perf_counter()
+        results[engine] = lexAll(source, engine)
+        elapsed = time.perf_counter() - start
+        print(f"{engine:>6}: {elapsed:.3f}s, {len(results[engine]) / elapsed:,.0f} tokens/s")
+
+    start = time.perf_counter()
+    tokens = Lexer(source).tokenize()
+    elapsed = time.perf_counter() - start
+    print(f"tokenize: {elapsed:.3f}s, {len(tokens) / elapsed:,.0f} tokens/s, "
+          f"{tokens.kinds.itemsize + tokens.starts.itemsize + tokens.ends.itemsize} bytes/token")
+
+    if results[Lexer.CHAR_ENGINE] != results[Lexer.REGEX_ENGINE]:
+        sys.exit("Error: lexer engines produced different token streams.")
+    print("Token streams are identical.")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+import os
+import sys
+import subprocess
+import tempfile
+import time
+
+CLI = f"{os.path.dirname(os.path.abspath(__file__))}/../cli/pyhan_cli.py"
+
+# A short program with Chinese variables, which need pypinyin.
+SAMPLE = """\
+数目 = 0
+当 数目 < 3:
+    印出("你好")
+    数目 = 数目 + 1
+x = 1
+印出(x)
+"""
+# A short program with no Chinese variables, like most runs on a grader.
+ASCII_SAMPLE = """\
+x = 0
+当 x < 3:
+    印出("你好")
+    x = x + 1
+"""
+
+# Most time, in milliseconds, the fastest run of `pyhan` on the ASCII sample may take.
+STARTUP_BUDGET_MS = 250
+
+# Modules a run of a program without Chinese variables should not import.
+LAZY_MODULES = ('pypinyin', 'subprocess', 'tempfile', 'json')
+
+def runTimes(source: str, runs: int) -> list:
+    """
+    Run `pyhan` on the source, each time in a new process, and return how long each run took in milliseconds.
+
+    Parameters:
+    source (str): The program to run.
+    runs (int): The number of runs.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "startup.pyhan")
+        with open(path, 'w', encoding='utf-8') as sourceFile:
+            sourceFile.write(source)
+
+        times = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, CLI, path], check=True, capture_output=True)
+            times.append((time.perf_counter() - start) * 1000)
+        return times
+
+def importTimes(source: str) -> dict:
+    """
+    Run `pyhan` on the source with `-X importtime` and return the time, in milliseconds,
+    each module took to import with the modules it imported.
+
+    Parameters:
+    source (str): The program to run.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "startup.pyhan")
+        with open(path, 'w', encoding='utf-8') as sourceFile:
+            sourceFile.write(source)
+        output = subprocess.run([sys.executable, '-X', 'importtime', CLI, path], check=True, capture_output=True, text=True)
+    return parseImportTimes(output.stderr)
+
+def parseImportTimes(output: str) -> dict:
+    """
+    Return the time, in milliseconds, each module took to import with the modules it imported,
+    from the output of `-X importtime`. Modules imported by other modules are included, as the compiler
+    imports most modules through the modules of the CLI.
+
+    Parameters:
+    output (str): What `-X importtime` wrote to stderr.
+    """
+    times = {}
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split('|')
+        times[name.strip()] = int(cumulative) / 1000
+    return times
+
+def eagerModules(imports: dict) -> list:
+    """
+    Return the modules of LAZY_MODULES that were imported.
+
+    Parameters:
+    imports (dict): The modules imported, as parseImportTimes returns them.
+    """
+    return [module for module in LAZY_MODULES if module in imports]
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    budget = float(sys.argv[2]) if len(sys.argv) > 2 else STARTUP_BUDGET_MS
+
+    errors = []
+    for name, source in (("ASCII variables", ASCII_SAMPLE), ("Chinese variables", SAMPLE)):
+        times = sorted(runTimes(source, runs))
+        print(f"{name}: fastest {times[0]:.0f} ms, median {times[len(times) // 2]:.0f} ms over {runs} runs")
+
+        imports = importTimes(source)
+        for module, milliseconds in sorted(imports.items(), key=lambda item: -item[1])[:5]:
+            print(f"  {module:<20} {milliseconds:7.1f} ms")
+
+        if source is ASCII_SAMPLE:
+            if times[0] > budget:
+                errors.append(f"Startup took {times[0]:.0f} ms, over the budget of {budget:.0f} ms.")
+            loaded = eagerModules(imports)
+            if loaded:
+                errors.append(f"Modules imported without being needed: {', '.join(loaded)}.")
+
+    if errors:
+        sys.exit("Error: " + " ".join(errors))
+    print(f"Startup is within the budget of {budget:.0f} ms.")
+
+if __name__ == '__main__':
+    main()
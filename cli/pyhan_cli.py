@@ -1,12 +1,12 @@
 import click
 import sys
 import os
-import tempfile
-import subprocess
 
 # # appending the directory of compiler.py in the sys.path list
 sys.path.append(f"{os.path.dirname(__file__)}/../src")   
 import compiler
+import utils
+from cache import CompileCache
 
 # Define CLI version
 VERSION = 'v0.0.1'
@@ -35,13 +35,45 @@ This compiler compiles Py汉 code into Python code.
 {VERSION}
 
 Usage: pyhan [OPTIONS] INPUT
+       pyhan build [OPTIONS] SRC_DIR -o OUT_DIR
 
   INPUT: Path to the Py汉 file to compile.
+  build: Compile every Py汉 file under SRC_DIR into OUT_DIR, on one process
+         per CPU. Run `pyhan build --help` for its options.
 
 Options:
   -c, --compile      Compile only
   -o, --output PATH  Specified path of compiled .py file if --compile option
                      is enabled. If not provided, defaults to ./out.py.
+                     A path ending with .pyc gets bytecode instead.
+  --stream           Compile one top-level statement at a time, so memory use
+                     does not grow with the size of the input file.
+  -j, --jobs INTEGER Number of processes to lex a large input file with.
+                     Defaults to 1.
+  -O, --optimize     Work out expressions made only of literals at compile
+                     time and leave out code that can never run.
+  --iterative        Parse without recursion, for blocks and parentheses
+                     nested too deep for the default parser. Only with -c
+                     and a .py output without -O: running, .pyc output and
+                     -O still recurse, which limits nesting to a few
+                     hundred levels.
+  --all-errors       Report every syntax error in the input file instead of
+                     stopping at the first.
+  --trace            Print the last steps of the parser if compiling stops
+                     at an error.
+  --native-names     Keep Chinese variable names as they are in the Python
+                     code, instead of turning them into Pinyin and a hash.
+  --short-names      Turn Chinese variable names into Pinyin and only as much
+                     of the hash as tells them apart.
+  --name-header      Start the compiled .py file with a comment giving the
+                     Python name of each Chinese variable.
+  --mangle-cache PATH
+                     File to keep the Python names of Chinese variables in
+                     between runs, so they are not worked out again.
+  --source-map       Write the line and column in the input file of each
+                     line of the compiled .py file to a .map file next to it.
+  --no-cache         Compile the input file again even if it was compiled
+                     the same way before, and do not keep the output.
   --help             Show this message and exit.\
 """
 
@@ -77,32 +109,117 @@ def is_valid_file_path(file_path):
 @click.argument('input', type=click.Path(exists=True))
 @click.option('--compile', '-c', is_flag=True, help='Compile only.')
 @click.option('--output', '-o', type=click.Path(file_okay=True),\
-              help='Specified path of compiled .py file if --compile option is enabled. If not provided, defaults to ./out.py.')
-def execute(input, compile, output):
+              help='Specified path of compiled .py file if --compile option is enabled. If not provided, defaults to ./out.py. A path ending with .pyc gets bytecode instead.')
+@click.option('--stream', is_flag=True, help='Compile one top-level statement at a time, so memory use does not grow with the size of the input file.')
+@click.option('--jobs', '-j', type=click.IntRange(min=1), default=1, help='Number of processes to lex a large input file with. Defaults to 1.')
+@click.option('--optimize', '-O', is_flag=True, help='Work out expressions made only of literals at compile time and leave out code that can never run.')
+@click.option('--iterative', is_flag=True, help='Parse without recursion, for blocks and parentheses nested too deep for the default parser. Only with -c and a .py output without -O: running, .pyc output and -O still recurse, which limits nesting to a few hundred levels.')
+@click.option('--all-errors', 'all_errors', is_flag=True, help='Report every syntax error in the input file instead of stopping at the first.')
+@click.option('--trace', is_flag=True, help='Print the last steps of the parser if compiling stops at an error.')
+@click.option('--native-names', 'native_names', is_flag=True, help='Keep Chinese variable names as they are in the Python code, instead of turning them into Pinyin and a hash.')
+@click.option('--short-names', 'short_names', is_flag=True, help='Turn Chinese variable names into Pinyin and only as much of the hash as tells them apart.')
+@click.option('--name-header', 'name_header', is_flag=True, help='Start the compiled .py file with a comment giving the Python name of each Chinese variable.')
+@click.option('--mangle-cache', 'mangle_cache', type=click.Path(dir_okay=False),\
+              help='File to keep the Python names of Chinese variables in between runs, so they are not worked out again.')
+@click.option('--source-map', 'source_map', is_flag=True, help='Write the line and column in the input file of each line of the compiled .py file to a .map file next to it.')
+@click.option('--no-cache', 'no_cache', is_flag=True, help='Compile the input file again even if it was compiled the same way before, and do not keep the output.')
+def execute(input, compile, output, stream, jobs, optimize, iterative, all_errors, trace, native_names, short_names, name_header, mangle_cache, source_map, no_cache):
     """Compiler for Py汉 (PyHan) language. \
 Py汉 is equivalent to Python language, written in Simplified Chinese. \
 This compiler compiles Py汉 code into Python code."""
     if not input.endswith('.pyhan'):
         raise click.BadArgumentUsage("Input file must have .pyhan extension")
 
-    output_path = ""
+    if not mangle_cache:
+        compile_or_run(input, compile, output, stream, jobs, optimize, iterative, all_errors, trace, native_names, short_names, name_header, source_map, no_cache)
+        return
+
+    utils.mangledNames.load(mangle_cache)
+    try:
+        compile_or_run(input, compile, output, stream, jobs, optimize, iterative, all_errors, trace, native_names, short_names, name_header, source_map, no_cache)
+    finally:
+        utils.mangledNames.save(mangle_cache)
+
+def compile_or_run(input, compile, output, stream, jobs, optimize, iterative, all_errors, trace, native_names, short_names, name_header, source_map, no_cache):
+    """Compile the .pyhan file, or compile and run it, with the options given to execute."""
+    cache = None if no_cache else CompileCache()
     if compile:
         output_path = output if output else './out.py'
-    else:
-        temp_output_file = tempfile.NamedTemporaryFile()
-        output_path = temp_output_file.name
-        
-    compiler.compile(input, output_path)
+        compiler.compile(input, output_path, stream=stream, jobs=jobs, optimize=optimize, iterative=iterative, recover=all_errors, trace=trace, nativeNames=native_names, shortNames=short_names, nameHeader=name_header, sourceMap=source_map, cache=cache)
+        return
 
-    if compile:
+    if not stream:
+        # Running the source as a Python code object, without writing Python code
+        try:
+            compiler.run(input, jobs=jobs, optimize=optimize, iterative=iterative, recover=all_errors, trace=trace, nativeNames=native_names, shortNames=short_names, cache=cache)
+        except Exception as e:
+            print_program_error(e, input)
+            sys.exit(1)
         return
 
-    # Running the compiled Python code
+    import tempfile
+    import subprocess
+    from sourcemap import mapPath, rewriteTraceback
+
+    temp_output_file = tempfile.NamedTemporaryFile()
+    output_path = temp_output_file.name
+    compiler.compile(input, output_path, stream=stream, jobs=jobs, optimize=optimize, iterative=iterative, recover=all_errors, trace=trace, nativeNames=native_names, shortNames=short_names, sourceMap=True)
+
+    # Running the compiled Python code, with its traceback at the lines of the .pyhan file
     try:
-        subprocess.run(['python', output_path], check=True)
+        subprocess.run(['python', output_path], check=True, stderr=subprocess.PIPE)
     except subprocess.CalledProcessError as e:
-        click.echo(e.stderr.decode())
+        click.echo(rewriteTraceback(e.stderr.decode()), err=True, nl=False)
+        sys.exit(1)
+    finally:
+        os.remove(mapPath(output_path))
     
 
+def print_program_error(error, input):
+    """Print the traceback of an error raised by a running .pyhan program,
+    leaving out the frames of the compiler.
+
+    Parameters:
+    error (Exception): The error.
+    input (str): The path of the .pyhan file.
+    """
+    import traceback
+
+    trace = error.__traceback__
+    while trace is not None and trace.tb_frame.f_code.co_filename != input:
+        trace = trace.tb_next
+    traceback.print_exception(type(error), error, trace)
+
+@click.command(no_args_is_help=True)
+@click.argument('src_dir', type=click.Path(exists=True, file_okay=False))
+@click.option('--output', '-o', 'output_dir', type=click.Path(file_okay=False), required=True, metavar='OUT_DIR',
+              help='Directory to write the compiled .py files to, in the same layout as SRC_DIR.')
+@click.option('--jobs', '-j', type=click.IntRange(min=1), help='Number of processes to compile with. Defaults to the number of CPUs.')
+@click.option('--optimize', '-O', is_flag=True, help='Work out expressions made only of literals at compile time and leave out code that can never run.')
+@click.option('--iterative', is_flag=True, help='Parse without recursion, for blocks and parentheses nested too deep for the default parser. With -O, nesting is still limited to a few hundred levels, as the optimizer recurses.')
+@click.option('--native-names', 'native_names', is_flag=True, help='Keep Chinese variable names as they are in the Python code, instead of turning them into Pinyin and a hash.')
+@click.option('--short-names', 'short_names', is_flag=True, help='Turn Chinese variable names into Pinyin and only as much of the hash as tells them apart.')
+@click.option('--name-header', 'name_header', is_flag=True, help='Start each compiled .py file with a comment giving the Python name of each Chinese variable.')
+@click.option('--no-cache', 'no_cache', is_flag=True, help='Compile the files again even if they were compiled the same way before, and do not keep the output.')
+def build(src_dir, output_dir, jobs, optimize, iterative, native_names, short_names, name_header, no_cache):
+    """Compile every .pyhan file under SRC_DIR into a .py file at the same place under OUT_DIR. \
+Files whose source has not changed since they were last built are skipped."""
+    from project import buildProject
+
+    result = buildProject(src_dir, output_dir, jobs=jobs, optimize=optimize, iterative=iterative, nativeNames=native_names,
+                          shortNames=short_names, nameHeader=name_header, cache=None if no_cache else CompileCache())
+    for path, error in result.errors.items():
+        click.echo(f"{os.path.join(src_dir, path)}: {error}", err=True)
+    click.echo(result.summary())
+    if result.errors:
+        sys.exit(1)
+
+def main():
+    """Run `pyhan build` if the first argument is build, or else compile or run a .pyhan file."""
+    if len(sys.argv) > 1 and sys.argv[1] == 'build':
+        build(sys.argv[2:], prog_name='pyhan build')
+    else:
+        execute()
+
 if __name__ == '__main__':
-    execute()
+    main()
@@ -10,6 +10,6 @@ setup(
     ],
     entry_points='''
         [console_scripts]
-        pyhan=cli.pyhan_cli:execute
+        pyhan=cli.pyhan_cli:main
     ''',
 )
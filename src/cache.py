@@ -0,0 +1,150 @@
+import contextlib
+import os
+import sys
+
+from emit import writeAtomically
+from utils import pinyinInstallation
+
+class CompileCache:
+    """
+    CompileCache keeps compiled output on disk, under a hash of the source, the compiler and the options
+    that change the output, so compiling the same source again reads the output instead of compiling it.
+    The least recently used entries are removed once all the entries take more than maxSize bytes.
+
+    Entries are written to a temporary file that replaces them, so an entry is never read half written.
+    Writing entries and removing old ones is done under a lock on the directory, so processes can share it.
+    """
+    # Most bytes the entries may take before the least recently used are removed.
+    MAX_SIZE = 64 << 20
+    # Name of the file locked by processes writing to the directory.
+    LOCK_FILE = 'lock'
+
+    def __init__(self, directory: str | None = None, maxSize: int = MAX_SIZE):
+        self.directory = directory if directory is not None else defaultCacheDirectory()
+        self.maxSize = maxSize
+
+    def key(self, inputFile: str, kind: str, options: dict) -> str:
+        """
+        Return the key of the output of a source file, which changes whenever the output could.
+
+        Parameters:
+        inputFile (str): The path to the source file.
+        kind (str): The kind of output, like 'py' for Python code or 'code' for a code object.
+        options (dict): The compile options that change the output.
+        """
+        import hashlib
+
+        digest = hashlib.sha256()
+        for part in (compilerVersion(), sys.version, pinyinInstallation(), kind, repr(sorted(options.items()))):
+            digest.update(part.encode('utf-8') + b'\0')
+        with open(inputFile, 'rb') as sourceFile:
+            while chunk := sourceFile.read(1 << 20):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def path(self, key: str) -> str:
+        """
+        Return the path of the entry of a key.
+
+        Parameters:
+        key (str): The key.
+        """
+        return os.path.join(self.directory, key)
+
+    def get(self, key: str) -> bytes | None:
+        """
+        Return the output kept under a key, or None if there is none, and mark it as the most recently used.
+
+        Parameters:
+        key (str): The key.
+        """
+        path = self.path(key)
+        try:
+            with open(path, 'rb') as entryFile:
+                data = entryFile.read()
+            os.utime(path)
+        except OSError:
+            return None     # There is no entry, or another process has just removed it.
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        """
+        Keep some output under a key, and remove the least recently used entries if there are too many.
+        Output that cannot be kept, like when the directory cannot be written, is left out without an error.
+
+        Parameters:
+        key (str): The key.
+        data (bytes): The output.
+        """
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with self.lock():
+                writeAtomically(self.path(key), data)
+                self.evict()
+        except OSError:
+            pass
+
+    def evict(self) -> None:
+        """
+        Remove the least recently used entries until the rest take at most maxSize bytes.
+        Must be called with the lock held.
+        """
+        entries = []
+        size = 0
+        with os.scandir(self.directory) as scan:
+            for entry in scan:
+                if entry.name == self.LOCK_FILE or entry.name.endswith('.tmp') or not entry.is_file():
+                    continue
+                stat = entry.stat()
+                entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+                size += stat.st_size
+
+        entries.sort()
+        for _, entrySize, path in entries:
+            if size <= self.maxSize:
+                break
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(path)
+            size -= entrySize
+
+    @contextlib.contextmanager
+    def lock(self):
+        """
+        Hold an exclusive lock on the directory, waiting for other processes to let go of it first.
+        """
+        with open(os.path.join(self.directory, self.LOCK_FILE), 'a+b') as lockFile:
+            if os.name == 'nt':
+                import msvcrt
+                lockFile.seek(0)
+                msvcrt.locking(lockFile.fileno(), msvcrt.LK_LOCK, 1)
+                try:
+                    yield
+                finally:
+                    lockFile.seek(0)
+                    msvcrt.locking(lockFile.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(lockFile, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lockFile, fcntl.LOCK_UN)
+
+
+def defaultCacheDirectory() -> str:
+    """
+    Return the directory of the cache: $PYHAN_CACHE_DIR if it is set, or else pyhan in the user's cache directory.
+    """
+    if os.environ.get('PYHAN_CACHE_DIR'):
+        return os.environ['PYHAN_CACHE_DIR']
+    return os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'), 'pyhan')
+
+def compilerVersion() -> str:
+    """
+    Return the names, sizes and modification times of the modules of the compiler, which change with any change
+    to the compiler, without reading them.
+    """
+    directory = os.path.dirname(os.path.abspath(__file__))
+    with os.scandir(directory) as scan:
+        modules = sorted((entry for entry in scan if entry.name.endswith('.py')), key=lambda entry: entry.name)
+    return ";".join(f"{module.name}:{module.stat().st_size}@{module.stat().st_mtime_ns}" for module in modules)
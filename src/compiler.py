@@ -1,30 +1,257 @@
 from lex import *
 from emit import *
 from parse import *
+from source import readSource
+from pyast import AstGenerator
+from generate import CodeGenerator
+from diagnostic import exitOnDiagnostics
+from tracer import Tracer
+from utils import NameTable
+from sourcemap import SourceMap
+from cache import CompileCache
+from types import CodeType
+from importlib.util import MAGIC_NUMBER
+import marshal
+import os
 import sys
 
-def compile(inputFile: str, outputFile: str) -> None:
+def compile(inputFile: str, outputFile: str, stream: bool = False, jobs: int = 1, optimize: bool = False,
+            iterative: bool = False, recover: bool = False, trace: bool = False, nativeNames: bool = False,
+            shortNames: bool = False, nameHeader: bool = False, sourceMap: bool = False, cache: CompileCache | None = None) -> None:
     """
     Compiles the source file into the target file.
+    A target file ending with .pyc gets the bytecode of the source, which Python can run directly.
     
     Parameters:
         inputFile (str): The path to the source file.
         outputFile (str): The path to the target file.
+        stream (bool): Read the source line by line and write each top-level statement
+            as soon as it is compiled, so memory use does not grow with the file size.
+        jobs (int): The number of processes to lex a large source with.
+        optimize (bool): Fold expressions made only of literals into their value at compile time
+            and leave out code that can never run.
+        iterative (bool): Parse with an explicit stack instead of recursive calls, so blocks and parentheses
+            can be nested tens of thousands deep. Only for .py output without optimize: the optimizer,
+            the Python ast of .pyc output and Python's own compiler still recurse, which limits them
+            to a few hundred levels.
+        recover (bool): Carry on after a syntax error and exit with every error in the source at the end,
+            instead of exiting at the first. Nothing is written if there are errors.
+        trace (bool): Record the productions the parser goes through and write the latest ones to stderr
+            if compiling stops at an error.
+        nativeNames (bool): Keep the names of variables as they are written where Python accepts them,
+            instead of turning every Chinese name into Pinyin and a hash.
+        shortNames (bool): Turn Chinese names into Pinyin and only as many digits of the hash
+            as it takes to tell them apart in the source, instead of the whole hash.
+        nameHeader (bool): Start the target file with a comment giving the Python name of each Chinese variable.
+        sourceMap (bool): Write the line and column in the source of each line of the target file
+            to a .map file next to it (see sourcemap.py). Bytecode already has the lines of the source.
+        cache (CompileCache | None): Cache to read the output from if the same source was compiled the same way
+            before, and to keep it in otherwise. Output with a source map is not kept, as the map names the source file.
     """
     if not inputFile or not outputFile:
         sys.exit("Error: Compiler needs both source file and output file as argument.")
 
-    source = ""
-    with open(inputFile, 'r') as sourceFile:
-        # Remove blank lines
-        for line in sourceFile:
-            if not line.isspace():
-                source += line
+    if outputFile.endswith('.pyc'):
+        if stream:
+            sys.exit("Error: A .pyc file cannot be written one statement at a time.")
+        writeBytecode(compileToCode(inputFile, jobs, optimize, iterative, recover, trace, nativeNames, shortNames, cache),
+                      inputFile, outputFile)
+        return
+    if stream and nameHeader:
+        sys.exit("Error: A header of variable names cannot be written one statement at a time.")
+
+    cacheKey = None
+    if cache is not None and not sourceMap:
+        cacheKey = cache.key(inputFile, 'py', {'optimize': optimize, 'nativeNames': nativeNames,
+                                               'shortNames': shortNames, 'nameHeader': nameHeader})
+        output = cache.get(cacheKey)
+        if output is not None:
+            writeAtomically(outputFile, output)
+            return
+
+    # Python names of the variables of the source, if they are short or written in the header.
+    nameTable = NameTable(shortNames) if shortNames or nameHeader else None
+
+    diagnostics = [] if recover else None
+    tracer = Tracer() if trace else None
+    positions = SourceMap(inputFile) if sourceMap else None
+    if stream:
+        with open(inputFile, 'r', encoding='utf-8') as sourceFile:
+            emitter = StreamEmitter(outputFile, Emitter.BUFFER_SIZE, positions)
+            generator = CodeGenerator(emitter, nativeNames, nameTable)
+            parser = Parser(StreamLexer(sourceFile, diagnostics=diagnostics), emitter, optimize, generator, iterative, diagnostics, tracer)
+            try:
+                parseProgram(parser)
+                exitOnDiagnostics(diagnostics)
+            except BaseException:
+                emitter.discard()
+                raise
+            emitter.writeFile()
+        if cacheKey is not None:
+            with open(outputFile, 'rb') as output:
+                cache.put(cacheKey, output.read())
+        return
 
     # Initialize the lexer, emitter, and parser.
-    lexer = Lexer(source)
-    emitter = Emitter(outputFile)
-    parser = Parser(lexer, emitter)
+    # Blank lines are skipped by the lexer, so line numbers match the source file.
+    lexer = Lexer(readSource(inputFile), diagnostics=diagnostics)
+    if jobs > 1 and not recover:
+        lexer = lexer.tokenize(workers=jobs)
+    emitter = Emitter(outputFile, sourceMap=positions)
+    parser = Parser(lexer, emitter, optimize, CodeGenerator(emitter, nativeNames, nameTable), iterative, diagnostics, tracer)
 
-    parser.program() # Start the parser.
+    parseProgram(parser) # Start the parser.
+    exitOnDiagnostics(diagnostics)
+    if nameHeader:
+        writeNameHeader(emitter, nameTable)
     emitter.writeFile() # Write the output to file.
+    if cacheKey is not None:
+        cache.put(cacheKey, emitter.getvalue().encode('utf-8'))
+
+def writeNameHeader(emitter: Emitter, nameTable: NameTable) -> None:
+    """
+    Add a comment to the start of the output with the Python name of each variable not written as it is in the source,
+    to find the variables of the source in the generated code.
+
+    Parameters:
+        emitter (Emitter): The emitter of the output.
+        nameTable (NameTable): The Python names of the variables.
+    """
+    for var, name in nameTable.mangled().items():
+        emitter.headerLine(f"# {name} = {var}")
+
+def parseProgram(parser: Parser) -> None:
+    """
+    Parse the whole source. If compiling stops at an error, the productions the parser went through
+    before it are written to stderr, if they are traced.
+
+    Parameters:
+        parser (Parser): The parser.
+    """
+    try:
+        parser.program()
+    except SystemExit:
+        if parser.tracer is not None:
+            parser.tracer.dump()
+        raise
+
+def check(inputFile: str, iterative: bool = False) -> list:
+    """
+    Find every syntax error in the source file in one pass, without writing anything.
+
+    Parameters:
+        inputFile (str): The path to the source file.
+        iterative (bool): Parse with an explicit stack instead of recursive calls.
+    Returns:
+        list: A Diagnostic for each error, with its message, line, column and token, in the order they are in the source.
+    """
+    diagnostics = []
+    lexer = Lexer(readSource(inputFile), diagnostics=diagnostics)
+    Parser(lexer, Emitter(""), iterative=iterative, diagnostics=diagnostics).program()
+    return sorted(diagnostics, key=lambda diagnostic: (diagnostic.line, diagnostic.column))
+
+def compileToCode(inputFile: str, jobs: int = 1, optimize: bool = False, iterative: bool = False, recover: bool = False,
+                  trace: bool = False, nativeNames: bool = False, shortNames: bool = False, cache: CompileCache | None = None):
+    """
+    Compiles the source file into a Python code object, through a Python ast rather than Python code.
+    Tracebacks of the code object point to the lines of the source file.
+
+    Parameters:
+        inputFile (str): The path to the source file.
+        jobs (int): The number of processes to lex a large source with.
+        optimize (bool): Fold expressions made only of literals into their value at compile time
+            and leave out code that can never run.
+        iterative (bool): Parse with an explicit stack instead of recursive calls. The Python ast and the optimizer
+            are still built by recursive calls, as Python's own compiler is, so nesting stays limited
+            to a few hundred levels.
+        recover (bool): Carry on after a syntax error and exit with every error in the source at the end,
+            instead of exiting at the first.
+        trace (bool): Record the productions the parser goes through and write the latest ones to stderr
+            if compiling stops at an error.
+        nativeNames (bool): Keep the names of variables as they are written where Python accepts them,
+            instead of turning every Chinese name into Pinyin and a hash.
+        shortNames (bool): Turn Chinese names into Pinyin and only as many digits of the hash
+            as it takes to tell them apart in the source, instead of the whole hash.
+        cache (CompileCache | None): Cache to read the bytecode from if the same source was compiled the same way
+            before, and to keep it in otherwise.
+    Returns:
+        CodeType: The code object. Raises SyntaxError if Python could not compile the generated code.
+    """
+    cacheKey = None
+    if cache is not None:
+        cacheKey = cache.key(inputFile, 'code', {'optimize': optimize, 'nativeNames': nativeNames, 'shortNames': shortNames})
+        bytecode = cache.get(cacheKey)
+        if bytecode is not None:
+            return withFilename(marshal.loads(bytecode), inputFile)
+
+    diagnostics = [] if recover else None
+    source = readSource(inputFile)
+    lexer = Lexer(source, diagnostics=diagnostics)
+    if jobs > 1 and not recover:
+        lexer = lexer.tokenize(workers=jobs)
+    generator = AstGenerator(inputFile, source, nativeNames, NameTable() if shortNames else None)
+    parser = Parser(lexer, Emitter(""), optimize, generator, iterative, diagnostics, Tracer() if trace else None)
+
+    parseProgram(parser)
+    exitOnDiagnostics(diagnostics)
+    code = generator.code()
+    if cacheKey is not None:
+        cache.put(cacheKey, marshal.dumps(code))
+    return code
+
+def withFilename(code, filename: str):
+    """
+    Return a code object, and the code objects in it, with another source file, for bytecode kept in the cache
+    from a source file with the same contents somewhere else.
+
+    Parameters:
+        code (CodeType): The code object.
+        filename (str): The path to the source file.
+    """
+    if code.co_filename == filename:
+        return code
+    consts = tuple(withFilename(const, filename) if isinstance(const, CodeType) else const for const in code.co_consts)
+    return code.replace(co_filename=filename, co_consts=consts)
+
+def run(inputFile: str, jobs: int = 1, optimize: bool = False, iterative: bool = False, recover: bool = False,
+        trace: bool = False, nativeNames: bool = False, shortNames: bool = False, cache: CompileCache | None = None) -> None:
+    """
+    Compiles the source file into a Python code object and runs it as the main module.
+
+    Parameters:
+        inputFile (str): The path to the source file.
+        jobs (int): The number of processes to lex a large source with.
+        optimize (bool): Fold expressions made only of literals into their value at compile time
+            and leave out code that can never run.
+        iterative (bool): Parse with an explicit stack instead of recursive calls. The Python ast and the optimizer
+            are still built by recursive calls, as Python's own compiler is, so nesting stays limited
+            to a few hundred levels.
+        recover (bool): Carry on after a syntax error and exit with every error in the source at the end,
+            instead of exiting at the first.
+        trace (bool): Record the productions the parser goes through and write the latest ones to stderr
+            if compiling stops at an error.
+        nativeNames (bool): Keep the names of variables as they are written where Python accepts them,
+            instead of turning every Chinese name into Pinyin and a hash.
+        shortNames (bool): Turn Chinese names into Pinyin and only as many digits of the hash
+            as it takes to tell them apart in the source, instead of the whole hash.
+        cache (CompileCache | None): Cache to read the bytecode from if the same source was compiled the same way
+            before, and to keep it in otherwise.
+    """
+    code = compileToCode(inputFile, jobs, optimize, iterative, recover, trace, nativeNames, shortNames, cache)
+    exec(code, {'__name__': '__main__', '__file__': inputFile})
+
+def writeBytecode(code, inputFile: str, outputFile: str) -> None:
+    """
+    Write a code object to a .pyc file, with the header Python checks before running it.
+    Like other output, the file is not touched if it already has the same bytecode.
+
+    Parameters:
+        code (CodeType): The code object.
+        inputFile (str): The path to the source file, whose modification time and size go in the header.
+        outputFile (str): The path to the .pyc file.
+    """
+    sourceStat = os.stat(inputFile)
+    header = MAGIC_NUMBER + (0).to_bytes(4, 'little')\
+        + (int(sourceStat.st_mtime) & 0xFFFFFFFF).to_bytes(4, 'little')\
+        + (sourceStat.st_size & 0xFFFFFFFF).to_bytes(4, 'little')
+    writeAtomically(outputFile, header + marshal.dumps(code))
@@ -0,0 +1,42 @@
+import sys
+
+class Diagnostic:
+    """
+    Diagnostic is an error found in the source while compiling in error-recovering mode,
+    where the Lexer and Parser record errors and carry on instead of exiting at the first.
+    """
+    __slots__ = ('message', 'line', 'column', 'token')
+
+    def __init__(self, message: str, line: int, column: int, token: str):
+        self.message = message  # The error message, as the compiler would exit with it.
+        self.line = line        # Line of the error in the source, counting from 1.
+        self.column = column    # Column of the error in the source, counting from 1.
+        self.token = token      # Text of the token, or character, the error was found at.
+
+    def __str__(self) -> str:
+        return f"{self.message} (line {self.line}, column {self.column})"
+
+    def __repr__(self) -> str:
+        return f"Diagnostic({self.message!r}, {self.line}, {self.column}, {self.token!r})"
+
+
+class CompileError(Exception):
+    """
+    CompileError is raised by Lexer.abort and Parser.abort in error-recovering mode,
+    to be caught where the error is recorded and the source skipped up to where compiling can carry on.
+    """
+    def __init__(self, diagnostic: Diagnostic):
+        super().__init__(str(diagnostic))
+        self.diagnostic = diagnostic
+
+
+def exitOnDiagnostics(diagnostics: list) -> None:
+    """
+    Exit with every error recorded while compiling, in the order they are in the source, if there are any.
+
+    Parameters:
+    diagnostics (list): The recorded Diagnostic objects.
+    """
+    if diagnostics:
+        ordered = sorted(diagnostics, key=lambda diagnostic: (diagnostic.line, diagnostic.column))
+        sys.exit("\n".join(str(diagnostic) for diagnostic in ordered))
@@ -1,43 +1,225 @@
+import os
+import stat
+
 class Emitter:
     """
     Emitter keeps track of the generated code and outputs it.
+    The code is kept as a list of chunks and only joined when it is needed, so adding code takes the same time
+    however much code there is already.
+    Given an open file, it writes the code through to it once enough is buffered, instead of keeping it all.
+    Given a SourceMap, it records the position in the source of each line of code, and writes it next to the output.
     """
-    def __init__(self, fullPath: str):
+    # Number of characters buffered before they are written through to the output file.
+    BUFFER_SIZE = 1 << 16
+
+    def __init__(self, fullPath: str | None, outputFile = None, bufferSize: int = BUFFER_SIZE, sourceMap = None):
         self.fullPath = fullPath
-        self.header = ""
-        self.code = ""
+        self.headerChunks = []
+        self.chunks = []            # Code not written to the output file yet.
+        self.size = 0               # Number of characters in chunks.
+        # Open file the code is written through to, at the end of a top-level statement once bufferSize characters
+        # are buffered, or None to keep the code until writeFile. Header lines must be added before the first write.
+        self.outputFile = outputFile
+        self.bufferSize = bufferSize
+        self.written = False        # If the header has been written to the output file.
+        self.sourceMap = sourceMap
 
-    def emit(self, code: str) -> None:
+    @property
+    def header(self) -> str:
+        """
+        The lines added to the start of the output.
+        """
+        return "".join(self.headerChunks)
+
+    @property
+    def code(self) -> str:
+        """
+        The code not written to the output file yet.
+        """
+        if len(self.chunks) > 1:
+            self.chunks = ["".join(self.chunks)]
+        return self.chunks[0] if self.chunks else ""
+
+    @code.setter
+    def code(self, code: str) -> None:
+        self.chunks = [code] if code else []
+        self.size = len(code)
+
+    def emit(self, code: str, positions = ()) -> None:
         """
         Add some code to the output.
-        
+
         Parameters:
         code (str): The code to add.
+        positions: The (line, column) in the source of each line of the code, for the source map.
         """
-        self.code += code
+        self.chunks.append(code)
+        self.size += len(code)
+        if self.sourceMap is not None:
+            self.sourceMap.extend(code, positions)
 
     def emitLine(self, code: str) -> None:
         """
         Add some code to the output, followed by a newline.
-        
+
         Parameters:
         code (str): The code to add.
         """
-        self.code += code + '\n'
+        self.emit(code + '\n')
 
     def headerLine(self, code: str) -> None:
         """
         Add some code to the start of the output, followed by a newline.
-        
+
         Parameters:
         code (str): The code to add.
         """
-        self.header += code + '\n'
+        self.headerChunks.append(code + '\n')
+        if self.sourceMap is not None:
+            self.sourceMap.offset += 1
+
+    def getvalue(self) -> str:
+        """
+        Return the output, with the header, or what has not been written to the output file yet.
+        """
+        return ("" if self.written else self.header) + self.code
+
+    def flush(self) -> None:
+        """
+        Called after each top-level statement. Writes the code through to the output file if there is one
+        and enough code is buffered. Otherwise the output is only written by writeFile.
+        """
+        if self.outputFile is not None and self.size >= self.bufferSize:
+            self.writeThrough()
+
+    def writeThrough(self) -> None:
+        """
+        Write the header, if it has not been written yet, and the code buffered so far to the output file.
+        """
+        if not self.written:
+            self.outputFile.writelines(self.headerChunks)
+            self.written = True
+        self.outputFile.writelines(self.chunks)
+        self.chunks = []
+        self.size = 0
+
+    def writeFile(self):
+        """
+        Write the output contents of the output file, unless it already has them (see writeAtomically).
+        Given an open output file, write the rest of the output to it, and leave it open.
+        """
+        if self.outputFile is not None:
+            self.writeThrough()
+            return
+        writeAtomically(self.fullPath, "".join(self.headerChunks + self.chunks).encode('utf-8'))
+        self.writeSourceMap()
+
+    def writeSourceMap(self) -> None:
+        """
+        Write the source map, if there is one, next to the output file.
+        """
+        if self.sourceMap is not None:
+            from sourcemap import mapPath
+            self.sourceMap.save(mapPath(self.fullPath))
+
+
+
+class StreamEmitter(Emitter):
+    """
+    StreamEmitter writes the generated code as it goes, after each top-level statement once bufferSize characters
+    are buffered, so only the last statements generated are kept in memory. Header lines must be added before
+    the first statement is flushed. The code goes to a temporary file next to the output file, which replaces it
+    once all the code is written, so the output file is never left half written.
+    """
+    def __init__(self, fullPath: str, bufferSize: int = 0, sourceMap = None):
+        super().__init__(fullPath, None, bufferSize, sourceMap)
+        self.temporaryPath = f"{fullPath}.{os.getpid()}.tmp"
+
+    def openTemporaryFile(self) -> None:
+        """
+        Open the temporary file, if it is not open yet.
+        """
+        if self.outputFile is None:
+            self.outputFile = open(self.temporaryPath, 'w', encoding='utf-8')
+
+    def flush(self) -> None:
+        """
+        Write the code generated so far to the temporary file, if enough is buffered.
+        """
+        self.openTemporaryFile()
+        super().flush()
 
     def writeFile(self):
         """
-        Write the output contents of the output file.
+        Write the rest of the output and replace the output file with it, unless it already has the same contents.
         """
-        with open(self.fullPath, 'w') as outputFile:
-            outputFile.write(self.header + self.code)
+        import filecmp
 
+        self.openTemporaryFile()
+        try:
+            self.writeThrough()
+            self.outputFile.close()
+            if os.path.isfile(self.fullPath) and filecmp.cmp(self.temporaryPath, self.fullPath, shallow=False):
+                os.remove(self.temporaryPath)
+            else:
+                copyMode(self.fullPath, self.temporaryPath)
+                os.replace(self.temporaryPath, self.fullPath)
+        except BaseException:
+            self.discard()
+            raise
+        self.writeSourceMap()
+
+    def discard(self) -> None:
+        """
+        Remove what has been written, leaving the output file as it was, when compiling stops at an error.
+        """
+        if self.outputFile is not None:
+            self.outputFile.close()
+            if os.path.exists(self.temporaryPath):
+                os.remove(self.temporaryPath)
+
+
+def writeAtomically(path: str, data: bytes) -> bool:
+    """
+    Write data to a file, unless the file already has exactly that data, so it is not touched when nothing changed.
+    Otherwise the data is written to a temporary file next to it, which then replaces it with the same permissions,
+    so the file is never left half written. Return true if the file was written.
+
+    Parameters:
+    path (str): The path to the file.
+    data (bytes): The data to write.
+    """
+    try:
+        if os.path.getsize(path) == len(data):
+            with open(path, 'rb') as existingFile:
+                if existingFile.read() == data:
+                    return False
+    except OSError:
+        pass    # There is no file to compare with.
+
+    temporaryPath = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temporaryPath, 'wb') as temporaryFile:
+            temporaryFile.write(data)
+        copyMode(path, temporaryPath)
+        os.replace(temporaryPath, path)
+    except BaseException:
+        if os.path.exists(temporaryPath):
+            os.remove(temporaryPath)
+        raise
+    return True
+
+def copyMode(path: str, temporaryPath: str) -> None:
+    """
+    Give a temporary file that is about to replace a file the permissions of that file, if it exists,
+    so replacing it keeps them, like the executable bit of a script.
+
+    Parameters:
+    path (str): The path to the file.
+    temporaryPath (str): The path to the temporary file.
+    """
+    try:
+        mode = os.stat(path).st_mode
+    except FileNotFoundError:
+        return
+    os.chmod(temporaryPath, stat.S_IMODE(mode))
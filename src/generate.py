@@ -0,0 +1,198 @@
+from lex import TokenType
+from emit import Emitter
+from tree import *
+from utils import getAlphaNumericVar, getNativeVar, NameTable
+from functools import partial
+
+# Python text of each operator in the syntax tree.
+OPERATOR_TEXTS = {
+    TokenType.PLUS: "+",
+    TokenType.MINUS: "-",
+    TokenType.ASTERISK: "*",
+    TokenType.SLASH: "/",
+    TokenType.EQEQ: "==",
+    TokenType.NOTEQ: "!=",
+    TokenType.LT: "<",
+    TokenType.LTEQ: "<=",
+    TokenType.GT: ">",
+    TokenType.GTEQ: ">=",
+    TokenType.AND: " and ",
+    TokenType.OR: " or ",
+    TokenType.NOT: "not ",
+}
+
+class CodeGenerator:
+    """
+    CodeGenerator walks the syntax tree built by the Parser and emits the Python code for it,
+    one top-level statement at a time.
+    """
+    def __init__(self, emitter: Emitter, nativeNames: bool = False, nameTable: NameTable | None = None):
+        self.emitter = emitter
+        # Python name of a variable: as written in the source if Python accepts it, or else alphanumeric,
+        # from the name table of the compilation unit if there is one.
+        alphaNumericVar = nameTable.get if nameTable is not None else getAlphaNumericVar
+        self.variableName = partial(getNativeVar, alphaNumericVar=alphaNumericVar) if nativeNames else alphaNumericVar
+
+        # Code generating method of each kind of node.
+        self.statementGenerators = {
+            Print: self.printStatement,
+            If: self.ifStatement,
+            While: self.whileStatement,
+            Assign: self.assignStatement,
+            Break: self.breakStatement,
+            Continue: self.continueStatement,
+            Pass: self.passStatement,
+            ExpressionStatement: self.expressionStatement,
+        }
+        self.expressionGenerators = {
+            Number: self.number,
+            String: self.string,
+            Boolean: self.boolean,
+            Name: self.name,
+            Group: self.group,
+            UnaryOp: self.unaryOp,
+            BinOp: self.binOp,
+            BoolOp: self.boolOp,
+            Compare: self.compare,
+            Constant: self.constant,
+        }
+
+    def statement(self, node: StatementNode) -> None:
+        """
+        Emit the code of a statement, with its indentation and a newline at the end.
+        Statements with blocks give their code as a list of lines and statements, which are joined in order
+        from a stack rather than by recursive calls, so blocks can be nested as deep as the Parser allows.
+        The line and column in the source of each line of code are emitted with it, for the source map.
+
+        Parameters:
+        node (StatementNode): The statement.
+        """
+        texts = []
+        positions = []
+        stack = [node]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, str):
+                texts.append(item)
+                continue
+            if isinstance(item, tuple):
+                # A line of an 'elif' or 'else' block, with the node it comes from in the source.
+                text, origin = item
+                texts.append(text)
+                positions.append((origin.line, origin.column))
+                continue
+            texts.append(" " * item.indentation)
+            positions.append((item.line, item.column))
+            code = self.statementGenerators[type(item)](item)
+            if isinstance(code, str):
+                texts.append(code)
+            else:
+                stack.extend(reversed(code))
+        self.emitter.emit("".join(texts), positions)
+
+    def block(self, statements: list) -> None:
+        """
+        Emit the code of the statements in a block.
+
+        Parameters:
+        statements (list): The statements.
+        """
+        for statement in statements:
+            self.statement(statement)
+
+    def printStatement(self, node: Print) -> str:
+        return "print(" + self.expression(node.value) + ")\n"
+
+    def ifStatement(self, node: If) -> list:
+        parts = []
+        for index, (test, body) in enumerate(node.branches):
+            if index > 0:
+                parts.append((" " * node.indentation + "elif " + self.expression(test) + ":\n", test))
+            else:
+                parts.append("if " + self.expression(test) + ":\n")
+            parts.extend(body)
+
+        if node.orelse is not None:
+            # The position of 否则 is not kept, so 'else' takes the one of the first statement of its block.
+            parts.append((" " * node.indentation + "else:\n", node.orelse[0]))
+            parts.extend(node.orelse)
+        return parts
+
+    def whileStatement(self, node: While) -> list:
+        return ["while " + self.expression(node.test) + ":\n"] + node.body
+
+    def assignStatement(self, node: Assign) -> str:
+        return self.variableName(node.name) + "=" + self.expression(node.value) + "\n"
+
+    def breakStatement(self, node: Break) -> str:
+        return "break\n"
+
+    def continueStatement(self, node: Continue) -> str:
+        return "continue\n"
+
+    def passStatement(self, node: Pass) -> str:
+        return "pass\n"
+
+    def expressionStatement(self, node: ExpressionStatement) -> str:
+        return self.expression(node.value) + "\n"
+
+    def expression(self, node: ExpressionNode) -> str:
+        """
+        Return the code of an expression.
+        Operators and parentheses give their code as a tuple of texts and operands, which are joined in order
+        from a stack rather than by recursive calls, so the time taken grows linearly with the nesting.
+
+        Parameters:
+        node (ExpressionNode): The expression.
+        """
+        texts = []
+        stack = [node]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, str):
+                texts.append(item)
+                continue
+            code = self.expressionGenerators[type(item)](item)
+            if isinstance(code, str):
+                texts.append(code)
+            else:
+                stack.extend(reversed(code))
+        return "".join(texts)
+
+    def number(self, node: Number) -> str:
+        return node.text
+
+    def string(self, node: String) -> str:
+        return f"\"{node.text}\""
+
+    def boolean(self, node: Boolean) -> str:
+        return "True" if node.value else "False"
+
+    def name(self, node: Name) -> str:
+        return self.variableName(node.name)
+
+    def group(self, node: Group) -> tuple:
+        return ("(", node.expression, ")")
+
+    def unaryOp(self, node: UnaryOp) -> tuple:
+        return (OPERATOR_TEXTS[node.op], node.operand)
+
+    def binOp(self, node: BinOp) -> tuple:
+        return (node.left, OPERATOR_TEXTS[node.op], node.right)
+
+    def boolOp(self, node: BoolOp) -> tuple:
+        parts = [node.values[0]]
+        for value in node.values[1:]:
+            parts += (OPERATOR_TEXTS[node.op], value)
+        return tuple(parts)
+
+    def compare(self, node: Compare) -> tuple:
+        parts = [node.left]
+        for op, comparator in zip(node.ops, node.comparators):
+            parts += (OPERATOR_TEXTS[op], comparator)
+        return tuple(parts)
+
+    def constant(self, node: Constant) -> str:
+        if isinstance(node.value, str):
+            return f"\"{node.value}\""
+        return repr(node.value)
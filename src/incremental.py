@@ -0,0 +1,360 @@
+from bisect import bisect_left
+from lex import *
+from emit import Emitter
+from parse import Parser
+from source import normalizeNewlines
+import sys
+
+class IncrementalCompiler:
+    """
+    IncrementalCompiler keeps a source in memory and recompiles it after each edit,
+    for editor integrations. Tokens are cached per line and generated code per top-level statement,
+    so an edit only re-lexes the lines it touches and re-parses from the top-level statement
+    that first read them, until the parse is back in step with the cached statements.
+    The output, or error, is always the same as compiling the whole source again.
+    """
+    def __init__(self, source: str = "", engine: str = Lexer.REGEX_ENGINE, optimize: bool = False):
+        self.engine = engine                                    # The Lexer engine used for each line.
+        self.optimize = optimize                                # Optimize the code, like compiler.compile.
+        self.lines = splitLines(normalizeNewlines(source))      # Source lines, each ending with '\n' except the last.
+        self.lineTokens = [None] * len(self.lines)              # Cached LineTokens of each line, or None.
+        self.statements = None  # Statement of each top-level statement parsed, or None before the first compile.
+        self.error = None       # Error message of the last compile, if it failed.
+        self.errorLine = 0      # Line of the top-level statement that failed.
+        self.lastLine = 0       # Line of the last token read, if the last compile succeeded.
+        self.detached = []      # Runs of cached statements after the one that failed, kept to be reused.
+        self.code = ""          # Generated code of the last successful compile.
+
+    def compile(self) -> str:
+        """
+        Return the generated code of the source. Errors exit like compiler.compile does.
+        """
+        if self.statements is None:
+            self.statements = []
+            self.parse(1, [])
+        return self.result()
+
+    def edit(self, startLine: int, startColumn: int, endLine: int, endColumn: int, text: str) -> str:
+        """
+        Replace the text between two positions with the given text, recompile and return the generated code.
+        Positions count lines and columns from 1, like Token.line and Token.column.
+
+        Parameters:
+        startLine (int): The line of the first character replaced.
+        startColumn (int): The column of the first character replaced.
+        endLine (int): The line of the position just after the last character replaced.
+        endColumn (int): The column of the position just after the last character replaced.
+        text (str): The replacement text.
+        """
+        if not (self.isPosition(startLine, startColumn) and self.isPosition(endLine, endColumn))\
+            or (startLine, startColumn) > (endLine, endColumn):
+            sys.exit(f"Error: Edit range ({startLine}, {startColumn})-({endLine}, {endColumn}) is outside the source.")
+
+        newLines = splitLines(self.lines[startLine - 1][:startColumn - 1]
+                              + normalizeNewlines(text)
+                              + self.lines[endLine - 1][endColumn - 1:])
+        if endLine < len(self.lines):
+            newLines.pop()  # Empty text after the last newline, which starts the unchanged line.
+        self.lines[startLine - 1 : endLine] = newLines
+        self.lineTokens[startLine - 1 : endLine] = [None] * len(newLines)
+        if self.statements is None:
+            return self.compile()
+
+        # Re-parse from the first statement that read a token at or after the edit,
+        # or from the statement that failed if none did.
+        first = bisect_left(self.statements, startLine, key=lambda statement: statement.lastLine)
+        if self.error is None and startLine > self.lastLine:
+            return self.result()    # Parsing stopped at a NUL character before the edit.
+        runs = [Run(self.statements[first:],
+                    set(symbol for statement in self.statements[:first] for symbol in statement.symbols),
+                    self.errorLine if self.error is not None else None)]
+        if first < len(self.statements):
+            parseLine = self.statements[first].startLine
+        elif self.error is not None:
+            parseLine = self.errorLine
+        else:
+            parseLine = 1   # There are no statements.
+        self.statements = self.statements[:first]
+
+        # The statements after the edit can be reused once the parse gets back to one of them.
+        delta = len(newLines) - (endLine - startLine + 1)
+        self.parse(parseLine, adjustRuns(runs + self.detached, startLine, endLine, delta))
+        return self.result()
+
+    def isPosition(self, line: int, column: int) -> bool:
+        """
+        Return true if the position is in the source. The end of a line is the position of its newline.
+
+        Parameters:
+        line (int): The line of the position.
+        column (int): The column of the position.
+        """
+        if not 1 <= line <= len(self.lines):
+            return False
+        text = self.lines[line - 1]
+        return 1 <= column <= len(text) + (0 if text.endswith('\n') else 1)
+
+    def result(self) -> str:
+        """
+        Return the generated code of the last compile, or exit with its error.
+        """
+        if self.error is not None:
+            sys.exit(self.error)
+        return self.code
+
+    def parse(self, startLine: int, runs: list) -> None:
+        """
+        Parse the top-level statements from the given line to the end of the source,
+        reusing runs of cached statements once the parse is back in step with one of them.
+
+        Parameters:
+        startLine (int): The line of the first statement to parse, after the cached statements.
+        runs (list): Runs of cached statements that may be reused, in order.
+        """
+        self.error = None
+        self.detached = []
+        while True:
+            self.startLine = startLine
+            self.symbols = SymbolTable(symbol for statement in self.statements for symbol in statement.symbols)
+            self.runs = runs
+            self.runIndex = -1
+            self.nextRun()
+            try:
+                self.parser = Parser(CachedLexer(self.tokensFrom(startLine)), StatementEmitter(self.statementParsed),
+                                     self.optimize)
+                self.parser.symbols = self.symbols
+                self.parser.program()
+            except Resynchronized:
+                run = runs[self.runIndex]
+                self.statements.extend(run.statements[self.nextOld:])
+                if run.endLine is not None:
+                    # Carry on from the statement that failed in the cached parse, as it may not fail now.
+                    startLine = run.endLine
+                    runs = runs[self.runIndex + 1:]
+                    continue
+                self.lastLine = self.statements[-1].lastLine
+            except SystemExit as error:
+                self.error = str(error.code)
+                self.errorLine = self.startLine
+                if self.runIndex < len(runs):
+                    run = runs[self.runIndex]
+                    self.detached = [Run(run.statements[self.nextOld:], self.expectedSymbols, run.endLine)]
+                    self.detached += runs[self.runIndex + 1:]
+            else:
+                self.lastLine = self.parser.peekToken.line
+            finally:
+                self.parser = None
+            break
+
+        if self.error is None:
+            self.code = "".join(statement.code for statement in self.statements)
+
+    def nextRun(self) -> None:
+        """
+        Move on to the next run of cached statements.
+        """
+        self.runIndex += 1
+        self.nextOld = 0
+        if self.runIndex < len(self.runs):
+            self.expectedSymbols = set(self.runs[self.runIndex].symbols)
+
+    def statementParsed(self, code: str) -> None:
+        """
+        Cache a top-level statement that has just been parsed, and stop parsing if the next statement
+        is the start of a cached one, with at least the symbols that were declared before it then.
+
+        Parameters:
+        code (str): The generated code of the statement.
+        """
+        parser = self.parser
+        added = tuple(self.symbols.added)
+        self.symbols.added.clear()
+        self.statements.append(Statement(self.startLine, parser.peekToken.line, code, added))
+        self.startLine = parser.curToken.line
+
+        while self.runIndex < len(self.runs):
+            statements = self.runs[self.runIndex].statements
+            if self.nextOld == len(statements):
+                self.nextRun()
+                continue
+
+            old = statements[self.nextOld]
+            if old.startLine < self.startLine:
+                self.expectedSymbols.update(old.symbols)
+                self.nextOld += 1
+                continue
+
+            # Declaring more variables than the cached parse did cannot change a statement that parsed.
+            if old.startLine == self.startLine and self.symbols >= self.expectedSymbols:
+                raise Resynchronized()
+            break
+
+    def tokensFrom(self, lineNumber: int):
+        """
+        Generate the tokens of the source from the start of the given line, lexing lines that are not cached.
+        Lexing errors exit when their line is reached, like the Lexer does. The EOF token repeats at the end.
+
+        Parameters:
+        lineNumber (int): The line to start at.
+        """
+        for index in range(lineNumber - 1, len(self.lines)):
+            lineTokens = self.lineTokens[index]
+            if lineTokens is None or (lineTokens.error is not None and lineTokens.lineNumber != index + 1):
+                # Errors are reported with the line number, so only lines without errors can move.
+                lineTokens = self.lineTokens[index] = LineTokens(self.lines[index], index + 1, self.engine)
+
+            for token in lineTokens.tokens:
+                token.line = index + 1
+                yield token
+            if lineTokens.error is not None:
+                sys.exit(lineTokens.error)
+
+        eofToken = Token('', TokenType.EOF, 1, len(self.lines) + 1, 1)
+        while True:
+            yield eofToken
+
+
+class Statement:
+    """
+    Statement is the cached parse of a top-level statement.
+    """
+    __slots__ = ('startLine', 'lastLine', 'code', 'symbols')
+
+    def __init__(self, startLine: int, lastLine: int, code: str, symbols: tuple):
+        self.startLine = startLine  # Line of the first token of the statement.
+        self.lastLine = lastLine    # Line of the last token read to parse it, which is past its end.
+        self.code = code            # Generated code of the statement.
+        self.symbols = symbols      # Variables declared for the first time in the statement.
+
+
+class Run:
+    """
+    Run is a list of consecutive cached statements that can be reused together,
+    along with the symbols declared before them and where parsing carries on after them.
+    """
+    __slots__ = ('statements', 'symbols', 'endLine')
+
+    def __init__(self, statements: list, symbols: set, endLine: int | None):
+        self.statements = statements    # The cached statements.
+        self.symbols = symbols          # Variables declared before the first statement.
+        self.endLine = endLine          # Line of the statement that failed after the last one, or None at the end of the source.
+
+
+class LineTokens:
+    """
+    LineTokens lexes a single line of the source. Tokens never span lines,
+    so this gives the same tokens as lexing the whole source.
+    """
+    __slots__ = ('tokens', 'error', 'lineNumber')
+
+    def __init__(self, line: str, lineNumber: int, engine: str):
+        self.tokens = []                # Tokens of the line.
+        self.error = None               # Lexing error message, raised after the tokens before it.
+        self.lineNumber = lineNumber    # Line number the line was lexed at.
+
+        lexer = Lexer(line, engine)
+        lexer.lineNumber = lineNumber
+        try:
+            token = lexer.getToken()
+            # A NUL character gives an EOF token, but lexing carries on after it like it does for the whole source.
+            while token.kind != TokenType.EOF or lexer.curPos <= len(lexer.source):
+                self.tokens.append(token)
+                token = lexer.getToken()
+        except SystemExit as error:
+            self.error = str(error.code)
+
+
+class CachedLexer:
+    """
+    CachedLexer hands the tokens generated by IncrementalCompiler.tokensFrom to the Parser.
+    """
+    def __init__(self, tokens):
+        self.getToken = tokens.__next__
+
+
+class StatementEmitter(Emitter):
+    """
+    StatementEmitter hands the code of each top-level statement to a callback once it is parsed.
+    """
+    def __init__(self, onStatement):
+        super().__init__(None)
+        self.onStatement = onStatement
+
+    def flush(self) -> None:
+        """
+        Pass the code generated since the last flush to the callback.
+        """
+        code = self.code
+        self.code = ""
+        self.onStatement(code)
+
+
+class SymbolTable(set):
+    """
+    SymbolTable is the Parser's set of declared variables, remembering the ones added since it was last cleared.
+    """
+    def __init__(self, symbols = ()):
+        super().__init__(symbols)
+        self.added = []
+
+    def add(self, symbol: str) -> None:
+        if symbol not in self:
+            self.added.append(symbol)
+            super().add(symbol)
+
+
+class Resynchronized(Exception):
+    """
+    Raised to stop parsing once the rest of the cached statements can be reused.
+    """
+
+
+def adjustRuns(runs: list, startLine: int, endLine: int, delta: int) -> list:
+    """
+    Return the runs of cached statements that an edit leaves valid, with their lines moved.
+    Statements that read a replaced line are dropped, splitting their run in two.
+
+    Parameters:
+    runs (list): The runs of cached statements.
+    startLine (int): The first line replaced by the edit.
+    endLine (int): The last line replaced by the edit, before the edit.
+    delta (int): The number of lines the edit added, negative if it removed lines.
+    """
+    adjusted = []
+    for run in runs:
+        symbols = run.symbols
+        kept = []
+        for statement in run.statements:
+            if statement.lastLine < startLine:
+                kept.append(statement)
+                continue
+
+            if statement.startLine > endLine:
+                statement.startLine += delta
+                statement.lastLine += delta
+                kept.append(statement)
+                continue
+
+            if kept:
+                adjusted.append(Run(kept, symbols, statement.startLine))
+            symbols = set(symbols)
+            symbols.update(symbol for dropped in kept + [statement] for symbol in dropped.symbols)
+            kept = []
+
+        if kept:
+            runEnd = run.endLine
+            if runEnd is not None and runEnd > endLine:
+                runEnd += delta
+            adjusted.append(Run(kept, symbols, runEnd))
+    return adjusted
+
+
+def splitLines(source: str) -> list:
+    """
+    Split the source into lines ending with '\\n'. The last line is the text after the last newline, possibly empty.
+
+    Parameters:
+    source (str): The source code.
+    """
+    lines = source.split('\n')
+    return [line + '\n' for line in lines[:-1]] + [lines[-1]]
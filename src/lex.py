@@ -1,14 +1,42 @@
+from array import array
+import bisect
 import enum
 import sys
 import re
+from diagnostic import Diagnostic, CompileError
 
 class Lexer:
-    def __init__(self, input: str):
-        self.source = input + '\n' # Source code to lex as a string. Append a newline to simplify lexing/parsing the last token/statement.
+    REGEX_ENGINE = "regex"  # Match whole tokens at once with TOKEN_PATTERN.
+    CHAR_ENGINE = "char"    # Original engine, advancing one character at a time.
+    MIN_CHUNK_SIZE = 1 << 18    # Smallest part of a source, in characters, worth lexing in its own process.
+
+    def __init__(self, input: str, engine: str = REGEX_ENGINE, diagnostics: list | None = None):
+        # Source code to lex as a string. It must end with a newline to simplify lexing/parsing
+        # the last token/statement, so append one only if missing to avoid copying large sources.
+        self.source = input if input.endswith('\n') else input + '\n'
         self.curChar = ''   # Current character in the string.
         self.curPos = -1    # Current position in the string.
+        self.lineNumber = 1 # Line of the current position, counting from 1.
+        self.lineStart = 0  # Position of the first character of the current line.
         self.nextChar()
 
+        # getToken() returns the next token using the selected engine.
+        # Both engines produce exactly the same token stream.
+        self.engine = engine
+        if engine == Lexer.REGEX_ENGINE:
+            self.getToken = self.getTokenByRegex
+        elif engine == Lexer.CHAR_ENGINE:
+            self.getToken = self.getTokenByChar
+        else:
+            sys.exit("Error: Unknown lexer engine " + engine)
+
+        # In error-recovering mode, errors are recorded in this list and the rest of their line is skipped,
+        # instead of exiting at the first (see Parser).
+        self.diagnostics = diagnostics
+        if diagnostics is not None:
+            self.getTokenOfEngine = self.getToken
+            self.getToken = self.getTokenRecovering
+
     def nextChar(self) -> None:
         """
         Process the next character.
@@ -38,11 +66,28 @@ class Lexer:
     def abort(self, message: str) -> None:
         """
         Display an error message and exit if an invalid token is found.
+        In error-recovering mode, raise it as a CompileError instead.
         
         Parameters:
         message (str): The error message to display.
         """
-        sys.exit("Lexing error. " + message)
+        column = self.curPos - self.lineStart + 1
+        if self.diagnostics is not None:
+            raise CompileError(Diagnostic("Lexing error. " + message, self.lineNumber, column, self.curChar))
+        sys.exit(f"Lexing error. {message} (line {self.lineNumber}, column {column})")
+
+    def getTokenRecovering(self) -> 'Token':
+        """
+        Return the next token in error-recovering mode. After a lexing error, which is recorded,
+        the rest of its line is skipped and its NEWLINE token returned, so the parser drops the statement it is in.
+        """
+        try:
+            return self.getTokenOfEngine()
+        except CompileError as error:
+            self.diagnostics.append(error.diagnostic)
+            self.curPos = self.source.index('\n', self.curPos) - 1
+            self.nextChar()
+            return self.getTokenOfEngine()
 		
     def skipWhitespace(self) -> None:
         """
@@ -59,16 +104,260 @@ class Lexer:
             while self.curChar != '\n':
                 self.nextChar()
 
-    def getToken(self) -> None:
+    def skipBlankLines(self) -> None:
+        """
+        Skip lines that contain only whitespace. Must be called at the start of a line.
+        """
+        pos = self.curPos
+        while pos < len(self.source) and self.source[pos].isspace():
+            if self.source[pos] == '\n':
+                self.lineNumber += 1
+                self.lineStart = pos + 1
+            pos += 1
+
+        if self.lineStart > self.curPos:
+            self.curPos = self.lineStart - 1
+            self.nextChar()
+
+    def getTokenByRegex(self) -> 'Token':
+        """
+        Return the next token, matching it as a whole with TOKEN_PATTERN.
+        Anything the pattern does not cover (errors, non-ASCII digits or letters
+        outside the CJK block) is handed over to getTokenByChar at the same position,
+        so both engines always agree.
+        """
+        source = self.source
+        pos = self.curPos
+
+        # Same rule as getTokenByChar: spaces at the start of a line are indentation.
+        if 0 < pos <= len(source) and source[pos - 1] != '\n':
+            pos = SPACES_PATTERN.match(source, pos).end()
+        elif pos < len(source):
+            end = BLANK_LINES_PATTERN.match(source, pos).end()
+            if end != pos:
+                self.lineNumber += source.count('\n', pos, end)
+                self.lineStart = pos = end
+
+        line = self.lineNumber
+        column = pos - self.lineStart + 1
+        if pos >= len(source):
+            self.curPos = pos + 1
+            self.curChar = '\0'
+            return Token('', TokenType.EOF, 1, line, column)
+
+        match = TOKEN_PATTERN.match(source, pos)
+        if match is None:
+            self.curPos = pos
+            self.curChar = source[pos]
+            return self.getTokenByChar()
+
+        self.curPos = end = match.end()
+        group = match.lastgroup
+        if group == 'WORD':
+            tokText = match.group()
+            return Token(tokText, WORD_KINDS.get(tokText, TokenType.IDENT), 1, line, column)
+        elif group == 'OPERATOR':
+            tokText = match.group()
+            return Token(tokText, OPERATOR_KINDS[tokText], 1, line, column)
+        elif group == 'NUMBER':
+            return Token(match.group(), TokenType.NUMBER, 1, line, column)
+        elif group == 'STRING':
+            return Token(source[pos + 1 : end - 1], TokenType.STRING, 1, line, column)
+        elif group == 'SPACE':
+            return Token(source[end - 1], TokenType.SPACE, end - pos, line, column)
+        else:
+            # NEWLINE, or a comment running up to and including the newline.
+            self.lineNumber += 1
+            self.lineStart = end
+            return Token('\n', TokenType.NEWLINE, 1, line, end - pos + column - 1)
+
+    def tokenize(self, workers: int = 1, minChunkSize: int = MIN_CHUNK_SIZE) -> 'TokenBuffer':
+        """
+        Lex the rest of the source in one call and return it as a TokenBuffer,
+        ending with the EOF token. A lexing error is kept in the buffer and raised
+        when the parser reaches it, so errors are reported in the same order as with getToken().
+
+        Parameters:
+        workers (int): The number of processes to lex with. A large source that has not been
+            lexed yet is split into chunks of at least minChunkSize characters, lexed in parallel.
+        minChunkSize (int): The smallest chunk worth lexing in its own process.
+        """
+        numChunks = min(workers, len(self.source) // minChunkSize)
+        if numChunks > 1 and self.curPos == 0:
+            return self.tokenizeInParallel(numChunks)
+
+        tokens = TokenBuffer(self.source)
+        try:
+            self.tokenizeInto(tokens)
+        except SystemExit as error:
+            # Keep the error until the parser reaches it, as lexing token by token would.
+            tokens.error = str(error.code)
+        return tokens
+
+    def tokenizeInto(self, tokens: 'TokenBuffer') -> None:
+        """
+        Lex the rest of the source into the buffer, ending with the EOF token.
+
+        Parameters:
+        tokens (TokenBuffer): The buffer to append to.
+        """
+        if self.engine == Lexer.CHAR_ENGINE:
+            token = self.getTokenByChar()
+            while self.appendToken(tokens, token):
+                token = self.getTokenByChar()
+            return
+
+        # Same matching as getTokenByRegex, storing offsets instead of creating tokens.
+        source = self.source
+        length = len(source)
+        kinds = tokens.kinds
+        starts = tokens.starts
+        ends = tokens.ends
+        pos = self.curPos
+        while True:
+            if 0 < pos <= length and source[pos - 1] != '\n':
+                pos = SPACES_PATTERN.match(source, pos).end()
+            elif pos < length:
+                end = BLANK_LINES_PATTERN.match(source, pos).end()
+                if end != pos:
+                    self.lineNumber += source.count('\n', pos, end)
+                    self.lineStart = pos = end
+
+            if pos >= length:
+                break
+
+            match = TOKEN_PATTERN.match(source, pos)
+            if match is None:
+                self.curPos = pos
+                self.curChar = source[pos]
+                if not self.appendToken(tokens, self.getTokenByChar()):
+                    return
+                pos = self.curPos
+                continue
+
+            end = match.end()
+            group = match.lastgroup
+            if group == 'WORD':
+                kinds.append(WORD_CODES.get(match.group(), IDENT_CODE))
+            elif group == 'OPERATOR':
+                kinds.append(OPERATOR_CODES[match.group()])
+            elif group == 'NUMBER':
+                kinds.append(NUMBER_CODE)
+            elif group == 'SPACE':
+                kinds.append(SPACE_CODE)
+            elif group == 'STRING':
+                # The text of a string is between the quotes.
+                kinds.append(STRING_CODE)
+                starts.append(pos + 1)
+                ends.append(end - 1)
+                pos = end
+                continue
+            else:
+                # NEWLINE, or a comment running up to and including the newline.
+                kinds.append(NEWLINE_CODE)
+                starts.append(end - 1)
+                ends.append(end)
+                self.lineNumber += 1
+                self.lineStart = pos = end
+                continue
+            starts.append(pos)
+            ends.append(end)
+            pos = end
+
+        kinds.append(EOF_CODE)
+        starts.append(length)
+        ends.append(length)
+        self.curPos = pos + 1
+        self.curChar = '\0'
+
+    def tokenizeInParallel(self, numChunks: int) -> 'TokenBuffer':
+        """
+        Lex the whole source on a process pool and join the chunks' tokens back in order.
+        Tokens never span lines, so splitting the source just after newlines gives the same
+        tokens as lexing it in one go. Errors report the same position, and only the first error is kept.
+
+        Parameters:
+        numChunks (int): The number of chunks to split the source into.
+        """
+        from concurrent.futures import ProcessPoolExecutor
+
+        # Split the source just after the newline following each equal share.
+        source = self.source
+        chunkStarts = [0]
+        for i in range(1, numChunks):
+            boundary = source.find('\n', max(i * (len(source) // numChunks), chunkStarts[-1])) + 1
+            if boundary == 0 or boundary >= len(source):
+                break
+            chunkStarts.append(boundary)
+        chunkEnds = chunkStarts[1:] + [len(source)]
+
+        lineNumbers = [1]
+        for start, end in zip(chunkStarts, chunkEnds[:-1]):
+            lineNumbers.append(lineNumbers[-1] + source.count('\n', start, end))
+
+        tokens = TokenBuffer(source)
+        with ProcessPoolExecutor(max_workers=len(chunkStarts)) as executor:
+            results = executor.map(tokenizeChunk,
+                                   [source[start : end] for start, end in zip(chunkStarts, chunkEnds)],
+                                   chunkStarts, lineNumbers, [self.engine] * len(chunkStarts))
+            for end, (kinds, starts, ends, error) in zip(chunkEnds, results):
+                tokens.kinds.extend(kinds)
+                tokens.starts.extend(starts)
+                tokens.ends.extend(ends)
+                if error is not None:
+                    tokens.error = error
+                    break
+
+                # Drop the EOF token at the end of each chunk but the last.
+                if end < len(source):
+                    tokens.kinds.pop()
+                    tokens.starts.pop()
+                    tokens.ends.pop()
+
+        self.curPos = len(source) + 1
+        self.curChar = '\0'
+        return tokens
+
+    def appendToken(self, tokens: 'TokenBuffer', token: 'Token') -> bool:
+        """
+        Append a token just returned by getTokenByChar to the buffer,
+        working out its offsets from the current position.
+        Return false if it was the EOF token at the end of the source.
+        A NUL character also gives an EOF token, but lexing carries on after it.
+
+        Parameters:
+        tokens (TokenBuffer): The buffer to append to.
+        token (Token): The token to append.
         """
-        Return the next token.
+        end = self.curPos
+        if token.kind == TokenType.EOF:
+            start = end = min(end - 1, len(self.source))
+        elif token.kind == TokenType.STRING:
+            end -= 1    # Closing quote.
+            start = end - len(token.text)
+        elif token.kind == TokenType.SPACE:
+            start = end - token.count
+        else:
+            start = end - len(token.text)
+        tokens.kinds.append(token.kind.value)
+        tokens.starts.append(start)
+        tokens.ends.append(end)
+        return token.kind != TokenType.EOF or self.curPos <= len(self.source)
+
+    def getTokenByChar(self) -> 'Token':
+        """
+        Return the next token, examining the source one character at a time.
         """
         if self.peekBackward() and self.peekBackward() != '\n':
             self.skipWhitespace()
+        else:
+            self.skipBlankLines()
 
         self.skipComment()
 
         token = None
+        line = self.lineNumber
+        column = self.curPos - self.lineStart + 1
 
         # Check the first character of this token to see if we can decide what it is.
         # If it is a multiple character operator (e.g., !=), number, identifier, or keyword then we will process the rest.
@@ -150,19 +439,10 @@ class Lexer:
             while Lexer.ischinese(self.peekForward()) or self.peekForward().isalnum():
                 self.nextChar()
 
-            # Check if the token is in the list of keywords.
+            # Check if the token is a keyword, logical operator or boolean.
+            # Otherwise it is an identifier.
             tokText = self.source[startPos : self.curPos + 1] # Get the substring.
-            keyword = Token.checkIfKeyword(tokText)
-            logicalOperator = Token.checkIfLogicalOperator(tokText)
-            boolean = Token.checkIfBoolean(tokText)
-            if keyword: # Keyword
-                token = Token(tokText, keyword)
-            elif logicalOperator: # Logical Operator
-                token = Token(tokText, logicalOperator)
-            elif boolean: # Boolean
-                token = Token(tokText, boolean)
-            else:   # Identifier
-                token = Token(tokText, TokenType.IDENT)
+            token = Token(tokText, WORD_KINDS.get(tokText, TokenType.IDENT))
         elif self.curChar == '\n':
             token = Token(self.curChar, TokenType.NEWLINE)  
         elif Lexer.iscolon(self.curChar):
@@ -182,6 +462,12 @@ class Lexer:
         else:
             # Unknown token!
             self.abort("Unknown token: " + self.curChar)
+
+        token.line = line
+        token.column = column
+        if token.kind == TokenType.NEWLINE:
+            self.lineNumber += 1
+            self.lineStart = self.curPos + 1
 			
         self.nextChar()
         return token
@@ -190,8 +476,13 @@ class Lexer:
     def ischinese(char) -> bool:
         """
         Check if a character is Chinese.
+        If given a longer string, check if it contains any Chinese character.
         """
-        return len(re.findall(r'[\u4e00-\u9fff]+', char)) > 0
+        if len(char) == 1:
+            codepoint = ord(char)
+            index = bisect.bisect_right(CHINESE_RANGE_STARTS, codepoint) - 1
+            return index >= 0 and codepoint <= CHINESE_RANGES[index][1]
+        return CHINESE_PATTERN.search(char) is not None
     
     @staticmethod
     def iscolon(char) -> bool:
@@ -215,38 +506,196 @@ class Lexer:
         return char == ' ' or char == '\t' or char == '\r'
     
     
+def tokenizeChunk(chunk: str, offset: int, lineNumber: int, engine: str) -> tuple:
+    """
+    Lex one chunk of a larger source in a worker process (see Lexer.tokenizeInParallel).
+    Return the kinds, starts and ends arrays of its tokens, with offsets into the whole source,
+    and the lexing error that stopped it, if any.
+
+    Parameters:
+    chunk (str): The chunk of source, starting at the start of a line and ending with a newline.
+    offset (int): The position of the chunk in the whole source.
+    lineNumber (int): The line of the whole source that the chunk starts on.
+    engine (str): The Lexer engine to use.
+    """
+    lexer = Lexer(chunk, engine)
+    lexer.lineNumber = lineNumber
+    tokens = lexer.tokenize()
+    if offset:
+        tokens.starts = array('q', map(offset.__add__, tokens.starts))
+        tokens.ends = array('q', map(offset.__add__, tokens.ends))
+    return tokens.kinds, tokens.starts, tokens.ends, tokens.error
+
+
 class Token:
     """
     Token contains the original text, type of token and number of tokens.
     """   
-    def __init__(self, tokenText, tokenKind, numTokens = 1):
+    __slots__ = ('text', 'kind', 'count', 'line', 'column')
+
+    def __init__(self, tokenText, tokenKind, numTokens = 1, line = 0, column = 0):
         self.text = tokenText   # The token's actual text. Used for identifiers, strings, and numbers.
         self.kind = tokenKind   # The TokenType that this token is classified as.
         self.count = numTokens  # The number of this token
+        self.line = line        # The line of the token in the source, counting from 1 (0 if unknown).
+        self.column = column    # The column of the token in the source, counting from 1 (0 if unknown).
 
     @staticmethod
     def checkIfKeyword(tokenText):
-        for kind in TokenType:
-            # Relies on all keyword enum values being 1XX.
-            if kind.value >= 100 and kind.value < 200 and ChineseKeywords[kind.name] == tokenText:
-                return kind
-        return None
+        return KEYWORD_KINDS.get(tokenText)
     
     @staticmethod
     def checkIfLogicalOperator(tokenText):
-        for kind in TokenType:
-            # Relies on all keyword enum values being 3XX.
-            if kind.value >= 300 and kind.value < 400 and ChineseLogicalOperators[kind.name] == tokenText:
-                return kind
-        return None
+        return LOGICAL_OPERATOR_KINDS.get(tokenText)
     
     @staticmethod
     def checkIfBoolean(tokenText):
-        for kind in TokenType:
-            # Relies on all keyword enum values being 404 or 405.
-            if (kind.value == 404 or kind.value == 405) and ChineseBoolean[kind.name] == tokenText:
-                return kind
-        return None
+        return BOOLEAN_KINDS.get(tokenText)
+
+
+class TokenBuffer:
+    """
+    TokenBuffer stores a whole token stream compactly as parallel arrays:
+    the TokenType value of each token and the start and end offsets of its text in the source.
+    Token objects and their text are only created when asked for.
+    """
+    def __init__(self, source: str):
+        self.source = source
+        self.kinds = array('h')     # TokenType value of each token.
+        self.starts = array('q')    # Offset of the first character of each token's text.
+        self.ends = array('q')      # Offset just past the last character of each token's text.
+        self.cursor = 0             # Index of the token that getToken() returns next.
+        self.error = None           # Lexing error after the last token, instead of the EOF token.
+        self.lineStarts = None      # Offset of the first character of each line, built when first needed.
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def kind(self, index: int) -> 'TokenType':
+        """
+        Return the TokenType of a token.
+
+        Parameters:
+        index (int): The index of the token.
+        """
+        return KINDS_BY_CODE[self.kinds[index]]
+
+    def text(self, index: int) -> str:
+        """
+        Return the text of a token, as Lexer.getToken would give it.
+
+        Parameters:
+        index (int): The index of the token.
+        """
+        code = self.kinds[index]
+        text = FIXED_TEXTS.get(code)
+        if text is not None:
+            return text
+        if code == SPACE_CODE:
+            return self.source[self.ends[index] - 1]
+        return self.source[self.starts[index] : self.ends[index]]
+
+    def count(self, index: int) -> int:
+        """
+        Return the number of characters in a run of spaces, or 1 for any other token.
+
+        Parameters:
+        index (int): The index of the token.
+        """
+        if self.kinds[index] == SPACE_CODE:
+            return self.ends[index] - self.starts[index]
+        return 1
+
+    def position(self, index: int) -> tuple:
+        """
+        Return the line and column of a token, both counting from 1.
+
+        Parameters:
+        index (int): The index of the token.
+        """
+        if self.lineStarts is None:
+            self.lineStarts = array('q', [0])
+            pos = self.source.find('\n')
+            while pos != -1:
+                self.lineStarts.append(pos + 1)
+                pos = self.source.find('\n', pos + 1)
+
+        offset = self.starts[index]
+        if self.kinds[index] == STRING_CODE:
+            offset -= 1 # Opening quote.
+        line = bisect.bisect_right(self.lineStarts, offset)
+        return line, offset - self.lineStarts[line - 1] + 1
+
+    def token(self, index: int) -> 'Token':
+        """
+        Return a token as a Token object.
+
+        Parameters:
+        index (int): The index of the token.
+        """
+        line, column = self.position(index)
+        return Token(self.text(index), KINDS_BY_CODE[self.kinds[index]], self.count(index), line, column)
+
+    def getToken(self) -> 'Token':
+        """
+        Return the next token, so the buffer can be read in place of a Lexer.
+        Keeps returning the EOF token at the end, or exits with the lexing error once it is reached.
+        """
+        index = self.cursor
+        if index == len(self.kinds):
+            sys.exit(self.error)
+        if index < len(self.kinds) - 1 or self.error is not None:
+            self.cursor = index + 1
+        return self.token(index)
+
+    def peek(self, offset: int = 0) -> 'Token':
+        """
+        Return a token after the next one without advancing, or the EOF token past the end.
+
+        Parameters:
+        offset (int): How many tokens after the one getToken() returns next.
+        """
+        index = self.cursor + offset
+        if index >= len(self.kinds):
+            if self.error is not None:
+                sys.exit(self.error)
+            index = len(self.kinds) - 1
+        return self.token(index)
+
+
+class StreamLexer:
+    """
+    StreamLexer lexes a source that is read incrementally, line by line,
+    so only the current line needs to be in memory. Tokens never span lines.
+    Iterating over it generates the tokens, ending with the EOF token.
+    """
+    def __init__(self, lines, engine: str = Lexer.REGEX_ENGINE, diagnostics: list | None = None):
+        self.lines = lines          # Iterable of source lines, e.g. an open file.
+        self.engine = engine        # The Lexer engine used for each line.
+        self.diagnostics = diagnostics  # Where each line's Lexer records errors in error-recovering mode.
+        self.eofToken = None        # The EOF token, once reached.
+        self.tokens = iter(self)
+
+    def __iter__(self):
+        lineNumber = 1
+        for line in self.lines:
+            lexer = Lexer(line, self.engine, self.diagnostics)
+            lexer.lineNumber = lineNumber
+            token = lexer.getToken()
+            # A NUL character gives an EOF token, but lexing carries on after it like it does for the whole source.
+            while token.kind != TokenType.EOF or lexer.curPos <= len(lexer.source):
+                yield token
+                token = lexer.getToken()
+            lineNumber += 1
+
+        self.eofToken = Token('', TokenType.EOF, 1, lineNumber, 1)
+        yield self.eofToken
+
+    def getToken(self) -> 'Token':
+        """
+        Return the next token. Keeps returning the EOF token at the end.
+        """
+        return next(self.tokens, self.eofToken)
 
 
 class TokenType(enum.Enum):
@@ -312,3 +761,76 @@ ChineseBoolean = {
     "TRUE": "真",
     "FALSE": "假"
 }
+
+# Lookup tables from a word to its TokenType, built once at import.
+KEYWORD_KINDS = {word: TokenType[name] for name, word in ChineseKeywords.items()}
+LOGICAL_OPERATOR_KINDS = {word: TokenType[name] for name, word in ChineseLogicalOperators.items()}
+BOOLEAN_KINDS = {word: TokenType[name] for name, word in ChineseBoolean.items()}
+WORD_KINDS = {**KEYWORD_KINDS, **LOGICAL_OPERATOR_KINDS, **BOOLEAN_KINDS}
+
+# Codepoint ranges (inclusive) of the characters treated as Chinese, sorted by start.
+CHINESE_RANGES = (
+    (0x3400, 0x4DBF),   # CJK Unified Ideographs Extension A
+    (0x4E00, 0x9FFF),   # CJK Unified Ideographs
+    (0xF900, 0xFAFF),   # CJK Compatibility Ideographs
+    (0x20000, 0x2A6DF), # CJK Unified Ideographs Extension B
+    (0x2F800, 0x2FA1F)  # CJK Compatibility Ideographs Supplement
+)
+CHINESE_RANGE_STARTS = tuple(start for start, _ in CHINESE_RANGES)
+
+# The same ranges as the body of a regex character class.
+CHINESE_CHARS = "".join(f"\\U{start:08x}-\\U{end:08x}" for start, end in CHINESE_RANGES)
+CHINESE_PATTERN = re.compile(f"[{CHINESE_CHARS}]")
+
+OPERATOR_KINDS = {
+    "+": TokenType.PLUS,
+    "-": TokenType.MINUS,
+    "*": TokenType.ASTERISK,
+    "/": TokenType.SLASH,
+    "=": TokenType.EQ,
+    "==": TokenType.EQEQ,
+    "!=": TokenType.NOTEQ,
+    "<": TokenType.LT,
+    "<=": TokenType.LTEQ,
+    ">": TokenType.GT,
+    ">=": TokenType.GTEQ,
+    ":": TokenType.COLON,
+    "(": TokenType.OPEN_BRACKET,
+    ")": TokenType.CLOSE_BRACKET
+}
+
+# TokenType values as stored in TokenBuffer.kinds.
+KINDS_BY_CODE = {kind.value: kind for kind in TokenType}
+WORD_CODES = {word: kind.value for word, kind in WORD_KINDS.items()}
+OPERATOR_CODES = {text: kind.value for text, kind in OPERATOR_KINDS.items()}
+EOF_CODE = TokenType.EOF.value
+NEWLINE_CODE = TokenType.NEWLINE.value
+SPACE_CODE = TokenType.SPACE.value
+NUMBER_CODE = TokenType.NUMBER.value
+STRING_CODE = TokenType.STRING.value
+IDENT_CODE = TokenType.IDENT.value
+
+# Text of the tokens whose text is always the same, by TokenType value.
+FIXED_TEXTS = {code: word for word, code in WORD_CODES.items()}
+FIXED_TEXTS.update({code: text for text, code in OPERATOR_CODES.items()})
+FIXED_TEXTS[NEWLINE_CODE] = '\n'
+FIXED_TEXTS[EOF_CODE] = ''
+
+# Whitespace skipped between tokens (see Lexer.isspace).
+SPACES_PATTERN = re.compile(r'[ \t\r]*')
+
+# Lines containing only whitespace, skipped at the start of a line (see Lexer.skipBlankLines).
+BLANK_LINES_PATTERN = re.compile(r'(?:[^\S\n]*\n)*')
+
+# Master pattern for Lexer.getTokenByRegex. A token is only matched here when
+# getTokenByChar would produce exactly the same token; the lookaheads reject
+# tokens followed by characters that the character engine would treat differently.
+TOKEN_PATTERN = re.compile(rf"""
+    (?P<COMMENT>\#[^\n]*\n)
+  | (?P<NUMBER>[0-9]+(?:\.[0-9]+)?(?![0-9.]|[^\x00-\x7f{CHINESE_CHARS}]))
+  | (?P<STRING>"[^"\r\n\t\\%]*")
+  | (?P<WORD>[A-Za-z{CHINESE_CHARS}][A-Za-z0-9{CHINESE_CHARS}]*(?![A-Za-z0-9]|[^\x00-\x7f]))
+  | (?P<OPERATOR>==|!=|<=|>=|[-+*/=<>:()])
+  | (?P<NEWLINE>\n)
+  | (?P<SPACE>[ \t\r]+)
+""", re.VERBOSE)
@@ -1,35 +1,30 @@
 from lex import *
 from emit import *
 from parse import *
+from generate import CodeGenerator
+from utils import NameTable
 import sys
-import io
-import tempfile
 
-def compile(inputString: str) -> str:
+def compile(inputString: str, optimize: bool = False, iterative: bool = False, nativeNames: bool = False,
+            shortNames: bool = False) -> str:
     """
     Compiles the input pyhan code into python code.
     
     Parameters:
         inputString (str): The input pyhan code.
+        optimize (bool): Fold expressions made only of literals and leave out code that can never run.
+        iterative (bool): Parse with an explicit stack instead of recursive calls.
+        nativeNames (bool): Keep the names of variables as they are written where Python accepts them.
+        shortNames (bool): Turn Chinese names into Pinyin and as few digits of the hash as tell them apart.
     Returns:
         str: The compiled python code.
     """
-    inputFile = io.StringIO(inputString)
-    outputFile = tempfile.NamedTemporaryFile()
-    source = ""
-
-    # Remove blank lines
-    for line in inputFile:
-        if not line.isspace():
-            source += line
-            
     # Initialize the lexer, emitter, and parser.
-    lexer = Lexer(source)
-    emitter = Emitter(outputFile.name)
+    lexer = Lexer(inputString)
+    emitter = Emitter(None)
     
-    parser = Parser(lexer, emitter)
+    parser = Parser(lexer, emitter, optimize, CodeGenerator(emitter, nativeNames, NameTable() if shortNames else None), iterative)
 
     parser.program() # Start the parser.
-    emitter.writeFile() # Write the output to file.
 
-    return outputFile.read().decode('utf-8')
+    return emitter.getvalue()
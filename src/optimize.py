@@ -0,0 +1,335 @@
+import math
+import operator
+from lex import TokenType
+from tree import *
+
+# Longest string, and largest integer in bits, that folding may produce.
+# Larger results are left to be worked out at runtime so the generated code stays small.
+MAX_FOLDED_STRING_LENGTH = 4096
+MAX_FOLDED_INTEGER_BITS = 4096
+
+# Python function of each operator in the syntax tree.
+UNARY_OPERATORS = {
+    TokenType.PLUS: operator.pos,
+    TokenType.MINUS: operator.neg,
+    TokenType.NOT: operator.not_,
+}
+BINARY_OPERATORS = {
+    TokenType.PLUS: operator.add,
+    TokenType.MINUS: operator.sub,
+    TokenType.ASTERISK: operator.mul,
+    TokenType.SLASH: operator.truediv,
+}
+COMPARISON_OPERATORS = {
+    TokenType.EQEQ: operator.eq,
+    TokenType.NOTEQ: operator.ne,
+    TokenType.LT: operator.lt,
+    TokenType.LTEQ: operator.le,
+    TokenType.GT: operator.gt,
+    TokenType.GTEQ: operator.ge,
+}
+
+# Returned by Optimizer.value for an expression that is not a constant.
+NOT_CONSTANT = object()
+
+class Optimizer:
+    """
+    Optimizer rewrites the syntax tree built by the Parser before the CodeGenerator emits it.
+    Expressions made only of literals are folded into a Constant, following Python semantics exactly,
+    so the generated code does not work them out again each time it runs.
+    Expressions that raise an error in Python, like a division by zero, are left as they are.
+    Branches and loops whose test folds to a constant false, and statements after a 'break' or 'continue',
+    never run and are dropped.
+    """
+    def __init__(self):
+        # Optimizing method of each kind of node. Nodes without one are left as they are.
+        self.statementOptimizers = {
+            Print: self.printStatement,
+            If: self.ifStatement,
+            While: self.whileStatement,
+            Assign: self.assignStatement,
+            ExpressionStatement: self.expressionStatement,
+        }
+        self.expressionOptimizers = {
+            Group: self.group,
+            UnaryOp: self.unaryOp,
+            BinOp: self.binOp,
+            BoolOp: self.boolOp,
+            Compare: self.compare,
+        }
+
+    def statement(self, node: StatementNode) -> list:
+        """
+        Optimize a statement and the statements in its blocks, and return the statements that replace it.
+        Statements that can never run are dropped, so the list may be empty.
+
+        Parameters:
+        node (StatementNode): The statement.
+        """
+        optimizer = self.statementOptimizers.get(type(node))
+        if optimizer is None:
+            return [node]
+        return optimizer(node)
+
+    def block(self, statements: list) -> list:
+        """
+        Return the optimized statements of a block. Statements after a 'break' or 'continue' never run,
+        so they are dropped. A block left with no statements gets a Pass, as Python needs one.
+
+        Parameters:
+        statements (list): The statements.
+        """
+        optimized = []
+        for index, statement in enumerate(statements):
+            optimized.extend(self.statement(statement))
+            if optimized and isinstance(optimized[-1], (Break, Continue))\
+                and not any(self.hasInvalidNumber(unreachable) for unreachable in statements[index + 1:]):
+                break
+
+        if not optimized:
+            first = statements[0]
+            optimized.append(Pass(first.indentation, first.line, first.column))
+        return optimized
+
+    def inline(self, statements: list, indentation: int) -> list:
+        """
+        Return the statements of a block moved out of it, to the given indentation.
+
+        Parameters:
+        statements (list): The optimized statements of the block.
+        indentation (int): The indentation of the statement the block belonged to.
+        """
+        if len(statements) == 1 and isinstance(statements[0], Pass):
+            return []
+        self.indent(statements, indentation - statements[0].indentation)
+        return statements
+
+    def indent(self, statements: list, delta: int) -> None:
+        """
+        Change the indentation of statements and the statements in their blocks.
+
+        Parameters:
+        statements (list): The statements.
+        delta (int): The number of spaces to add, negative to remove spaces.
+        """
+        for statement in statements:
+            statement.indentation += delta
+            if isinstance(statement, If):
+                for _, body in statement.branches:
+                    self.indent(body, delta)
+                if statement.orelse is not None:
+                    self.indent(statement.orelse, delta)
+            elif isinstance(statement, While):
+                self.indent(statement.body, delta)
+
+    def printStatement(self, node: Print) -> list:
+        node.value = self.expression(node.value)
+        return [node]
+
+    def ifStatement(self, node: If) -> list:
+        """
+        Branches with a false constant test never run and are dropped. A true constant test always runs
+        its branch when it is reached, so it takes the place of the branches after it and the 'else' block.
+        """
+        node.branches = [(self.expression(test), body) for test, body in node.branches]
+        branches = []
+        orelse = node.orelse
+        dropped = []    # Statements that never run and tests that are never evaluated.
+        for index, (test, body) in enumerate(node.branches):
+            value = self.value(test)
+            if value is NOT_CONSTANT:
+                branches.append((test, body))
+            elif not value:
+                dropped.extend(body)
+            else:
+                for laterTest, laterBody in node.branches[index + 1:]:
+                    dropped.append(laterTest)
+                    dropped.extend(laterBody)
+                if orelse is not None:
+                    dropped.extend(orelse)
+                orelse = body
+                break
+
+        if any(self.hasInvalidNumber(droppedNode) for droppedNode in dropped):
+            # Dropping them would hide the syntax error Python reports for the whole file.
+            branches = node.branches
+            orelse = node.orelse
+
+        if not branches:
+            if orelse is None:
+                return []
+            return self.inline(self.block(orelse), node.indentation)
+
+        node.branches = [(test, self.block(body)) for test, body in branches]
+        node.orelse = self.block(orelse) if orelse is not None else None
+        return [node]
+
+    def whileStatement(self, node: While) -> list:
+        node.test = self.expression(node.test)
+        value = self.value(node.test)
+        if value is not NOT_CONSTANT and not value and not any(self.hasInvalidNumber(statement) for statement in node.body):
+            return []   # The loop never runs.
+
+        node.body = self.block(node.body)
+        return [node]
+
+    def assignStatement(self, node: Assign) -> list:
+        node.value = self.expression(node.value)
+        return [node]
+
+    def expressionStatement(self, node: ExpressionStatement) -> list:
+        node.value = self.expression(node.value)
+        return [node]
+
+    def expression(self, node: ExpressionNode) -> ExpressionNode:
+        """
+        Return the expression with its literal-only subexpressions folded.
+
+        Parameters:
+        node (ExpressionNode): The expression.
+        """
+        optimizer = self.expressionOptimizers.get(type(node))
+        if optimizer is None:
+            return node
+        return optimizer(node)
+
+    def value(self, node: ExpressionNode):
+        """
+        Return the Python value of a literal or folded expression, or NOT_CONSTANT.
+        Numbers Python cannot read, like 007, are not constants, so the generated code keeps its error.
+
+        Parameters:
+        node (ExpressionNode): The expression.
+        """
+        if isinstance(node, Constant):
+            return node.value
+        if isinstance(node, Boolean):
+            return node.value
+        if isinstance(node, String):
+            return node.text
+        if isinstance(node, Number):
+            value = node.value()
+            return NOT_CONSTANT if value is None else value
+        return NOT_CONSTANT
+
+    def hasInvalidNumber(self, node: Node) -> bool:
+        """
+        Return true if the statement or expression has a number Python cannot read.
+
+        Parameters:
+        node (Node): The statement or expression.
+        """
+        if isinstance(node, (Print, Assign, ExpressionStatement)):
+            return self.hasInvalidNumber(node.value)
+        if isinstance(node, If):
+            blocks = [body for _, body in node.branches] + ([node.orelse] if node.orelse is not None else [])
+            return any(self.hasInvalidNumber(test) for test, _ in node.branches)\
+                or any(self.hasInvalidNumber(statement) for body in blocks for statement in body)
+        if isinstance(node, While):
+            return self.hasInvalidNumber(node.test) or any(self.hasInvalidNumber(statement) for statement in node.body)
+        if isinstance(node, Number):
+            return self.value(node) is NOT_CONSTANT
+        if isinstance(node, Group):
+            return self.hasInvalidNumber(node.expression)
+        if isinstance(node, UnaryOp):
+            return self.hasInvalidNumber(node.operand)
+        if isinstance(node, BinOp):
+            return self.hasInvalidNumber(node.left) or self.hasInvalidNumber(node.right)
+        if isinstance(node, BoolOp):
+            return any(self.hasInvalidNumber(value) for value in node.values)
+        if isinstance(node, Compare):
+            return self.hasInvalidNumber(node.left) or any(self.hasInvalidNumber(value) for value in node.comparators)
+        return False
+
+    def fold(self, node: ExpressionNode, function, *values) -> ExpressionNode:
+        """
+        Return a Constant of the function applied to the values, in place of the expression,
+        or the expression if the function raises or its result cannot be written as a literal.
+
+        Parameters:
+        node (ExpressionNode): The expression the result replaces.
+        function: The Python function of the operator.
+        values: The values of the operands.
+        """
+        # A repeated string too long to fold is not built at all, as it could take more memory than there is.
+        if function is operator.mul and len(values) == 2:
+            text, count = values if isinstance(values[0], str) else reversed(values)
+            if isinstance(text, str) and isinstance(count, int) and len(text) * count > MAX_FOLDED_STRING_LENGTH:
+                return node
+
+        try:
+            result = function(*values)
+        except (ArithmeticError, TypeError, ValueError):
+            return node
+
+        if isinstance(result, str) and len(result) > MAX_FOLDED_STRING_LENGTH:
+            return node
+        if isinstance(result, int) and result.bit_length() > MAX_FOLDED_INTEGER_BITS:
+            return node
+        if isinstance(result, float) and not math.isfinite(result):
+            return node     # inf and nan have no literal.
+        return Constant(result, node.line, node.column)
+
+    def group(self, node: Group) -> ExpressionNode:
+        node.expression = self.expression(node.expression)
+        value = self.value(node.expression)
+        if value is NOT_CONSTANT:
+            return node
+        return Constant(value, node.line, node.column)
+
+    def unaryOp(self, node: UnaryOp) -> ExpressionNode:
+        node.operand = self.expression(node.operand)
+        value = self.value(node.operand)
+        if value is NOT_CONSTANT:
+            return node
+        return self.fold(node, UNARY_OPERATORS[node.op], value)
+
+    def binOp(self, node: BinOp) -> ExpressionNode:
+        node.left = self.expression(node.left)
+        node.right = self.expression(node.right)
+        left = self.value(node.left)
+        right = self.value(node.right)
+        if left is NOT_CONSTANT or right is NOT_CONSTANT:
+            return node
+        return self.fold(node, BINARY_OPERATORS[node.op], left, right)
+
+    def boolOp(self, node: BoolOp) -> ExpressionNode:
+        """
+        'and' gives its first false value and 'or' its first true value without evaluating the rest,
+        so leading constants either decide the result or can be dropped.
+        """
+        node.values = [self.expression(value) for value in node.values]
+        decidesResult = node.op == TokenType.OR     # A true value decides 'or', a false value decides 'and'.
+
+        values = node.values
+        while len(values) > 1:
+            value = self.value(values[0])
+            if value is NOT_CONSTANT:
+                break
+            if bool(value) == decidesResult:
+                if any(self.hasInvalidNumber(skipped) for skipped in values[1:]):
+                    break   # Dropping it would hide the syntax error Python reports for the whole file.
+                return values[0]
+            values = values[1:]
+
+        if len(values) == 1:
+            return values[0]    # The result is the last value, whether it is a constant or not.
+        node.values = values
+        return node
+
+    def compare(self, node: Compare) -> ExpressionNode:
+        node.left = self.expression(node.left)
+        node.comparators = [self.expression(comparator) for comparator in node.comparators]
+        values = [self.value(node.left)] + [self.value(comparator) for comparator in node.comparators]
+        if any(value is NOT_CONSTANT for value in values):
+            return node
+
+        def chain(*values):
+            # Like Python, stop at the first comparison that is false.
+            for op, left, right in zip(node.ops, values, values[1:]):
+                result = COMPARISON_OPERATORS[op](left, right)
+                if not result:
+                    return result
+            return result
+
+        return self.fold(node, chain, *values)
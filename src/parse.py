@@ -1,28 +1,161 @@
 import sys
-import os
 from lex import *
-from src.emit import Emitter
-from utils import getAlphaNumericVar
+from emit import Emitter
+from tree import *
+from generate import CodeGenerator
+from optimize import Optimizer
+from diagnostic import Diagnostic, CompileError
+from tracer import Tracer
+
+# Prefix and infix binding power of each operator, or None if it is not used that way.
+# The higher the binding power, the tighter the operator binds: an operator's operand only
+# takes in the operators that bind tighter than it, so operators of the same binding power
+# are read left to right. A prefix operator can only start an operand that takes it in.
+BINDING_POWERS = {
+    TokenType.OR: (None, 1),
+    TokenType.AND: (None, 2),
+    TokenType.NOT: (3, None),
+    TokenType.EQEQ: (None, 4),
+    TokenType.NOTEQ: (None, 4),
+    TokenType.LT: (None, 4),
+    TokenType.LTEQ: (None, 4),
+    TokenType.GT: (None, 4),
+    TokenType.GTEQ: (None, 4),
+    TokenType.PLUS: (7, 5),
+    TokenType.MINUS: (7, 5),
+    TokenType.ASTERISK: (None, 6),
+    TokenType.SLASH: (None, 6),
+}
+# The same binding powers, with only the operators used that way, so finding one is a single lookup.
+PREFIX_POWERS = {kind: prefixPower for kind, (prefixPower, _) in BINDING_POWERS.items() if prefixPower is not None}
+INFIX_POWERS = {kind: infixPower for kind, (_, infixPower) in BINDING_POWERS.items() if infixPower is not None}
+
+# Classes of tokens the parser checks for on every token, as bit flags.
+COMPARISON_OPERATOR = 1
+ARITHMETIC_OPERATOR = 2
+SIGN_OPERATOR = 4       # "+" and "-", which are also arithmetic operators.
+LOGICAL_OPERATOR = 8
+
+# Classes of each kind of token, 0 for a kind in none, so classifying a token is a single lookup.
+TOKEN_CLASSES = dict.fromkeys(TokenType, 0)
+TOKEN_CLASSES.update(dict.fromkeys((TokenType.EQEQ, TokenType.NOTEQ, TokenType.LT, TokenType.LTEQ, TokenType.GT, TokenType.GTEQ),
+                                   COMPARISON_OPERATOR))
+TOKEN_CLASSES.update(dict.fromkeys((TokenType.ASTERISK, TokenType.SLASH), ARITHMETIC_OPERATOR))
+TOKEN_CLASSES.update(dict.fromkeys((TokenType.PLUS, TokenType.MINUS), ARITHMETIC_OPERATOR | SIGN_OPERATOR))
+TOKEN_CLASSES.update(dict.fromkeys((TokenType.AND, TokenType.OR, TokenType.NOT), LOGICAL_OPERATOR))
+
+# Node of each literal token.
+LITERAL_NODES = {
+    TokenType.NUMBER: lambda token: Number(token.text, token.line, token.column),
+    TokenType.STRING: lambda token: String(token.text, token.line, token.column),
+    TokenType.TRUE: lambda token: Boolean(True, token.line, token.column),
+    TokenType.FALSE: lambda token: Boolean(False, token.line, token.column),
+}
+
+# Production methods of the Parser that a Tracer records.
+PRODUCTIONS = (
+    'program', 'statement', 'statementIteratively', 'parseStatementsInBlock',
+    'ifHeader', 'elifHeader', 'elseHeader', 'whileHeader', 'simpleStatement',
+    'expression', 'expressionIteratively', 'inversion', 'unary', 'boolOp', 'compare', 'binOp',
+    'primary', 'primitive', 'nl',
+)
+
+class OpenStatement:
+    """
+    OpenStatement is an 'if' or 'while' statement whose blocks Parser.statementIteratively is parsing.
+    """
+    __slots__ = ('kind', 'indentation', 'line', 'column', 'test', 'branches', 'orelse', 'statements', 'blockIndentation')
+
+    def __init__(self, kind: type, indentation: int, line: int, column: int):
+        self.kind = kind                # If or While.
+        self.indentation = indentation
+        self.line = line
+        self.column = column
+        self.test = None                # Test of a 'while' statement.
+        self.branches = []              # (test, body) of the 'if' and each 'elif' parsed so far.
+        self.orelse = None              # Body of the 'else' block, once it is reached.
+        self.statements = []            # Statements of the block being parsed.
+        self.blockIndentation = 0       # Indentation size of the statements of the block being parsed.
+
+    def close(self) -> StatementNode:
+        """
+        Return the statement, once all its blocks have been parsed.
+        """
+        if self.kind is If:
+            return If(self.branches, self.orelse, self.indentation, self.line, self.column)
+        return While(self.test, self.statements, self.indentation, self.line, self.column)
 
-# appending the directory of parseLogger.py in the sys.path list
-sys.path.append(f"{os.path.dirname(__file__)}/../log")   
 
-from parseLogger import parseLogger
+class OpenExpression:
+    """
+    OpenExpression is a call of Parser.expression that Parser.expressionIteratively is in the middle of:
+    the operands read so far of the infix operator whose next operand is being parsed.
+    """
+    __slots__ = ('bindingPower', 'infixParser', 'op', 'left', 'values', 'ops', 'comparators')
+
+    def __init__(self, bindingPower: int):
+        self.bindingPower = bindingPower
+        self.infixParser = None         # Parsing method of the infix operator, or None before the first operand.
+        self.op = None
+        self.left = None
+        self.values = None              # Values of a boolean operation.
+        self.ops = None                 # Operators of a comparison.
+        self.comparators = None         # Comparators of a comparison.
+
 
 class Parser:
     """
-    Parser object keeps track of current token and checks if the code matches the grammar.
+    Parser object keeps track of current token, checks if the code matches the grammar
+    and builds the syntax tree of each statement for the CodeGenerator.
     """
-    def __init__(self, lexer: Lexer, emitter: Emitter):
+    def __init__(self, lexer: Lexer | TokenBuffer | StreamLexer, emitter: Emitter, optimize: bool = False, generator = None,
+                 iterative: bool = False, diagnostics: list | None = None, tracer: Tracer | None = None):
         self.lexer = lexer
         self.emitter = emitter
+        # In error-recovering mode, errors are recorded in this list and parsing carries on at the next line,
+        # instead of exiting at the first. The lexer should record its errors in the same list.
+        self.diagnostics = diagnostics
+        self.recover = diagnostics is not None
+        # Parse with an explicit stack of open blocks and operators instead of recursive calls,
+        # so nesting is not limited by Python's recursion limit.
+        self.iterative = iterative
+        # Builds the output from the syntax tree of each top-level statement, CodeGenerator unless given another,
+        # like an AstGenerator.
+        self.generator = generator if generator is not None else CodeGenerator(emitter)
+        self.optimizer = Optimizer() if optimize else None     # Rewrites each top-level statement before it is generated.
 
         self.symbols = set()    # All variables we have declared so far.
 
+        # Records the productions the parser goes through. Without one, nothing is recorded and nothing is slowed down.
+        self.tracer = tracer
+        if tracer is not None:
+            tracer.trace(self, PRODUCTIONS)
+
+        # Parsing method of each operator in BINDING_POWERS.
+        self.prefixParsers = {
+            TokenType.NOT: self.inversion,
+            TokenType.PLUS: self.unary,
+            TokenType.MINUS: self.unary,
+        }
+        self.infixParsers = {
+            TokenType.OR: self.boolOp,
+            TokenType.AND: self.boolOp,
+            TokenType.EQEQ: self.compare,
+            TokenType.NOTEQ: self.compare,
+            TokenType.LT: self.compare,
+            TokenType.LTEQ: self.compare,
+            TokenType.GT: self.compare,
+            TokenType.GTEQ: self.compare,
+            TokenType.PLUS: self.binOp,
+            TokenType.MINUS: self.binOp,
+            TokenType.ASTERISK: self.binOp,
+            TokenType.SLASH: self.binOp,
+        }
+
         self.curToken = None
         self.peekToken = None
         self.nextToken()
-        self.nextToken()    # Call this twice to initialize current and peek.
+        self.nextTokenOrRecover()   # Call this twice to initialize current and peek.
     
     def isCurTokenOfKind(self, kind: TokenType) -> bool:
         """
@@ -42,6 +175,20 @@ class Parser:
         """
         return kind == self.peekToken.kind
 
+    def lookAhead(self, offset: int) -> Token:
+        """
+        Return the token at the given offset from the current token (0 is the current token, 1 the peek token).
+        Offsets past the peek token need the parser to read from a TokenBuffer (see Lexer.tokenize).
+
+        Parameters:
+        offset (int): How many tokens after the current token.
+        """
+        if offset == 0:
+            return self.curToken
+        if offset == 1:
+            return self.peekToken
+        return self.lexer.peek(offset - 2)
+
     def match(self, kind: TokenType) -> None:
         """
         Try to match current token. If not, error. Advances the current token.
@@ -69,10 +216,12 @@ class Parser:
             return False
         return True
 
-    def hasIndentationOrAbort(self, indentationSize: int) -> None:
+    def hasIndentationOrAbort(self, indentationSize: int) -> bool:
         """
         Check if the current token is of the specified indentation size.
         If so, advance to next token. If not, abort.
+        Return false if, in error-recovering mode, the first token of the statement has an error,
+        which is recorded and its line skipped.
 
         Parameters:
         indentationSize (int): The expected indentation size.
@@ -80,13 +229,13 @@ class Parser:
         if indentationSize == 0:
             if self.isCurTokenOfKind(TokenType.SPACE):
                 self.abort("Unexpected indentation at " + self.curToken.text)
-            return
+            return True
 
         if not self.isCurTokenOfKind(TokenType.SPACE):
             self.abort("Expected indentation at " + self.curToken.text) 
         if self.curToken.count != indentationSize:
             self.abort("Wrong amount of indentation given at " + self.curToken.text)
-        self.nextToken()
+        return self.nextTokenOrRecover()
 
     def nextToken(self):
         """
@@ -96,52 +245,168 @@ class Parser:
         self.curToken = self.peekToken
         self.peekToken = self.lexer.getToken()
         if self.curToken and self.peekToken\
-            and (self.isComparisonOperator() or self.isArithmeticOperator())\
-            and self.isLogicalOperator(self.peekToken):
+            and TOKEN_CLASSES[self.curToken.kind] & (COMPARISON_OPERATOR | ARITHMETIC_OPERATOR)\
+            and TOKEN_CLASSES[self.peekToken.kind] & LOGICAL_OPERATOR:
             self.abort("SyntaxError: invalid syntax")
 
+    def nextTokenOrRecover(self) -> bool:
+        """
+        Advances the current token where no parsing method recovers from an error in it, like between statements.
+        In error-recovering mode, an error at the new token is recorded and its line skipped, and false is returned.
+        """
+        if not self.recover:
+            self.nextToken()
+            return True
+        try:
+            self.nextToken()
+        except CompileError as error:
+            self.report(error.diagnostic)
+            self.synchronize()
+            return False
+        return True
+
     def isComparisonOperator(self) -> bool:
         """
         Return true if the current token is a comparison operator.
         """
-        return self.isCurTokenOfKind(TokenType.GT) or self.isCurTokenOfKind(TokenType.GTEQ) or self.isCurTokenOfKind(TokenType.LT) or self.isCurTokenOfKind(TokenType.LTEQ) or self.isCurTokenOfKind(TokenType.EQEQ) or self.isCurTokenOfKind(TokenType.NOTEQ)
+        return TOKEN_CLASSES[self.curToken.kind] & COMPARISON_OPERATOR != 0
 
     def isArithmeticOperator(self) -> bool:
         """
         Return true if the current token is a arithmetic operator.
         """
-        return self.isCurTokenOfKind(TokenType.PLUS) or self.isCurTokenOfKind(TokenType.MINUS) or self.isCurTokenOfKind(TokenType.ASTERISK) or self.isCurTokenOfKind(TokenType.SLASH)
+        return TOKEN_CLASSES[self.curToken.kind] & ARITHMETIC_OPERATOR != 0
+
+    def isSignOperator(self) -> bool:
+        """
+        Return true if the current token is "+" or "-".
+        """
+        return TOKEN_CLASSES[self.curToken.kind] & SIGN_OPERATOR != 0
 
     def isLogicalOperator(self, token) -> bool:
         """
         Return true if the specified token is a logical operator.
         """
-        return token.kind == TokenType.AND or token.kind == TokenType.OR or token.kind == TokenType.NOT
+        return TOKEN_CLASSES[token.kind] & LOGICAL_OPERATOR != 0
 
-    def parseStatementsInBlock(self, indentationSize: int, isInLoop: bool = False) -> None:
+    def parseStatementsInBlock(self, indentationSize: int, isInLoop: bool = False) -> list:
         """Get statements in a block.
 
         Parameters:
         indentationSize (int): The minimum indentation size of each statement.
         isInLoop (bool): If the block is in a loop (e.g. 'while', 'for').
         """
-        if self.isCurTokenOfKind(TokenType.SPACE) and self.curToken.count >= indentationSize:
-                statementIndentSize = self.curToken.count
+        statements = []
+        statementIndentSize = self.blockIndentation(indentationSize)
+        if statementIndentSize is None:
+            return statements
 
-                # One or more statements in the body.
-                while self.isCurTokenOfKind(TokenType.SPACE) and self.curToken.count == statementIndentSize:
-                    self.statement(statementIndentSize, isInLoop)
-        else:
+        # One or more statements in the body.
+        while self.isCurTokenOfKind(TokenType.SPACE) and self.curToken.count == statementIndentSize:
+            statement = self.statement(statementIndentSize, isInLoop)
+            if statement is not None:
+                statements.append(statement)
+            if self.recover:
+                self.skipIndentedLines(statementIndentSize, isInLoop, True)
+        return statements
+
+    def blockIndentation(self, indentationSize: int) -> int | None:
+        """
+        Return the indentation size of the statements in a block, which is the one of its first statement.
+        In error-recovering mode, a missing block is recorded and None returned.
+
+        Parameters:
+        indentationSize (int): The minimum indentation size of each statement.
+        """
+        if not (self.isCurTokenOfKind(TokenType.SPACE) and self.curToken.count >= indentationSize):
+            if self.recover:
+                self.report(self.diagnostic("IndentationError: expected an indented block"))
+                return None
             self.abort("IndentationError: expected an indented block")
+        return self.curToken.count
 
     def abort(self, message: str) -> None:
         """
         Abort the parser.
+        In error-recovering mode, raise the error as a CompileError instead, for recovered() to record.
 
         Parameters:
         message (str): The error message to display.
         """
+        if self.recover:
+            raise CompileError(self.diagnostic(message))
         sys.exit("Error. " + message)
+
+    def diagnostic(self, message: str) -> Diagnostic:
+        """
+        Return a Diagnostic of an error at the current token.
+
+        Parameters:
+        message (str): The error message.
+        """
+        return Diagnostic("Error. " + message, self.curToken.line, self.curToken.column, self.curToken.text)
+
+    def report(self, diagnostic: Diagnostic) -> None:
+        """
+        Record an error in error-recovering mode.
+        An error on the same line as the one before it is left out, as it is caused by it.
+
+        Parameters:
+        diagnostic (Diagnostic): The error.
+        """
+        if self.diagnostics and self.diagnostics[-1].line == diagnostic.line:
+            return
+        self.diagnostics.append(diagnostic)
+
+    def recovered(self, parse, *args):
+        """
+        Return what a parsing method returns. In error-recovering mode, an error in it is recorded,
+        the rest of its line is skipped and None is returned, so parsing carries on at the next line.
+
+        Parameters:
+        parse: The parsing method.
+        args: The arguments of the parsing method.
+        """
+        if not self.recover:
+            return parse(*args)
+        try:
+            return parse(*args)
+        except CompileError as error:
+            self.report(error.diagnostic)
+            self.synchronize()
+            return None
+
+    def synchronize(self) -> None:
+        """
+        Skip tokens up to the first one of the next line, after an error in error-recovering mode.
+        """
+        line = self.curToken.line
+        while not self.isCurTokenOfKind(TokenType.EOF) and (self.curToken.column != 1 or self.curToken.line == line):
+            # Advance without the checks of nextToken, which would give errors again.
+            self.curToken = self.peekToken
+            self.peekToken = self.lexer.getToken()
+            # The first token of the next line is not checked by nextToken either, so an error in it is recorded here.
+            if self.curToken.column == 1 and self.curToken.line != line\
+                and TOKEN_CLASSES[self.curToken.kind] & (COMPARISON_OPERATOR | ARITHMETIC_OPERATOR)\
+                and TOKEN_CLASSES[self.peekToken.kind] & LOGICAL_OPERATOR:
+                self.report(self.diagnostic("SyntaxError: invalid syntax"))
+                line = self.curToken.line
+
+    def skipIndentedLines(self, indentationSize: int, isInLoop: bool, unexpected: bool) -> None:
+        """
+        In error-recovering mode, parse the lines indented deeper than a statement as a block of their own
+        and leave them out, so the errors in them are found and the statements after them are parsed as usual.
+
+        Parameters:
+        indentationSize (int): The indentation size of the statement.
+        isInLoop (bool): If the lines are in a loop (e.g. 'while', 'for').
+        unexpected (bool): Record the indentation as an error. Lines after an error that are indented deeper
+            belong to the statement of the error, like the block of an 'if' statement whose test could not be parsed.
+        """
+        while self.isCurTokenOfKind(TokenType.SPACE) and self.curToken.count > indentationSize:
+            if unexpected:
+                self.report(self.diagnostic("Unexpected indentation at " + self.curToken.text))
+            self.parseStatementsInBlock(self.curToken.count, isInLoop)
         
 
     # Production rules.
@@ -150,18 +415,29 @@ class Parser:
         """
         program ::= {statement}
         """
-        parseLogger.info("程序 (PROGRAM)")
-
         # Since some newlines are required in our grammar, need to skip the excess.
         while self.isCurTokenOfKind(TokenType.NEWLINE):
-            self.nextToken()
+            self.nextTokenOrRecover()
 
         # Parse all the statements in the program.
+        # Generate the code of each top-level statement and let the emitter write it out.
+        # In error-recovering mode, nothing is generated after the first error.
         while not self.isCurTokenOfKind(TokenType.EOF):
-            self.statement()
+            if self.recover and self.isCurTokenOfKind(TokenType.SPACE):
+                self.skipIndentedLines(0, False, True)
+                continue
+
+            statement = self.statement()
+            if statement is None or self.diagnostics:
+                continue
+            if self.optimizer is None:
+                self.generator.statement(statement)
+            else:
+                self.generator.block(self.optimizer.statement(statement))
+            self.emitter.flush()
             
 
-    def statement(self, indentationSize: int = 0, isInLoop: bool = False) -> None:
+    def statement(self, indentationSize: int = 0, isInLoop: bool = False) -> StatementNode | None:
         """
         One of the following statements...
         - PRINT: “印出”（ expression | string ）+ nl
@@ -170,120 +446,244 @@ class Parser:
         - VARIABLE ASSIGNMENT: ident "=" expression + nl
         - EXPRESSION
 
+        In error-recovering mode, a statement with an error in it is left out and None is returned,
+        and an 'if' or 'while' statement whose test has an error gets None as its test.
+
         Parameters:
         indentationSize (int): The expected indentation size of the statement.
         isInLoop (bool): If the statement is in a loop (e.g. 'while', 'for').
         """
+        if self.iterative:
+            return self.statementIteratively(indentationSize, isInLoop)
+
         # Check that the number of spaces at beginning of statement
         # corresponds to expected indentation size
-        self.hasIndentationOrAbort(indentationSize)
-        self.emitter.emit(" " * indentationSize)
+        if not self.hasIndentationOrAbort(indentationSize):
+            self.skipIndentedLines(indentationSize, isInLoop, False)
+            return None
+        line, column = self.curToken.line, self.curToken.column
 
         # Check the first token to see what kind of statement this is.
 
-        # “印出”（ expression | string ）+ nl
-        if self.isCurTokenOfKind(TokenType.PRINT):
-            parseLogger.info("STATEMENT-PRINT")
+        # “如果” comparison：nl {statement}
+        if self.isCurTokenOfKind(TokenType.IF):
+            branches = [(self.recovered(self.ifHeader), self.parseStatementsInBlock(indentationSize + 1))]
 
-            self.nextToken()
-            self.match(TokenType.OPEN_BRACKET)
+            # One or more optional 'elif' blocks
+            while self.isAtElif(indentationSize):
+                branches.append((self.recovered(self.elifHeader, indentationSize), self.parseStatementsInBlock(indentationSize + 1)))
 
-            # Expect an expression.
-            self.emitter.emit("print(")
-            self.expression()
-            self.emitter.emit(")")
-            
-            self.match(TokenType.CLOSE_BRACKET)
-            
-            # Expect one or more newlines at the end
-            self.nl()
+            # Optional 'else' block
+            orelse = None
+            if self.isAtElse(indentationSize):
+                self.recovered(self.elseHeader, indentationSize)
+                orelse = self.parseStatementsInBlock(indentationSize + 1)
+            return If(branches, orelse, indentationSize, line, column)
 
-        # “如果” comparison：nl {statement}
-        elif self.isCurTokenOfKind(TokenType.IF):
-            parseLogger.info("STATEMENT-IF")
+        # “当” comparison：nl {statement}
+        elif self.isCurTokenOfKind(TokenType.WHILE):
+            test = self.recovered(self.whileHeader)
+            body = self.parseStatementsInBlock(indentationSize + 1, True)
+            return While(test, body, indentationSize, line, column)
 
-            self.emitter.emit("if ")
-            self.nextToken()
-            self.expression()
+        statement = self.recovered(self.simpleStatement, indentationSize, isInLoop, line, column)
+        if statement is None:
+            self.skipIndentedLines(indentationSize, isInLoop, False)
+        return statement
 
-            self.match(TokenType.COLON)
-            self.emitter.emit(":")
 
-            self.nl()
+    def statementIteratively(self, indentationSize: int = 0, isInLoop: bool = False) -> StatementNode | None:
+        """
+        Parse a statement like statement() does, without recursing into the blocks of 'if' and 'while' statements.
+        The statements whose blocks are being parsed are kept on a stack instead, so nesting is only limited by memory.
+
+        Parameters:
+        indentationSize (int): The expected indentation size of the statement.
+        isInLoop (bool): If the statement is in a loop (e.g. 'while', 'for').
+        """
+        openStatements = []     # OpenStatement of each 'if' or 'while' statement whose block is being parsed, innermost last.
+        while True:
+            started = self.hasIndentationOrAbort(indentationSize)
+            line, column = self.curToken.line, self.curToken.column
+
+            node = None
+            if not started:
+                openStatement = None
+                self.skipIndentedLines(indentationSize, isInLoop, False)
+            elif self.isCurTokenOfKind(TokenType.IF):
+                test = self.recovered(self.ifHeader)
+                openStatement = OpenStatement(If, indentationSize, line, column)
+                openStatement.branches.append((test, openStatement.statements))
+            elif self.isCurTokenOfKind(TokenType.WHILE):
+                test = self.recovered(self.whileHeader)
+                openStatement = OpenStatement(While, indentationSize, line, column)
+                openStatement.test = test
+            else:
+                openStatement = None
+                node = self.recovered(self.simpleStatement, indentationSize, isInLoop, line, column)
+                if node is None:
+                    self.skipIndentedLines(indentationSize, isInLoop, False)
+
+            if openStatement is not None:
+                openStatements.append(openStatement)
+                openStatement.blockIndentation = self.blockIndentation(indentationSize + 1)
+
+            # Add the statement to the block it is in, and close the statements whose blocks end after it.
+            while openStatements:
+                openStatement = openStatements[-1]
+                if node is not None:
+                    openStatement.statements.append(node)
+                    node = None
+                if openStatement.blockIndentation is not None:
+                    if self.recover:
+                        self.skipIndentedLines(openStatement.blockIndentation, openStatement.kind is While, True)
+                    if self.isCurTokenOfKind(TokenType.SPACE) and self.curToken.count == openStatement.blockIndentation:
+                        break   # The block goes on.
+
+                if openStatement.kind is If and openStatement.orelse is None:
+                    if self.isAtElif(openStatement.indentation):
+                        openStatement.statements = []
+                        test = self.recovered(self.elifHeader, openStatement.indentation)
+                        openStatement.branches.append((test, openStatement.statements))
+                        openStatement.blockIndentation = self.blockIndentation(openStatement.indentation + 1)
+                        continue
+                    if self.isAtElse(openStatement.indentation):
+                        self.recovered(self.elseHeader, openStatement.indentation)
+                        openStatement.statements = openStatement.orelse = []
+                        openStatement.blockIndentation = self.blockIndentation(openStatement.indentation + 1)
+                        continue
+
+                openStatements.pop()
+                node = openStatement.close()
+            else:
+                return node
 
-            self.parseStatementsInBlock(indentationSize + 1)
+            indentationSize = openStatement.blockIndentation
+            # Like in parseStatementsInBlock, only the block of a 'while' statement is in a loop.
+            isInLoop = openStatement.kind is While
 
-            # One or more optional 'elif' blocks
-            while self.hasIndentation(indentationSize) and\
-                ((indentationSize == 0 and self.isCurTokenOfKind(TokenType.ELIF))\
-                 or (indentationSize > 0 and self.isPeekTokenOfKind(TokenType.ELIF))):
-                parseLogger.info("STATEMENT-ELIF")
 
-                if indentationSize > 0:
-                    self.nextToken()
-                self.emitter.emit(" " * indentationSize + "elif ")
-                self.nextToken()
-                self.expression()
+    def ifHeader(self) -> ExpressionNode:
+        """
+        “如果” comparison：nl
+        Return the test.
+        """
+        self.nextToken()
+        test = self.expression()
 
-                self.match(TokenType.COLON)
-                self.emitter.emit(":")
+        self.match(TokenType.COLON)
 
-                self.nl()
+        self.nl()
+        return test
 
-                self.parseStatementsInBlock(indentationSize + 1)
+    def isAtElif(self, indentationSize: int) -> bool:
+        """
+        Return true if an 'elif' block of the 'if' statement with the given indentation size starts at the current token.
 
-            # Optional 'else' block
-            if self.hasIndentation(indentationSize) and\
-                ((indentationSize == 0 and self.isCurTokenOfKind(TokenType.ELSE))\
-                 or (indentationSize > 0 and self.isPeekTokenOfKind(TokenType.ELSE))):
-                parseLogger.info("STATEMENT-ELSE")
-                
-                if indentationSize > 0:
-                    self.nextToken()
-                self.emitter.emit(" " * indentationSize + "else")
-                self.nextToken()
+        Parameters:
+        indentationSize (int): The indentation size of the 'if' statement.
+        """
+        return self.hasIndentation(indentationSize) and\
+            ((indentationSize == 0 and self.isCurTokenOfKind(TokenType.ELIF))\
+             or (indentationSize > 0 and self.isPeekTokenOfKind(TokenType.ELIF)))
+
+    def elifHeader(self, indentationSize: int) -> ExpressionNode:
+        """
+        “或则” comparison：nl
+        Return the test.
+
+        Parameters:
+        indentationSize (int): The indentation size of the 'if' statement.
+        """
+        if indentationSize > 0:
+            self.nextToken()
+        self.nextToken()
+        test = self.expression()
 
-                self.match(TokenType.COLON)
-                self.emitter.emit(":")
+        self.match(TokenType.COLON)
 
-                self.nl()
+        self.nl()
+        return test
 
-                self.parseStatementsInBlock(indentationSize + 1)
+    def isAtElse(self, indentationSize: int) -> bool:
+        """
+        Return true if the 'else' block of the 'if' statement with the given indentation size starts at the current token.
 
-        # “当” comparison：nl {statement}
-        elif self.isCurTokenOfKind(TokenType.WHILE):
-            parseLogger.info("陈述-当 (STATEMENT-WHILE)")
+        Parameters:
+        indentationSize (int): The indentation size of the 'if' statement.
+        """
+        return self.hasIndentation(indentationSize) and\
+            ((indentationSize == 0 and self.isCurTokenOfKind(TokenType.ELSE))\
+             or (indentationSize > 0 and self.isPeekTokenOfKind(TokenType.ELSE)))
+
+    def elseHeader(self, indentationSize: int) -> None:
+        """
+        “否则”：nl
 
+        Parameters:
+        indentationSize (int): The indentation size of the 'if' statement.
+        """
+        if indentationSize > 0:
             self.nextToken()
-            self.emitter.emit("while ")
-            self.expression()
+        self.nextToken()
 
-            self.match(TokenType.COLON)
-            self.emitter.emit(":")
+        self.match(TokenType.COLON)
 
-            self.nl()
+        self.nl()
+
+    def whileHeader(self) -> ExpressionNode:
+        """
+        “当” comparison：nl
+        Return the test.
+        """
+        self.nextToken()
+        test = self.expression()
 
-            self.parseStatementsInBlock(indentationSize + 1, True)
+        self.match(TokenType.COLON)
+
+        self.nl()
+        return test
+
+
+    def simpleStatement(self, indentationSize: int, isInLoop: bool, line: int, column: int) -> StatementNode:
+        """
+        A statement without a block, after its indentation.
+
+        Parameters:
+        indentationSize (int): The indentation size of the statement.
+        isInLoop (bool): If the statement is in a loop (e.g. 'while', 'for').
+        line (int): The line of the statement.
+        column (int): The column of the statement.
+        """
+        # “印出”（ expression | string ）+ nl
+        if self.isCurTokenOfKind(TokenType.PRINT):
+            self.nextToken()
+            self.match(TokenType.OPEN_BRACKET)
+
+            # Expect an expression.
+            value = self.expression()
+            
+            self.match(TokenType.CLOSE_BRACKET)
+            
+            # Expect one or more newlines at the end
+            self.nl()
+            return Print(value, indentationSize, line, column)
 
         # Variable Assignment: ident "=" expression + nl
         elif self.isCurTokenOfKind(TokenType.IDENT) and self.peekToken.kind == TokenType.EQ:
-            parseLogger.info("陈述-变量赋值 (STATEMENT-VARIABLE ASSIGNMENT)")
-
-            variable = getAlphaNumericVar(self.curToken.text)
-            self.emitter.emit(variable)
+            variable = self.curToken.text
 
             self.nextToken()
             self.match(TokenType.EQ)
 
-            self.emitter.emit("=")
-
-            self.expression()
+            value = self.expression()
 
             #  Check if ident exists in symbol table. If not, declare it.
             if variable not in self.symbols:
                 self.symbols.add(variable)
 
             self.nl()
+            return Assign(variable, value, indentationSize, line, column)
 
         # Missing 'if' statement
         elif self.isCurTokenOfKind(TokenType.ELIF) or self.isCurTokenOfKind(TokenType.ELSE):
@@ -291,142 +691,245 @@ class Parser:
 
         # 'break' statement
         elif self.isCurTokenOfKind(TokenType.BREAK):
-            parseLogger.info("STATEMENT-BREAK")
-
             if not isInLoop:
                 self.abort("SyntaxError: 'break' outside loop")
 
-            self.emitter.emit("break")
             self.nextToken()
             self.nl()
+            return Break(indentationSize, line, column)
 
         # 'continue' statement
         elif self.isCurTokenOfKind(TokenType.CONTINUE):
-            parseLogger.info("STATEMENT-CONTINUE")
-
             if not isInLoop:
                 self.abort("SyntaxError: 'continue' outside loop")
                 
-            self.emitter.emit("continue")
             self.nextToken()
             self.nl()
+            return Continue(indentationSize, line, column)
             
         else:
-            self.expression()
+            value = self.expression()
             self.nl()
+            return ExpressionStatement(value, indentationSize, line, column)
+
 
+    def expression(self, bindingPower: int = 0) -> ExpressionNode:
+        """
+        expression ::= conjunction {"或" conjunction}
+        Expressions are parsed by precedence climbing on BINDING_POWERS,
+        which gives the same tree as the grammar's levels (see supported-grammar.txt).
 
-    def expression(self) -> None:
+        Parameters:
+        bindingPower (int): Only operators that bind tighter than this are part of the expression.
         """
-        Any of the following:
-        - expression ::= term {( "-" | "+" ) term}
-        - comparison (special kind of expression) ::= 
-            term (("==" | "!=" | ">" | ">=" | "<" | "<=") term)
-        - logical (special kind of expression) ::=
-            term(("与" | "或") term)
+        if self.iterative:
+            return self.expressionIteratively(bindingPower)
+
+        # Prefix operator or primary.
+        kind = self.curToken.kind
+        prefixPower = PREFIX_POWERS.get(kind)
+        if prefixPower is not None and prefixPower > bindingPower:
+            node = self.prefixParsers[kind](prefixPower)
+        else:
+            node = self.primary()
+
+        # Infix operators, as long as they bind tighter than the operator on the left.
+        while True:
+            kind = self.curToken.kind
+            infixPower = INFIX_POWERS.get(kind)
+            if infixPower is None or infixPower <= bindingPower:
+                return node
+            node = self.infixParsers[kind](node, infixPower)
+
+
+    def expressionIteratively(self, bindingPower: int = 0) -> ExpressionNode:
         """
-        parseLogger.info("EXPRESSION/COMPARISON")
+        Parse an expression like expression() does, without recursing into operands and parentheses.
+        The calls of expression() and the prefix operators and parentheses it is in the middle of are kept on a stack instead,
+        innermost last. The stack has an OpenExpression for each call, and the token of each prefix operator or parenthesis.
 
-        self.term()
-        # Can have 0 or more +,-,==,!=,>,>=,<,<=,与,或 expressions.
-        while self.isCurTokenOfKind(TokenType.PLUS)\
-                or self.isCurTokenOfKind(TokenType.MINUS)\
-                or self.isComparisonOperator()\
-                or self.isCurTokenOfKind(TokenType.AND) or self.isCurTokenOfKind(TokenType.OR):
-            if self.isCurTokenOfKind(TokenType.AND):
-                self.emitter.emit(" and ")
-            elif self.isCurTokenOfKind(TokenType.OR):
-                self.emitter.emit(" or ")
-            else:
-                self.emitter.emit(self.curToken.text)
-            self.nextToken()
-            self.term()
+        Parameters:
+        bindingPower (int): Only operators that bind tighter than this are part of the expression.
+        """
+        stack = [OpenExpression(bindingPower)]
+        while True:
+            # Read prefix operators and opening parentheses up to the first primitive or identifier.
+            while True:
+                token = self.curToken
+                prefixPower = PREFIX_POWERS.get(token.kind)
+                if prefixPower is not None and prefixPower > stack[-1].bindingPower:
+                    if token.kind == TokenType.NOT:
+                        self.nextToken()
+                        if self.isSignOperator():
+                            self.abort("Unexpected token at " + self.curToken.text)
+                        stack.append(token)
+                        stack.append(OpenExpression(prefixPower))
+                        continue
+
+                    self.nextToken()
+                    stack.append(token)
+                    token = self.curToken
 
+                if not self.isCurTokenOfKind(TokenType.OPEN_BRACKET):
+                    node = self.primitive()
+                    break
+                self.nextToken()
+                stack.append(token)
+                stack.append(OpenExpression(0))
+
+            # Give the node to the innermost call or operator, until one needs another operand.
+            while True:
+                top = stack[-1]
+                if isinstance(top, Token):
+                    stack.pop()
+                    if top.kind == TokenType.OPEN_BRACKET:
+                        node = Group(node, top.line, top.column)
+                        self.match(TokenType.CLOSE_BRACKET)
+                    else:
+                        node = UnaryOp(top.kind, node, top.line, top.column)
+                    continue
+
+                # The node is the first operand of the call, or the next operand of its infix operator.
+                if top.infixParser == self.binOp:
+                    node = BinOp(top.left, top.op, node, top.left.line, top.left.column)
+                elif top.infixParser == self.boolOp:
+                    top.values.append(node)
+                    if self.isCurTokenOfKind(top.op):
+                        self.nextToken()
+                        break
+                    node = BoolOp(top.op, top.values, top.values[0].line, top.values[0].column)
+                elif top.infixParser == self.compare:
+                    top.comparators.append(node)
+                    if self.isComparisonOperator():
+                        top.ops.append(self.curToken.kind)
+                        self.nextToken()
+                        break
+                    node = Compare(top.left, top.ops, top.comparators, top.left.line, top.left.column)
+                top.infixParser = None
+
+                # Infix operators, as long as they bind tighter than the operator on the left.
+                kind = self.curToken.kind
+                infixPower = INFIX_POWERS.get(kind)
+                if infixPower is None or infixPower <= top.bindingPower:
+                    stack.pop()
+                    if not stack:
+                        return node
+                    continue
+
+                top.infixParser = self.infixParsers[kind]
+                top.op = kind
+                top.left = node
+                if top.infixParser == self.boolOp:
+                    top.values = [node]
+                elif top.infixParser == self.compare:
+                    top.ops = [kind]
+                    top.comparators = []
+                self.nextToken()
+                break
+
+            # Parse the next operand of the innermost call.
+            stack.append(OpenExpression(INFIX_POWERS[top.op]))
 
-    def term(self) -> None:
+
+    def inversion(self, bindingPower: int) -> ExpressionNode:
         """
-        term ::= unary {( "/" | "*" ) unary}
+        inversion ::= ["非"] comparison
         """
-        parseLogger.info("TERM")
+        line, column = self.curToken.line, self.curToken.column
+        self.nextToken()
+        # Like "+" and "-", "非" must be followed by a primary.
+        if self.isSignOperator():
+            self.abort("Unexpected token at " + self.curToken.text)
+        return UnaryOp(TokenType.NOT, self.expression(bindingPower), line, column)
 
-        self.unary()
-        # Can have 0 or more *// expressions.
-        while self.isCurTokenOfKind(TokenType.ASTERISK) or self.isCurTokenOfKind(TokenType.SLASH):
-            self.emitter.emit(self.curToken.text)
-            self.nextToken()
-            self.unary()
+
+    def unary(self, bindingPower: int) -> ExpressionNode:
+        """
+        unary ::= ["+" | "-"] primary
+        """
+        line, column = self.curToken.line, self.curToken.column
+        op = self.curToken.kind
+        self.nextToken()
+        return UnaryOp(op, self.primary(), line, column)
 
 
-    def unary(self) -> None:
+    def boolOp(self, node: ExpressionNode, bindingPower: int) -> ExpressionNode:
         """
-        unary ::= ["+" | "-" | "非"] primary
+        conjunction ::= inversion {"与" inversion}, and the same for "或" in expression.
         """
-        parseLogger.info("UNARY")
+        op = self.curToken.kind
+        values = [node]
+        while self.isCurTokenOfKind(op):
+            self.nextToken()
+            values.append(self.expression(bindingPower))
+        return BoolOp(op, values, node.line, node.column)
 
-        # Optional unary +/-/非
-        if self.isCurTokenOfKind(TokenType.PLUS)\
-            or self.isCurTokenOfKind(TokenType.MINUS)\
-            or self.isCurTokenOfKind(TokenType.NOT):
-            if self.isCurTokenOfKind(TokenType.NOT):
-                self.emitter.emit("not ")
-            else:
-                self.emitter.emit(self.curToken.text)
-            self.nextToken()       
-        self.primary()
+
+    def compare(self, node: ExpressionNode, bindingPower: int) -> ExpressionNode:
+        """
+        comparison ::= arithmetic {("==" | "!=" | ">" | ">=" | "<" | "<=") arithmetic}
+        """
+        ops = []
+        comparators = []
+        while self.isComparisonOperator():
+            ops.append(self.curToken.kind)
+            self.nextToken()
+            comparators.append(self.expression(bindingPower))
+        return Compare(node, ops, comparators, node.line, node.column)
 
 
-    def primary(self) -> None:
+    def binOp(self, node: ExpressionNode, bindingPower: int) -> ExpressionNode:
         """
-        primary ::= primitive | ident | LPAREN expr RPAREN
-        primitive ::= number | string | boolean
+        arithmetic ::= term {( "-" | "+" ) term}, and term ::= unary {( "/" | "*" ) unary}
         """
-        parseLogger.info("PRIMARY")
+        op = self.curToken.kind
+        self.nextToken()
+        return BinOp(node, op, self.expression(bindingPower), node.line, node.column)
 
-        if self.isCurTokenOfKind(TokenType.NUMBER): 
-            self.emitter.emit(self.curToken.text)
-            self.nextToken()
-        elif self.isCurTokenOfKind(TokenType.STRING):
-            # Simple string.
-            self.emitter.emit(f"\"{self.curToken.text}\"")
-            self.nextToken()
-        elif self.isCurTokenOfKind(TokenType.TRUE):
-            # Boolean (true)
-            self.emitter.emit("True")
-            self.nextToken()
-        elif self.isCurTokenOfKind(TokenType.FALSE):
-            # Boolean (false)
-            self.emitter.emit("False")
-            self.nextToken()
-        elif self.isCurTokenOfKind(TokenType.IDENT):
-            # Ensure the variable already exists.
-            variable = getAlphaNumericVar(self.curToken.text)
-            if variable not in self.symbols:
-                self.abort("Referencing variable before assignment: " + self.curToken.text)
 
-            self.emitter.emit(variable)
-            self.nextToken()
-        elif self.isCurTokenOfKind(TokenType.OPEN_BRACKET):
-            self.emitter.emit(self.curToken.text)
+    def primary(self) -> ExpressionNode:
+        """
+        primary ::= primitive | ident | LPAREN expr RPAREN
+        """
+        token = self.curToken
+        if self.isCurTokenOfKind(TokenType.OPEN_BRACKET):
             self.nextToken()
 
-            self.expression()
+            node = Group(self.expression(), token.line, token.column)
 
             self.match(TokenType.CLOSE_BRACKET)
-            self.emitter.emit(")")
+            return node
+        return self.primitive()
+
+
+    def primitive(self) -> ExpressionNode:
+        """
+        primitive ::= number | string | boolean, or an ident
+        """
+        token = self.curToken
+        literalNode = LITERAL_NODES.get(token.kind)
+        if literalNode is not None:
+            # Number, string or boolean.
+            node = literalNode(token)
+        elif token.kind == TokenType.IDENT:
+            # Ensure the variable already exists.
+            if token.text not in self.symbols:
+                self.abort("Referencing variable before assignment: " + token.text)
+
+            node = Name(token.text, token.line, token.column)
         else:
             # Error!
             self.abort("Unexpected token at " + self.curToken.text)
+        self.nextToken()
+        return node
 
 
     def nl(self) -> None:
         """
         nl ::= '\n'+
         """
-        parseLogger.info("换行 (NEWLINE)")
-		
         # Require at least one newline.
         self.match(TokenType.NEWLINE)
-        self.emitter.emitLine("")
 
         # But we will allow extra newlines too, of course.
         while self.isCurTokenOfKind(TokenType.NEWLINE):
@@ -0,0 +1,194 @@
+import os
+import time
+
+import compiler
+from cache import CompileCache, compilerVersion
+from emit import writeAtomically
+
+# Name of the file in the output directory that records the source each output was built from.
+MANIFEST_FILE = '.pyhan-build.json'
+
+class BuildResult:
+    """
+    BuildResult counts the files of a build, with the error of each file that failed to compile.
+    """
+    __slots__ = ('built', 'upToDate', 'errors', 'seconds')
+
+    def __init__(self):
+        self.built = 0          # Number of files compiled.
+        self.upToDate = 0       # Number of files whose output was already built from the same source.
+        self.errors = {}        # Error of each file that failed, by its path in the source directory.
+        self.seconds = 0.0      # Time the build took.
+
+    def summary(self) -> str:
+        """
+        Return a line with the number of files built, up to date and failed, and the time the build took.
+        """
+        return (f"{self.built} built, {self.upToDate} up to date, {len(self.errors)} failed "
+                f"in {self.seconds:.2f}s")
+
+
+def buildProject(sourceDir: str, outputDir: str, jobs: int | None = None, optimize: bool = False, iterative: bool = False,
+                 nativeNames: bool = False, shortNames: bool = False, nameHeader: bool = False,
+                 cache: CompileCache | None = None) -> BuildResult:
+    """
+    Compile every .pyhan file under a directory into a .py file at the same place under the output directory,
+    on a pool of processes. A file is skipped if its output was built with the same options from a source
+    with the same modification time and size, or failing that, the same contents. What each output was built from
+    is recorded in a manifest file in the output directory.
+
+    Parameters:
+        sourceDir (str): The directory with the .pyhan files.
+        outputDir (str): The directory to write the .py files to.
+        jobs (int | None): The number of processes to compile with, by default one for each CPU.
+        optimize (bool): Fold expressions made only of literals into their value at compile time
+            and leave out code that can never run.
+        iterative (bool): Parse with an explicit stack instead of recursive calls, so blocks and parentheses
+            can be nested tens of thousands deep. With optimize, nesting stays limited to a few hundred levels,
+            as the optimizer still recurses.
+        nativeNames (bool): Keep the names of variables as they are written where Python accepts them,
+            instead of turning every Chinese name into Pinyin and a hash.
+        shortNames (bool): Turn Chinese names into Pinyin and only as many digits of the hash
+            as it takes to tell them apart in the source, instead of the whole hash.
+        nameHeader (bool): Start each .py file with a comment giving the Python name of each Chinese variable.
+        cache (CompileCache | None): Cache to read the output of each file from, and to keep it in.
+    """
+    start = time.perf_counter()
+    result = BuildResult()
+    # Options that change the output. Outputs built with other options, or another compiler, are built again.
+    options = {'optimize': optimize, 'nativeNames': nativeNames, 'shortNames': shortNames, 'nameHeader': nameHeader}
+    compileOptions = dict(options, iterative=iterative, cache=cache)
+
+    manifestPath = os.path.join(outputDir, MANIFEST_FILE)
+    previous = readManifest(manifestPath, options)
+    files = {}
+    tasks = []
+    for relativePath in findSources(sourceDir, outputDir):
+        sourcePath = os.path.join(sourceDir, relativePath)
+        outputPath = os.path.join(outputDir, os.path.splitext(relativePath)[0] + '.py')
+        record = previous.get(relativePath) if os.path.exists(outputPath) else None
+        if record is not None:
+            stat = os.stat(sourcePath)
+            if record[:2] == [stat.st_mtime_ns, stat.st_size]:
+                files[relativePath] = record
+                result.upToDate += 1
+                continue
+        tasks.append((relativePath, sourcePath, outputPath, record[2] if record is not None else None, compileOptions))
+
+    for relativePath, built, error, record in runTasks(tasks, jobs or os.cpu_count() or 1):
+        if error is not None:
+            result.errors[relativePath] = error
+            continue
+        files[relativePath] = record
+        if built:
+            result.built += 1
+        else:
+            result.upToDate += 1
+
+    os.makedirs(outputDir, exist_ok=True)
+    writeManifest(manifestPath, options, files)
+    result.seconds = time.perf_counter() - start
+    return result
+
+def findSources(sourceDir: str, outputDir: str) -> list:
+    """
+    Return the path of every .pyhan file under a directory, relative to it, in sorted order.
+    The output directory is left out if it is under the source directory.
+
+    Parameters:
+        sourceDir (str): The directory with the .pyhan files.
+        outputDir (str): The directory the .py files are written to.
+    """
+    outputDir = os.path.realpath(outputDir)
+    sources = []
+    for directory, subdirectories, names in os.walk(sourceDir):
+        subdirectories[:] = [name for name in subdirectories
+                             if os.path.realpath(os.path.join(directory, name)) != outputDir]
+        for name in names:
+            if name.endswith('.pyhan'):
+                sources.append(os.path.relpath(os.path.join(directory, name), sourceDir))
+    return sorted(sources)
+
+def runTasks(tasks: list, jobs: int):
+    """
+    Compile the files of the build on a pool of jobs processes, or in this process if there is at most one file
+    or one job, and yield the result of each, in the order of the tasks.
+
+    Parameters:
+        tasks (list): The arguments of buildFile for each file.
+        jobs (int): The number of processes.
+    """
+    if jobs == 1 or len(tasks) <= 1:
+        yield from map(buildFile, tasks)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    jobs = min(jobs, len(tasks))
+    # Files are sent to the processes in chunks, as most compile faster than a task is sent to a process.
+    chunkSize = max(1, len(tasks) // (jobs * 8))
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        yield from executor.map(buildFile, tasks, chunksize=chunkSize)
+
+def buildFile(task: tuple) -> tuple:
+    """
+    Compile one file of a build, unless its contents are the same as when its output was built.
+    Return its path, whether it was compiled, its error or None, and its record for the manifest:
+    the modification time, size and hash of the source.
+
+    Parameters:
+        task (tuple): The path of the source relative to the source directory, the paths of the source
+            and of the output, the hash of the source the output was built from, or None, and the compile options.
+    """
+    import hashlib
+
+    relativePath, sourcePath, outputPath, previousHash, compileOptions = task
+    try:
+        stat = os.stat(sourcePath)
+        with open(sourcePath, 'rb') as sourceFile:
+            sourceHash = hashlib.sha256(sourceFile.read()).hexdigest()
+        record = [stat.st_mtime_ns, stat.st_size, sourceHash]
+        if sourceHash == previousHash:
+            return relativePath, False, None, record
+
+        os.makedirs(os.path.dirname(outputPath), exist_ok=True)
+        compiler.compile(sourcePath, outputPath, **compileOptions)
+    except SystemExit as error:
+        return relativePath, False, str(error.code), None
+    except Exception as error:
+        return relativePath, False, f"{type(error).__name__}: {error}", None
+    return relativePath, True, None, record
+
+def readManifest(path: str, options: dict) -> dict:
+    """
+    Return the record of each output in a manifest file, by the path of its source, or an empty dict
+    if there is no manifest or it was written by another compiler or with other options.
+
+    Parameters:
+        path (str): The path to the manifest file.
+        options (dict): The options that change the output.
+    """
+    import json
+
+    try:
+        with open(path, 'r', encoding='utf-8') as manifestFile:
+            manifest = json.load(manifestFile)
+        if manifest['compiler'] != compilerVersion() or manifest['options'] != options:
+            return {}
+        return manifest['files']
+    except (OSError, ValueError, KeyError, TypeError):
+        return {}
+
+def writeManifest(path: str, options: dict, files: dict) -> None:
+    """
+    Write the record of each output to a manifest file.
+
+    Parameters:
+        path (str): The path to the manifest file.
+        options (dict): The options that change the output.
+        files (dict): The modification time, size and hash of the source of each output, by the path of its source.
+    """
+    import json
+
+    manifest = {'compiler': compilerVersion(), 'options': options, 'files': dict(sorted(files.items()))}
+    writeAtomically(path, json.dumps(manifest, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
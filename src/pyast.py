@@ -0,0 +1,277 @@
+import ast
+import keyword
+from lex import TokenType
+from tree import *
+from utils import getAlphaNumericVar, getNativeVar, NameTable
+from functools import partial
+
+# Python ast operator of each operator in the syntax tree.
+UNARY_OPERATORS = {
+    TokenType.PLUS: ast.UAdd,
+    TokenType.MINUS: ast.USub,
+    TokenType.NOT: ast.Not,
+}
+BINARY_OPERATORS = {
+    TokenType.PLUS: ast.Add,
+    TokenType.MINUS: ast.Sub,
+    TokenType.ASTERISK: ast.Mult,
+    TokenType.SLASH: ast.Div,
+}
+BOOLEAN_OPERATORS = {
+    TokenType.AND: ast.And,
+    TokenType.OR: ast.Or,
+}
+COMPARISON_OPERATORS = {
+    TokenType.EQEQ: ast.Eq,
+    TokenType.NOTEQ: ast.NotEq,
+    TokenType.LT: ast.Lt,
+    TokenType.LTEQ: ast.LtE,
+    TokenType.GT: ast.Gt,
+    TokenType.GTEQ: ast.GtE,
+}
+
+class AstGenerator:
+    """
+    AstGenerator walks the syntax tree built by the Parser and builds a Python ast.Module from it,
+    like CodeGenerator does Python code. The module compiles straight to a code object,
+    without writing Python code and parsing it again. Each node keeps its line and column in the source,
+    so tracebacks point to the .pyhan file.
+    """
+    def __init__(self, filename: str, source: str = "", nativeNames: bool = False, nameTable: NameTable | None = None):
+        self.filename = filename            # The source file, used in errors and tracebacks.
+        # Python name of a variable: as written in the source if Python accepts it, or else alphanumeric,
+        # from the name table of the compilation unit if there is one.
+        alphaNumericVar = nameTable.get if nameTable is not None else getAlphaNumericVar
+        self.variableName = partial(getNativeVar, alphaNumericVar=alphaNumericVar) if nativeNames else alphaNumericVar
+        self.lines = source.split('\n')     # Source lines, to turn columns into the UTF-8 offsets ast uses.
+        self.module = ast.Module(body=[], type_ignores=[])
+        self.syntaxError = None             # First SyntaxError Python would give for the generated code.
+
+        # Building method of each kind of node.
+        self.statementBuilders = {
+            Print: self.printStatement,
+            If: self.ifStatement,
+            While: self.whileStatement,
+            Assign: self.assignStatement,
+            Break: self.breakStatement,
+            Continue: self.continueStatement,
+            Pass: self.passStatement,
+            ExpressionStatement: self.expressionStatement,
+        }
+        self.expressionBuilders = {
+            Number: self.number,
+            String: self.string,
+            Boolean: self.boolean,
+            Name: self.name,
+            Group: self.group,
+            UnaryOp: self.unaryOp,
+            BinOp: self.binOp,
+            BoolOp: self.boolOp,
+            Compare: self.compare,
+            Constant: self.constant,
+        }
+
+    def statement(self, node: StatementNode) -> None:
+        """
+        Add a top-level statement to the module.
+
+        Parameters:
+        node (StatementNode): The statement.
+        """
+        self.module.body.append(self.build(node))
+
+    def block(self, statements: list) -> None:
+        """
+        Add top-level statements to the module.
+
+        Parameters:
+        statements (list): The statements.
+        """
+        for statement in statements:
+            self.statement(statement)
+
+    def code(self):
+        """
+        Return the code object of the module. Like compiling the generated Python code,
+        a SyntaxError is raised once the whole source has been parsed.
+        """
+        if self.syntaxError is not None:
+            raise self.syntaxError
+        return compile(self.module, self.filename, 'exec')
+
+    def located(self, pythonNode: ast.AST, node: Node, last: ast.AST | None = None, width: int = 0) -> ast.AST:
+        """
+        Give a Python ast node the position of a node in the source, and return it.
+        It ends where the last Python ast node in it ends or, if it has none, after the given number of characters.
+
+        Parameters:
+        pythonNode (ast.AST): The Python ast node.
+        node (Node): The node it was built from.
+        last (ast.AST | None): The last Python ast node in it.
+        width (int): The number of characters of its token, if it has no Python ast node in it.
+        """
+        pythonNode.lineno = node.line
+        pythonNode.col_offset = self.offset(node.line, node.column)
+        if last is not None:
+            pythonNode.end_lineno = last.end_lineno
+            pythonNode.end_col_offset = last.end_col_offset
+        else:
+            pythonNode.end_lineno = node.line
+            pythonNode.end_col_offset = self.offset(node.line, node.column + width)
+        return pythonNode
+
+    def offset(self, line: int, column: int) -> int:
+        """
+        Return the UTF-8 offset of a column in its line, which ast counts in bytes rather than characters.
+
+        Parameters:
+        line (int): The line, counting from 1.
+        column (int): The column, counting from 1.
+        """
+        if line > len(self.lines):
+            return column - 1
+        text = self.lines[line - 1][:column - 1]
+        return len(text) if text.isascii() else len(text.encode('utf-8'))
+
+    def invalid(self, node: Node, message: str) -> None:
+        """
+        Remember a SyntaxError Python would give for the generated code, to be raised by code() if it is the first.
+
+        Parameters:
+        node (Node): The node Python cannot compile.
+        message (str): The error message.
+        """
+        if self.syntaxError is None:
+            lineText = self.lines[node.line - 1] if node.line <= len(self.lines) else ""
+            self.syntaxError = SyntaxError(message, (self.filename, node.line, node.column, lineText))
+
+    def identifier(self, node: Node, name: str) -> str:
+        """
+        Return the Python name of a variable, like CodeGenerator writes it.
+
+        Parameters:
+        node (Node): The node the variable is in.
+        name (str): The variable as written in the source.
+        """
+        identifier = self.variableName(name)
+        if not identifier.isidentifier() or keyword.iskeyword(identifier):
+            self.invalid(node, "invalid syntax")
+            return "_"
+        return identifier
+
+    def build(self, node: StatementNode) -> ast.stmt:
+        """
+        Return the Python ast of a statement.
+
+        Parameters:
+        node (StatementNode): The statement.
+        """
+        return self.statementBuilders[type(node)](node)
+
+    def buildBlock(self, statements: list) -> list:
+        """
+        Return the Python ast of the statements in a block.
+
+        Parameters:
+        statements (list): The statements.
+        """
+        return [self.build(statement) for statement in statements]
+
+    def printStatement(self, node: Print) -> ast.stmt:
+        value = self.expression(node.value)
+        function = self.located(ast.Name(id='print', ctx=ast.Load()), node, width=2)
+        call = self.located(ast.Call(func=function, args=[value], keywords=[]), node, value)
+        return self.located(ast.Expr(value=call), node, call)
+
+    def ifStatement(self, node: If) -> ast.stmt:
+        orelse = self.buildBlock(node.orelse) if node.orelse is not None else []
+        # Each 'elif' is an 'if' in the 'else' block of the branch before it.
+        for test, body in reversed(node.branches[1:]):
+            body = self.buildBlock(body)
+            orelse = [self.located(ast.If(test=self.expression(test), body=body, orelse=orelse), test, (orelse or body)[-1])]
+        test, body = node.branches[0]
+        body = self.buildBlock(body)
+        return self.located(ast.If(test=self.expression(test), body=body, orelse=orelse), node, (orelse or body)[-1])
+
+    def whileStatement(self, node: While) -> ast.stmt:
+        body = self.buildBlock(node.body)
+        return self.located(ast.While(test=self.expression(node.test), body=body, orelse=[]), node, body[-1])
+
+    def assignStatement(self, node: Assign) -> ast.stmt:
+        target = self.located(ast.Name(id=self.identifier(node, node.name), ctx=ast.Store()), node, width=len(node.name))
+        value = self.expression(node.value)
+        return self.located(ast.Assign(targets=[target], value=value), node, value)
+
+    def breakStatement(self, node: Break) -> ast.stmt:
+        return self.located(ast.Break(), node, width=2)
+
+    def continueStatement(self, node: Continue) -> ast.stmt:
+        return self.located(ast.Continue(), node, width=2)
+
+    def passStatement(self, node: Pass) -> ast.stmt:
+        return self.located(ast.Pass(), node)
+
+    def expressionStatement(self, node: ExpressionStatement) -> ast.stmt:
+        value = self.expression(node.value)
+        return self.located(ast.Expr(value=value), node, value)
+
+    def expression(self, node: ExpressionNode) -> ast.expr:
+        """
+        Return the Python ast of an expression.
+
+        Parameters:
+        node (ExpressionNode): The expression.
+        """
+        return self.expressionBuilders[type(node)](node)
+
+    def number(self, node: Number) -> ast.expr:
+        value = node.value()
+        if value is None:
+            # The generated Python code would not compile either, so neither does the module.
+            if node.text.isascii():
+                message = "leading zeros in decimal integer literals are not permitted; use an 0o prefix for octal integers"
+            else:
+                message = "invalid character in number"
+            self.invalid(node, message)
+            value = 0
+        return self.located(ast.Constant(value=value), node, width=len(node.text))
+
+    def string(self, node: String) -> ast.expr:
+        return self.located(ast.Constant(value=node.text), node, width=len(node.text) + 2)
+
+    def boolean(self, node: Boolean) -> ast.expr:
+        return self.located(ast.Constant(value=node.value), node, width=1)
+
+    def name(self, node: Name) -> ast.expr:
+        return self.located(ast.Name(id=self.identifier(node, node.name), ctx=ast.Load()), node, width=len(node.name))
+
+    def group(self, node: Group) -> ast.expr:
+        # Parentheses only group, and the Python ast nests instead.
+        # Like in Python, the expression keeps its own position, inside the parentheses.
+        return self.expression(node.expression)
+
+    def unaryOp(self, node: UnaryOp) -> ast.expr:
+        operand = self.expression(node.operand)
+        return self.located(ast.UnaryOp(op=UNARY_OPERATORS[node.op](), operand=operand), node, operand)
+
+    def binOp(self, node: BinOp) -> ast.expr:
+        left = self.expression(node.left)
+        right = self.expression(node.right)
+        pythonNode = ast.BinOp(left=left, op=BINARY_OPERATORS[node.op](), right=right)
+        return self.located(pythonNode, node, right)
+
+    def boolOp(self, node: BoolOp) -> ast.expr:
+        values = [self.expression(value) for value in node.values]
+        return self.located(ast.BoolOp(op=BOOLEAN_OPERATORS[node.op](), values=values), node, values[-1])
+
+    def compare(self, node: Compare) -> ast.expr:
+        left = self.expression(node.left)
+        comparators = [self.expression(comparator) for comparator in node.comparators]
+        pythonNode = ast.Compare(left=left,
+                                 ops=[COMPARISON_OPERATORS[op]() for op in node.ops],
+                                 comparators=comparators)
+        return self.located(pythonNode, node, comparators[-1])
+
+    def constant(self, node: Constant) -> ast.expr:
+        # Where the folded expression ended is not known, so it ends where it starts.
+        return self.located(ast.Constant(value=node.value), node)
@@ -0,0 +1,30 @@
+import mmap
+
+def readSource(inputFile: str) -> str:
+    """
+    Read a source file by memory-mapping it and decoding it as UTF-8 in one go.
+    Newlines are translated like text-mode open() does, which only copies the text if it contains '\\r'.
+
+    Parameters:
+    inputFile (str): The path to the source file.
+    """
+    with open(inputFile, 'rb') as sourceFile:
+        try:
+            with mmap.mmap(sourceFile.fileno(), 0, access=mmap.ACCESS_READ) as sourceMap:
+                source = str(sourceMap, 'utf-8')
+        except ValueError:
+            # Empty files cannot be memory-mapped.
+            source = ""
+
+    return normalizeNewlines(source)
+
+def normalizeNewlines(source: str) -> str:
+    """
+    Translate '\\r\\n' and '\\r' newlines to '\\n', which is the only newline the lexer knows.
+
+    Parameters:
+    source (str): The source code.
+    """
+    if '\r' in source:
+        source = source.replace('\r\n', '\n').replace('\r', '\n')
+    return source
@@ -0,0 +1,180 @@
+from array import array
+import itertools
+import os
+import re
+
+# Line of a traceback that starts a frame, and a line of it that only underlines code.
+FRAME_PATTERN = re.compile(r'^(\s*File ")(.+)(", line )(\d+)(.*)$')
+UNDERLINE_PATTERN = re.compile(r'^\s*[\^~]+\s*$')
+
+class SourceMap:
+    """
+    SourceMap gives the line and column in the .pyhan source of each line of the generated Python code.
+    It is written next to the generated code, in a .map file (see mapPath), so tracebacks and profiles
+    of the code can be given in source positions.
+    """
+    def __init__(self, source: str):
+        self.source = source        # The path to the source file.
+        self.offset = 0             # Number of header lines the generated code starts with, which have no position.
+        self.lines = array('I')     # Line in the source of each line of code after the header, 0 if it has none.
+        self.columns = array('I')   # Column in the source of each line of code after the header.
+
+    def extend(self, code: str, positions = ()) -> None:
+        """
+        Add the positions of the lines of some code added to the output.
+
+        Parameters:
+        code (str): The code.
+        positions: The (line, column) in the source of each line of the code. Lines past the last position have none.
+        """
+        count = code.count('\n')
+        for line, column in positions:
+            self.lines.append(line)
+            self.columns.append(column)
+        for _ in range(count - len(positions)):
+            self.lines.append(0)
+            self.columns.append(0)
+
+    def position(self, line: int) -> tuple | None:
+        """
+        Return the (line, column) in the source of a line of the generated code, or None if it has none.
+
+        Parameters:
+        line (int): The line of the generated code, counting from 1.
+        """
+        index = line - 1 - self.offset
+        if index < 0 or index >= len(self.lines) or self.lines[index] == 0:
+            return None
+        return self.lines[index], self.columns[index]
+
+    def save(self, path: str) -> None:
+        """
+        Write the source map to a file, with the source relative to it.
+        Each line is written as the difference from the line before, which is mostly 0 or 1, to keep the file small.
+
+        Parameters:
+        path (str): The path to the file.
+        """
+        import json
+        from emit import writeAtomically
+
+        source = os.path.relpath(os.path.abspath(self.source), os.path.dirname(os.path.abspath(path)))
+        lines = [line - previous for previous, line in zip(itertools.chain((0,), self.lines), self.lines)]
+        data = {'version': 1, 'source': source, 'offset': self.offset, 'lines': lines, 'columns': self.columns.tolist()}
+        writeAtomically(path, json.dumps(data, separators=(',', ':')).encode('utf-8'))
+
+    @staticmethod
+    def load(path: str) -> 'SourceMap':
+        """
+        Read a source map written by save().
+
+        Parameters:
+        path (str): The path to the file.
+        """
+        import json
+
+        with open(path, 'r', encoding='utf-8') as mapFile:
+            data = json.load(mapFile)
+        sourceMap = SourceMap(os.path.join(os.path.dirname(os.path.abspath(path)), data['source']))
+        sourceMap.offset = data['offset']
+        sourceMap.lines = array('I', itertools.accumulate(data['lines']))
+        sourceMap.columns = array('I', data['columns'])
+        return sourceMap
+
+
+def mapPath(pythonPath: str) -> str:
+    """
+    Return the path of the source map of a generated Python file.
+
+    Parameters:
+    pythonPath (str): The path to the Python file.
+    """
+    return pythonPath + '.map'
+
+def findSourceMap(pythonPath: str, sourceMaps: dict) -> SourceMap | None:
+    """
+    Return the source map of a generated Python file, or None if it has none.
+    Source maps already read are kept in a dict, so each is read once.
+
+    Parameters:
+    pythonPath (str): The path to the Python file.
+    sourceMaps (dict): Source map, or None, of each Python file looked up so far.
+    """
+    if pythonPath not in sourceMaps:
+        try:
+            sourceMaps[pythonPath] = SourceMap.load(mapPath(pythonPath))
+        except (OSError, ValueError, KeyError):
+            sourceMaps[pythonPath] = None
+    return sourceMaps[pythonPath]
+
+def sourceLine(path: str, line: int) -> str | None:
+    """
+    Return a line of a source file, without its indentation, or None if it cannot be read.
+
+    Parameters:
+    path (str): The path to the source file.
+    line (int): The line, counting from 1.
+    """
+    import linecache
+    text = linecache.getline(path, line)
+    return text.strip() if text else None
+
+def rewriteTraceback(text: str, sourceMaps: dict | None = None) -> str:
+    """
+    Return a traceback with each frame in a generated Python file that has a source map given
+    at its line in the .pyhan source, with the code of that line. The marks under the code are left out,
+    as they are at columns of the Python code.
+
+    Parameters:
+    text (str): The traceback, as Python prints it.
+    sourceMaps (dict | None): Source maps already read, by the path of their Python file.
+    """
+    sourceMaps = {} if sourceMaps is None else sourceMaps
+    lines = []
+    inMappedFrame = False
+    for text in text.splitlines(keepends=True):
+        frame = FRAME_PATTERN.match(text.rstrip('\n'))
+        if frame is not None:
+            start, pythonPath, lineLabel, line, rest = frame.groups()
+            sourceMap = findSourceMap(pythonPath, sourceMaps)
+            position = sourceMap.position(int(line)) if sourceMap is not None else None
+            inMappedFrame = position is not None
+            if inMappedFrame:
+                lines.append(f"{start}{sourceMap.source}{lineLabel}{position[0]}{rest}\n")
+                code = sourceLine(sourceMap.source, position[0])
+                if code is not None:
+                    lines.append(f"    {code}\n")
+                continue
+        elif inMappedFrame and (text.startswith("    ") or UNDERLINE_PATTERN.match(text)):
+            continue    # The code of the Python file, and the marks under it.
+        else:
+            inMappedFrame = False
+        lines.append(text)
+    return "".join(lines)
+
+def rewriteStats(stats, sourceMaps: dict | None = None):
+    """
+    Change a pstats.Stats in place so functions in generated Python files that have a source map
+    are given at their line in the .pyhan source, and return it.
+
+    Parameters:
+    stats (pstats.Stats): The profile.
+    sourceMaps (dict | None): Source maps already read, by the path of their Python file.
+    """
+    sourceMaps = {} if sourceMaps is None else sourceMaps
+
+    def mapped(function: tuple) -> tuple:
+        path, line, name = function
+        sourceMap = findSourceMap(path, sourceMaps)
+        position = sourceMap.position(line) if sourceMap is not None else None
+        if position is None:
+            return function
+        return (sourceMap.source, position[0], name)
+
+    rewritten = {}
+    for function, (calls, primitiveCalls, totalTime, cumulativeTime, callers) in stats.stats.items():
+        callers = {mapped(caller): value for caller, value in callers.items()}
+        rewritten[mapped(function)] = (calls, primitiveCalls, totalTime, cumulativeTime, callers)
+    stats.stats = rewritten
+    stats.fcn_list = None   # The sorted list of functions is made again from the new keys.
+    return stats
@@ -0,0 +1,73 @@
+from collections import deque
+import sys
+
+# Number of events a Tracer keeps by default.
+TRACE_SIZE = 1024
+
+class Tracer:
+    """
+    Tracer records the productions the Parser enters and exits, with the token it is at each time,
+    in a ring buffer that keeps only the latest events. It can be dumped when compiling stops at an error,
+    to see how the parser got there.
+    Tracing costs nothing when it is off: the Parser only has its production methods wrapped
+    when it is given a Tracer.
+    """
+    def __init__(self, size: int = TRACE_SIZE):
+        self.events = deque(maxlen=size)    # (depth, entering, production, token) of the latest events, oldest first.
+        self.depth = 0                      # Number of productions the parser is in.
+
+    def trace(self, parser, productions: tuple) -> None:
+        """
+        Wrap production methods of a parser so each call is recorded.
+
+        Parameters:
+        parser (Parser): The parser.
+        productions (tuple): The names of the methods to trace.
+        """
+        for production in productions:
+            setattr(parser, production, self.traced(parser, production, getattr(parser, production)))
+
+    def traced(self, parser, production: str, method):
+        """
+        Return a method that records entering and exiting it, with the parser's current token.
+
+        Parameters:
+        parser (Parser): The parser the method belongs to.
+        production (str): The name of the production.
+        method: The bound method.
+        """
+        events = self.events
+
+        def tracedMethod(*args):
+            events.append((self.depth, True, production, parser.curToken))
+            self.depth += 1
+            try:
+                result = method(*args)
+            finally:
+                self.depth -= 1
+            # A production left by an error has no exit event, so a dump ends where the error was found.
+            events.append((self.depth, False, production, parser.curToken))
+            return result
+        return tracedMethod
+
+    def lines(self) -> list:
+        """
+        Return the recorded events as lines of text, indented by how deep the parser was.
+        """
+        lines = []
+        for depth, entering, production, token in self.events:
+            action = "enter" if entering else "exit "
+            lines.append(f"{'  ' * depth}{action} {production} at line {token.line}, column {token.column}: {token.text!r}")
+        return lines
+
+    def dump(self, file = None) -> None:
+        """
+        Write the recorded events, by default to stderr.
+
+        Parameters:
+        file: The text file to write to.
+        """
+        file = file if file is not None else sys.stderr
+        file.write(f"Last {len(self.events)} parser events:\n")
+        for line in self.lines():
+            file.write(line + "\n")
@@ -0,0 +1,243 @@
+from lex import TokenType
+
+class Node:
+    """
+    Node is a node of the syntax tree built by the Parser.
+    It records where it starts in the source, counting lines and columns from 1.
+    """
+    __slots__ = ('line', 'column')
+
+    def __init__(self, line: int = 0, column: int = 0):
+        self.line = line        # Line of the first token of the node.
+        self.column = column    # Column of the first token of the node.
+
+
+# Statements.
+
+class StatementNode(Node):
+    """
+    StatementNode is a statement, indented by the number of spaces it has in the source.
+    """
+    __slots__ = ('indentation',)
+
+    def __init__(self, indentation: int, line: int = 0, column: int = 0):
+        super().__init__(line, column)
+        self.indentation = indentation
+
+
+class Print(StatementNode):
+    """
+    “印出”（ expression ）
+    """
+    __slots__ = ('value',)
+
+    def __init__(self, value: 'ExpressionNode', indentation: int, line: int = 0, column: int = 0):
+        super().__init__(indentation, line, column)
+        self.value = value
+
+
+class If(StatementNode):
+    """
+    “如果” expression：{statement} {“或则” expression：{statement}} [“否则”：{statement}]
+    """
+    __slots__ = ('branches', 'orelse')
+
+    def __init__(self, branches: list, orelse: list | None, indentation: int, line: int = 0, column: int = 0):
+        super().__init__(indentation, line, column)
+        self.branches = branches    # (test, body) of the 'if' and each 'elif', in order.
+        self.orelse = orelse        # Body of the 'else' block, or None if there is none.
+
+
+class While(StatementNode):
+    """
+    “当” expression：{statement}
+    """
+    __slots__ = ('test', 'body')
+
+    def __init__(self, test: 'ExpressionNode', body: list, indentation: int, line: int = 0, column: int = 0):
+        super().__init__(indentation, line, column)
+        self.test = test
+        self.body = body
+
+
+class Assign(StatementNode):
+    """
+    ident "=" expression
+    """
+    __slots__ = ('name', 'value')
+
+    def __init__(self, name: str, value: 'ExpressionNode', indentation: int, line: int = 0, column: int = 0):
+        super().__init__(indentation, line, column)
+        self.name = name    # The variable as written in the source.
+        self.value = value
+
+
+class Break(StatementNode):
+    """
+    “中断”
+    """
+    __slots__ = ()
+
+
+class Continue(StatementNode):
+    """
+    “继续”
+    """
+    __slots__ = ()
+
+
+class Pass(StatementNode):
+    """
+    A statement that does nothing, put by the Optimizer in a block it emptied.
+    """
+    __slots__ = ()
+
+
+class ExpressionStatement(StatementNode):
+    """
+    expression
+    """
+    __slots__ = ('value',)
+
+    def __init__(self, value: 'ExpressionNode', indentation: int, line: int = 0, column: int = 0):
+        super().__init__(indentation, line, column)
+        self.value = value
+
+
+# Expressions.
+
+class ExpressionNode(Node):
+    """
+    ExpressionNode is an expression. Operators nest the way Python reads the generated code.
+    """
+    __slots__ = ()
+
+
+class Number(ExpressionNode):
+    """
+    number
+    """
+    __slots__ = ('text',)
+
+    def __init__(self, text: str, line: int = 0, column: int = 0):
+        super().__init__(line, column)
+        self.text = text    # The number as written in the source.
+
+    def value(self) -> int | float | None:
+        """
+        Return the number as a Python int or float, or None if Python cannot read it,
+        like 007 or a number with digits other than 0-9.
+        """
+        text = self.text
+        if not text.isascii():
+            return None
+        if '.' in text:
+            return float(text)
+        if text[0] == '0' and text.strip('0'):
+            return None     # Leading zeros in a decimal integer are a Python syntax error.
+        return int(text)
+
+
+class String(ExpressionNode):
+    """
+    string
+    """
+    __slots__ = ('text',)
+
+    def __init__(self, text: str, line: int = 0, column: int = 0):
+        super().__init__(line, column)
+        self.text = text    # The text between the quotes.
+
+
+class Boolean(ExpressionNode):
+    """
+    “真” | “假”
+    """
+    __slots__ = ('value',)
+
+    def __init__(self, value: bool, line: int = 0, column: int = 0):
+        super().__init__(line, column)
+        self.value = value
+
+
+class Name(ExpressionNode):
+    """
+    ident
+    """
+    __slots__ = ('name',)
+
+    def __init__(self, name: str, line: int = 0, column: int = 0):
+        super().__init__(line, column)
+        self.name = name    # The variable as written in the source.
+
+
+class Group(ExpressionNode):
+    """
+    "(" expression ")"
+    """
+    __slots__ = ('expression',)
+
+    def __init__(self, expression: ExpressionNode, line: int = 0, column: int = 0):
+        super().__init__(line, column)
+        self.expression = expression
+
+
+class UnaryOp(ExpressionNode):
+    """
+    ("+" | "-" | "非") operand
+    """
+    __slots__ = ('op', 'operand')
+
+    def __init__(self, op: TokenType, operand: ExpressionNode, line: int = 0, column: int = 0):
+        super().__init__(line, column)
+        self.op = op
+        self.operand = operand
+
+
+class BinOp(ExpressionNode):
+    """
+    left ("+" | "-" | "*" | "/") right
+    """
+    __slots__ = ('left', 'op', 'right')
+
+    def __init__(self, left: ExpressionNode, op: TokenType, right: ExpressionNode, line: int = 0, column: int = 0):
+        super().__init__(line, column)
+        self.left = left
+        self.op = op
+        self.right = right
+
+
+class BoolOp(ExpressionNode):
+    """
+    value ("与" value)+ or value ("或" value)+
+    """
+    __slots__ = ('op', 'values')
+
+    def __init__(self, op: TokenType, values: list, line: int = 0, column: int = 0):
+        super().__init__(line, column)
+        self.op = op
+        self.values = values
+
+
+class Compare(ExpressionNode):
+    """
+    left (("==" | "!=" | ">" | ">=" | "<" | "<=") comparator)+, chained like in Python.
+    """
+    __slots__ = ('left', 'ops', 'comparators')
+
+    def __init__(self, left: ExpressionNode, ops: list, comparators: list, line: int = 0, column: int = 0):
+        super().__init__(line, column)
+        self.left = left
+        self.ops = ops
+        self.comparators = comparators
+
+
+class Constant(ExpressionNode):
+    """
+    A value worked out at compile time by the Optimizer: an int, float, str or bool.
+    """
+    __slots__ = ('value',)
+
+    def __init__(self, value, line: int = 0, column: int = 0):
+        super().__init__(line, column)
+        self.value = value
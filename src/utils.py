@@ -1,18 +1,195 @@
-
-from pypinyin import pinyin, Style
 from lex import Lexer
-import hashlib
+from collections import OrderedDict
+import importlib.util
+import os
+import unicodedata
+
+# Most variable names MangledNames keeps. Past this, the least recently used name is dropped.
+MANGLED_NAMES_SIZE = 4096
+
+class MangledNames:
+    """
+    MangledNames is a bounded cache of the names getAlphaNumericVar gives variables, so each variable
+    is converted to Pinyin and hashed once, however often it appears. When it is full, the least recently used name is dropped.
+    It can be saved to a file and loaded again, so later compiles skip Pinyin conversion for the names they have seen.
+    """
+    def __init__(self, size: int = MANGLED_NAMES_SIZE):
+        self.size = size
+        self.names = OrderedDict()  # Mangled name of each variable, least recently used first.
+        self.hits = 0               # Lookups that found the variable.
+        self.misses = 0             # Lookups that did not.
+
+    def get(self, var: str) -> str | None:
+        """
+        Return the mangled name of a variable, or None if it is not cached.
+
+        Parameters:
+        var (str): The variable name.
+        """
+        name = self.names.get(var)
+        if name is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.names.move_to_end(var)
+        return name
+
+    def put(self, var: str, name: str) -> None:
+        """
+        Cache the mangled name of a variable, dropping the least recently used name if the cache is full.
+
+        Parameters:
+        var (str): The variable name.
+        name (str): Its mangled name.
+        """
+        self.names[var] = name
+        self.names.move_to_end(var)
+        if len(self.names) > self.size:
+            self.names.popitem(last=False)
+
+    def stats(self) -> dict:
+        """
+        Return the number of hits, misses and cached names, and the most names kept.
+        """
+        return {'hits': self.hits, 'misses': self.misses, 'names': len(self.names), 'size': self.size}
+
+    def clear(self) -> None:
+        """
+        Drop every cached name and reset the statistics.
+        """
+        self.names.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def load(self, path: str) -> None:
+        """
+        Cache the names saved in a file by save(). A missing or unreadable file, or one saved
+        with another installation of pypinyin, which may give other Pinyin, is left out.
+
+        Parameters:
+        path (str): The path to the file.
+        """
+        import json
+
+        try:
+            with open(path, 'r', encoding='utf-8') as namesFile:
+                saved = json.load(namesFile)
+        except (OSError, ValueError):
+            return
+        if not isinstance(saved, dict) or saved.get('pypinyin') != pinyinInstallation() or not isinstance(saved.get('names'), dict):
+            return
+        for var, name in saved['names'].items():
+            self.put(var, name)
+
+    def save(self, path: str) -> None:
+        """
+        Write the cached names to a file, for load() to read. The file is replaced all at once,
+        so a compile reading it at the same time sees either the old names or the new ones.
+
+        Parameters:
+        path (str): The path to the file.
+        """
+        import json
+
+        temporaryPath = f"{path}.{os.getpid()}.tmp"
+        with open(temporaryPath, 'w', encoding='utf-8') as namesFile:
+            json.dump({'pypinyin': pinyinInstallation(), 'names': self.names}, namesFile, ensure_ascii=False)
+        os.replace(temporaryPath, path)
+
+
+# Names given by getAlphaNumericVar in this process.
+mangledNames = MangledNames()
+
+def pinyinInstallation() -> str:
+    """
+    Return the path and modification time of the installed pypinyin package, which tell its installations apart
+    without importing it.
+    """
+    origin = importlib.util.find_spec('pypinyin').origin
+    return f"{origin}@{os.stat(origin).st_mtime_ns}"
+
+class NameTable:
+    """
+    NameTable keeps the Python name given to each variable of one compilation unit.
+    Short names are the Pinyin and the fewest digits of the hash that no other variable of the unit has,
+    instead of the whole hash, so the same source always gets the same names. They cannot be the name of
+    a variable in the source either: identifiers have no '_' (see Lexer), and every mangled name has one.
+    """
+    def __init__(self, short: bool = True):
+        self.short = short
+        self.names = {}     # Python name of each variable, in the order they were first named.
+        self.taken = set()  # Python names given so far.
+
+    def get(self, var: str) -> str:
+        """
+        Return the Python name of a variable, naming it if it has not been named yet.
+
+        Parameters:
+        var (str): The variable name.
+        """
+        name = self.names.get(var)
+        if name is not None:
+            return name
+
+        name = getAlphaNumericVar(var)
+        if self.short and name != var:
+            pinyinWord, unique_hash = name.rsplit('_', 1)
+            for length in range(1, len(unique_hash) + 1):
+                name = f"{pinyinWord}_{unique_hash[:length]}"
+                if name not in self.taken:
+                    break
+        self.names[var] = name
+        self.taken.add(name)
+        return name
+
+    def mangled(self) -> dict:
+        """
+        Return the Python name of each variable named so far that is not written as it is in the source.
+        """
+        return {var: name for var, name in self.names.items() if name != var}
 
-def getAlphaNumericVar(var: str) -> None:
+def getAlphaNumericVar(var: str) -> str:
     """
     Return a variable name that is alphanumeric.
-    
+
+    Parameters:
+    var (str): The variable name to convert.
+    """
+    variable_name = mangledNames.get(var)
+    if variable_name is None:
+        variable_name = mangle(var)
+        mangledNames.put(var, variable_name)
+    return variable_name
+
+def getNativeVar(var: str, alphaNumericVar = getAlphaNumericVar) -> str:
+    """
+    Return the variable name as it is if Python accepts it, or the alphanumeric name if not.
+    Python reads identifiers in NFKC form, so a name not in that form, like one with a CJK compatibility
+    ideograph, could be read as another variable and is converted as well.
+
+    Parameters:
+    var (str): The variable name to convert.
+    alphaNumericVar: The function giving the alphanumeric name, like NameTable.get.
+    """
+    if var.isidentifier() and unicodedata.is_normalized('NFKC', var):
+        return var
+    return alphaNumericVar(var)
+
+def mangle(var: str) -> str:
+    """
+    Return a variable name that is alphanumeric, without looking it up in mangledNames.
+
     Parameters:
     var (str): The variable name to convert.
     """
     if not Lexer.ischinese(var):
         return var
-    
+
+    # Loading pypinyin takes longer than compiling a small source, so it is only imported
+    # once a variable needs converting.
+    from pypinyin import pinyin, Style
+    import hashlib
+
     # Convert to Pinyin (with tone marks)
     pinyin_word = ''.join([item[0] for item in pinyin(var, style=Style.NORMAL)])
 
@@ -4,6 +4,7 @@ import sys
 # appending the directory of mock_compiler.py in the sys.path list
 sys.path.append(f"{os.path.dirname(__file__)}/../src")   
 from mocks import mock_compiler
+import compiler
 
 import pytest
 
@@ -20,6 +21,48 @@ yang_49a1fcbe2bc4c581f3726bbddea023f53ba4023239e28e3ec7328bd59a79893b=yang_65e20
 
     assert actual == expected
 
+def test_assignNativeNames():
+    input = """\
+阳 = -5
+洋 = 阳\
+"""
+    actual = mock_compiler.compile(input, nativeNames=True)
+    expected = """\
+阳=-5
+洋=阳
+"""
+
+    assert actual == expected
+
+def test_assignShortNames():
+    input = """\
+阳 = -5
+洋 = 阳\
+"""
+    actual = mock_compiler.compile(input, shortNames=True)
+    expected = """\
+yang_6=-5
+yang_4=yang_6
+"""
+
+    assert actual == expected
+
+@pytest.mark.parametrize("shortNames, expected", [
+    (True, "# yang_6 = 阳\nx=1\nyang_6=x\n"),
+    (False, "# yang_65e20c27a154dfe12117f65b731513990bddf795faeb56db0a733734373aef17 = 阳\n"
+            "x=1\nyang_65e20c27a154dfe12117f65b731513990bddf795faeb56db0a733734373aef17=x\n"),
+])
+def test_nameHeader(tmp_path, shortNames, expected):
+    inputPath = tmp_path / "input.pyhan"
+    outputPath = tmp_path / "output.py"
+    inputPath.write_text("x = 1\n阳 = x\n", encoding='utf-8')
+
+    compiler.compile(str(inputPath), str(outputPath), shortNames=shortNames, nameHeader=True)
+    assert outputPath.read_text(encoding='utf-8') == expected
+
+    with pytest.raises(SystemExit):
+        compiler.compile(str(inputPath), str(outputPath), stream=True, nameHeader=True)
+
 def test_varNotDeclaredError():
     input = """\
 洋 = 洋 + 1\
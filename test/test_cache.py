@@ -0,0 +1,103 @@
+import os
+import sys
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+
+# appending the directory of cache.py in the sys.path list
+sys.path.append(f"{os.path.dirname(__file__)}/../src")
+from cache import CompileCache
+import compiler
+
+import pytest
+
+SOURCE = "数目 = 1\n当 数目 < 3:\n    印出(数目)\n    数目 = 数目 + 1\n"
+
+@pytest.fixture
+def cache(tmp_path):
+    return CompileCache(str(tmp_path / "cache"))
+
+@pytest.fixture
+def inputPath(tmp_path):
+    path = tmp_path / "input.pyhan"
+    path.write_text(SOURCE, encoding='utf-8')
+    return str(path)
+
+def entries(cache: CompileCache) -> list:
+    return sorted(name for name in os.listdir(cache.directory) if name != CompileCache.LOCK_FILE)
+
+def test_compileReadsCachedOutput(tmp_path, cache, inputPath):
+    outputPath = str(tmp_path / "output.py")
+    compiler.compile(inputPath, outputPath, cache=cache)
+    with open(outputPath, 'r', encoding='utf-8') as outputFile:
+        output = outputFile.read()
+    [key] = entries(cache)
+    assert cache.get(key) == output.encode('utf-8')
+
+    # The output is read from the cache, not compiled again.
+    cache.put(key, b"# cached\n")
+    compiler.compile(inputPath, outputPath, cache=cache)
+    with open(outputPath, 'r', encoding='utf-8') as outputFile:
+        assert outputFile.read() == "# cached\n"
+
+    # A stream compile gives the same output, so it is kept under the same key.
+    compiler.compile(inputPath, str(tmp_path / "stream.py"), stream=True, cache=cache)
+    assert entries(cache) == [key]
+
+def test_keyChangesWithSourceAndOptions(tmp_path, cache, inputPath):
+    outputPath = str(tmp_path / "output.py")
+    compiler.compile(inputPath, outputPath, cache=cache)
+    compiler.compile(inputPath, outputPath, nativeNames=True, cache=cache)
+    compiler.compile(inputPath, outputPath, trace=True, iterative=True, cache=cache)
+    assert len(entries(cache)) == 2
+
+    with open(inputPath, 'a', encoding='utf-8') as sourceFile:
+        sourceFile.write("印出(数目)\n")
+    compiler.compile(inputPath, outputPath, cache=cache)
+    assert len(entries(cache)) == 3
+
+def test_sourceMapIsNotCached(tmp_path, cache, inputPath):
+    compiler.compile(inputPath, str(tmp_path / "output.py"), sourceMap=True, cache=cache)
+    assert not os.path.exists(cache.directory)
+
+def test_cachedCodeHasItsSourceFile(tmp_path, cache, inputPath, capsys):
+    compiler.run(inputPath, cache=cache)
+    movedPath = str(tmp_path / "moved.pyhan")
+    shutil.copy(inputPath, movedPath)
+
+    code = compiler.compileToCode(movedPath, cache=cache)
+    assert len(entries(cache)) == 1
+    assert code.co_filename == movedPath
+    exec(code, {})
+    assert capsys.readouterr().out == "1\n2\n1\n2\n"
+
+def test_leastRecentlyUsedIsEvicted(cache):
+    cache.maxSize = 8
+    for index, key in enumerate(["a", "b", "c"]):
+        cache.put(key, b"1234")
+        os.utime(cache.path(key), ns=(index, index))
+    assert entries(cache) == ["b", "c"]
+
+    # Reading an entry makes it the most recently used.
+    assert cache.get("b") == b"1234"
+    cache.put("d", b"1234")
+    assert entries(cache) == ["b", "d"]
+
+def test_unwritableCacheIsSkipped(tmp_path, inputPath):
+    (tmp_path / "file").write_text("")
+    cache = CompileCache(str(tmp_path / "file" / "cache"))
+    outputPath = str(tmp_path / "output.py")
+    compiler.compile(inputPath, outputPath, cache=cache)
+    assert os.path.exists(outputPath)
+
+def putEntries(directory: str, worker: int) -> None:
+    cache = CompileCache(directory, maxSize=4096)
+    for index in range(50):
+        cache.put(f"{worker}-{index}", bytes(256))
+        cache.get(f"{worker}-{index // 2}")
+
+def test_processesShareTheCache(cache):
+    with ProcessPoolExecutor(4) as executor:
+        list(executor.map(putEntries, [cache.directory] * 4, range(4)))
+
+    assert not [name for name in os.listdir(cache.directory) if name.endswith('.tmp')]
+    assert sum(os.path.getsize(cache.path(key)) for key in entries(cache)) <= 4096
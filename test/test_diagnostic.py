@@ -0,0 +1,102 @@
+import os
+import sys
+
+# appending the directory of diagnostic.py in the sys.path list
+sys.path.append(f"{os.path.dirname(__file__)}/../src")
+from lex import Lexer, TokenType
+from emit import Emitter
+from parse import Parser
+import compiler
+
+import pytest
+
+SOURCE = """\
+x = 1
+印出(x +)
+如果 x y:
+    印出(x)
+    印出(未知)
+否则:
+    x = 2 !
+当 x < 3:
+    印出(x
+        印出(x)
+  x = 3
+如果 x:
+印出(x)
+"""
+
+EXPECTED = [
+    ("Error. Unexpected token at )", 2, 7, ")"),
+    ("Error. Expected COLON, got IDENT", 3, 6, "y"),
+    ("Error. Referencing variable before assignment: 未知", 5, 8, "未知"),
+    ("Lexing error. Expected !=, got !\n", 7, 11, "!"),
+    # The line indented after the error belongs to its statement.
+    ("Error. Expected CLOSE_BRACKET, got NEWLINE", 9, 9, "\n"),
+    ("Error. Unexpected indentation at  ", 11, 1, " "),
+    ("Error. IndentationError: expected an indented block", 13, 1, "印出"),
+]
+
+def parse(source, iterative=False):
+    """
+    Return the generated code and the errors recorded in error-recovering mode.
+    """
+    diagnostics = []
+    emitter = Emitter("")
+    Parser(Lexer(source, diagnostics=diagnostics), emitter, iterative=iterative, diagnostics=diagnostics).program()
+    return emitter.code, diagnostics
+
+@pytest.mark.parametrize("iterative", [False, True])
+def test_everyErrorInOnePass(iterative):
+    _, diagnostics = parse(SOURCE, iterative)
+    assert [(d.message, d.line, d.column, d.token) for d in diagnostics] == EXPECTED
+
+@pytest.mark.parametrize("engine", [Lexer.REGEX_ENGINE, Lexer.CHAR_ENGINE])
+def test_lexerSkipsLineAfterError(engine):
+    diagnostics = []
+    lexer = Lexer("x = \"a\tb\" + 1\ny\n", engine, diagnostics)
+    kinds = [lexer.getToken().kind for _ in range(6)]
+    assert kinds == [TokenType.IDENT, TokenType.EQ, TokenType.NEWLINE, TokenType.IDENT, TokenType.NEWLINE, TokenType.EOF]
+    assert [str(d) for d in diagnostics] == ["Lexing error. Illegal character in string. (line 1, column 7)"]
+
+@pytest.mark.parametrize("iterative", [False, True])
+@pytest.mark.parametrize("source, expected", [
+    ("* 与\n", [("Error. SyntaxError: invalid syntax", 1, 1)]),
+    ("如果 真:\n    * 与\n", [("Error. SyntaxError: invalid syntax", 2, 5)]),
+    ("当 真:\n    + 或\n", [("Error. SyntaxError: invalid syntax", 2, 5)]),
+    ("x = 1\n  * 与\n", [("Error. Unexpected indentation at  ", 2, 1)]),
+    ("\n* 与\n+ 或\n印出(1)\n", [("Error. SyntaxError: invalid syntax", 2, 1), ("Error. SyntaxError: invalid syntax", 3, 1)]),
+    # The line indented under the statement with the error is still checked.
+    ("当 真:\n    - 与\n        印出(\n    印出(2 +)\n", [("Error. SyntaxError: invalid syntax", 2, 5),
+        ("Error. Unexpected token at \n", 3, 12), ("Error. Unexpected token at )", 4, 11)]),
+])
+def test_operatorBeforeLogicalOperatorIsRecovered(source, expected, iterative):
+    _, diagnostics = parse(source, iterative)
+    assert [(d.message, d.line, d.column) for d in diagnostics] == expected
+
+def test_firstErrorIsTheDefaultOne():
+    with pytest.raises(SystemExit) as error:
+        Parser(Lexer(SOURCE), Emitter("")).program()
+    assert str(error.value.code) == parse(SOURCE)[1][0].message
+
+def test_noErrors():
+    source = "x = 1\n如果 x:\n    印出(x)\n"
+    assert parse(source) == ("x=1\nif x:\n    print(x)\n", [])
+
+def test_noCodeAfterFirstError():
+    code, diagnostics = parse("x = 1\ny = (\n印出(x)\n")
+    assert code == "x=1\n"
+    assert len(diagnostics) == 1
+
+def test_compileReportsEveryError(tmp_path):
+    inputPath = tmp_path / "input.pyhan"
+    outputPath = tmp_path / "output.py"
+    inputPath.write_text(SOURCE, encoding='utf-8')
+
+    diagnostics = compiler.check(str(inputPath))
+    assert [(d.message, d.line, d.column, d.token) for d in diagnostics] == EXPECTED
+
+    with pytest.raises(SystemExit) as error:
+        compiler.compile(str(inputPath), str(outputPath), recover=True)
+    assert str(error.value.code) == "\n".join(str(d) for d in diagnostics)
+    assert not outputPath.exists()
@@ -0,0 +1,115 @@
+import os
+import sys
+import io
+import stat
+
+# appending the directory of emit.py in the sys.path list
+sys.path.append(f"{os.path.dirname(__file__)}/../src")
+from emit import Emitter
+import compiler
+
+import pytest
+
+def test_getvalue():
+    emitter = Emitter(None)
+    emitter.emitLine("x=1")
+    emitter.emit("print(x)\n")
+    emitter.headerLine("# header")
+
+    assert emitter.code == "x=1\nprint(x)\n"
+    assert emitter.getvalue() == "# header\nx=1\nprint(x)\n"
+
+def test_writeFile(tmp_path):
+    outputPath = tmp_path / "output.py"
+    emitter = Emitter(str(outputPath))
+    emitter.emitLine("x=1")
+    emitter.flush()
+    emitter.headerLine("# header")
+    emitter.writeFile()
+
+    assert outputPath.read_text() == "# header\nx=1\n"
+
+def test_writeThrough():
+    outputFile = io.StringIO()
+    emitter = Emitter(None, outputFile, bufferSize=8)
+    emitter.headerLine("# header")
+    emitter.emitLine("x=1")
+    emitter.flush()
+
+    # Less than the buffer size is kept.
+    assert outputFile.getvalue() == ""
+
+    emitter.emitLine("y=2")
+    emitter.flush()
+    assert outputFile.getvalue() == "# header\nx=1\ny=2\n"
+    assert emitter.getvalue() == ""
+
+    emitter.emitLine("z=3")
+    emitter.writeFile()
+    assert outputFile.getvalue() == "# header\nx=1\ny=2\nz=3\n"
+    assert not outputFile.closed
+
+def test_writeOnlyIfChanged(tmp_path):
+    outputPath = tmp_path / "output.py"
+    outputPath.write_text("x=1\n")
+    os.utime(outputPath, ns=(0, 0))
+
+    emitter = Emitter(str(outputPath))
+    emitter.emitLine("x=1")
+    emitter.writeFile()
+    assert outputPath.stat().st_mtime_ns == 0
+
+    emitter.emitLine("y=2")
+    emitter.writeFile()
+    assert outputPath.read_text() == "x=1\ny=2\n"
+    assert os.listdir(tmp_path) == ["output.py"]
+
+@pytest.mark.parametrize("source, changed", [("x = 1\n", False), ("x = 2\n", True)])
+def test_streamWriteOnlyIfChanged(tmp_path, source, changed):
+    inputPath = tmp_path / "input.pyhan"
+    outputPath = tmp_path / "output.py"
+    inputPath.write_text(source, encoding='utf-8')
+    outputPath.write_text("x=1\n")
+    os.utime(outputPath, ns=(0, 0))
+
+    compiler.compile(str(inputPath), str(outputPath), stream=True)
+    assert (outputPath.stat().st_mtime_ns != 0) == changed
+    assert outputPath.read_text() == source.replace(" ", "")
+    assert sorted(os.listdir(tmp_path)) == ["input.pyhan", "output.py"]
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_rewriteKeepsMode(tmp_path, stream):
+    inputPath = tmp_path / "input.pyhan"
+    outputPath = tmp_path / "output.py"
+    inputPath.write_text("x = 2\n", encoding='utf-8')
+    outputPath.write_text("x=1\n")
+    os.chmod(outputPath, 0o750)
+
+    compiler.compile(str(inputPath), str(outputPath), stream=stream)
+    assert outputPath.read_text() == "x=2\n"
+    assert stat.S_IMODE(outputPath.stat().st_mode) == 0o750
+
+def test_failedReplaceRemovesTemporaryFile(tmp_path, monkeypatch):
+    inputPath = tmp_path / "input.pyhan"
+    outputPath = tmp_path / "output.py"
+    inputPath.write_text("x = 2\n", encoding='utf-8')
+    outputPath.write_text("x=1\n")
+
+    def failingReplace(source, destination):
+        raise PermissionError(destination)
+    monkeypatch.setattr(os, 'replace', failingReplace)
+    with pytest.raises(PermissionError):
+        compiler.compile(str(inputPath), str(outputPath), stream=True)
+    assert outputPath.read_text() == "x=1\n"
+    assert sorted(os.listdir(tmp_path)) == ["input.pyhan", "output.py"]
+
+def test_streamErrorKeepsOutput(tmp_path):
+    inputPath = tmp_path / "input.pyhan"
+    outputPath = tmp_path / "output.py"
+    inputPath.write_text("x = 1\n" * 10000 + "印出(y)\n", encoding='utf-8')
+    outputPath.write_text("x=1\n")
+
+    with pytest.raises(SystemExit):
+        compiler.compile(str(inputPath), str(outputPath), stream=True)
+    assert outputPath.read_text() == "x=1\n"
+    assert sorted(os.listdir(tmp_path)) == ["input.pyhan", "output.py"]
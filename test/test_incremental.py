@@ -0,0 +1,115 @@
+import os
+import sys
+
+# appending the directory of incremental.py in the sys.path list
+sys.path.append(f"{os.path.dirname(__file__)}/../src")
+from mocks import mock_compiler
+from incremental import IncrementalCompiler
+
+import pytest
+
+SOURCE = """\
+数目 = 1
+
+# 累加
+当 数目 < 5:
+    如果 数目 == 2:
+        印出(数目)
+    数目 = 数目 + 1
+印出(数目)
+名字 = "世界"
+印出(名字)
+"""
+
+def compileAll(source):
+    """
+    Return the output of compiling the whole source, or its error message.
+    """
+    try:
+        return mock_compiler.compile(source)
+    except SystemExit as error:
+        return str(error.code)
+
+def compileIncrementally(compile):
+    """
+    Return the output of an IncrementalCompiler method, or its error message.
+    """
+    try:
+        return compile()
+    except SystemExit as error:
+        return str(error.code)
+
+def test_compile():
+    assert IncrementalCompiler(SOURCE).compile() == mock_compiler.compile(SOURCE)
+
+@pytest.mark.parametrize("edit, source", [
+    # Change a number inside the loop.
+    ((4, 8, 4, 9, "10"), SOURCE.replace("< 5", "< 10")),
+    # Add a statement at the start.
+    ((1, 1, 1, 1, "x = 2\n"), "x = 2\n" + SOURCE),
+    # Add a statement at the end.
+    ((11, 1, 11, 1, "印出(x)"), SOURCE + "印出(x)"),
+    # Remove the loop body's last line.
+    ((7, 1, 8, 1, ""), SOURCE.replace("    数目 = 数目 + 1\n", "")),
+    # Join two lines.
+    ((9, 10, 10, 1, " + "), SOURCE.replace("\"世界\"\n印出(名字)", "\"世界\" + 印出(名字)")),
+    # Comment out the declaration used by the last statement.
+    ((9, 1, 9, 1, "# "), SOURCE.replace("名字 = ", "# 名字 = ")),
+    # Add an else block to the if statement.
+    ((7, 1, 7, 1, "    否则:\n        印出(0)\n"), SOURCE.replace("    数目 = 数目 + 1", "    否则:\n        印出(0)\n    数目 = 数目 + 1")),
+    # Add a lexing error.
+    ((8, 4, 8, 4, "%"), SOURCE.replace("印出(数目)\n名字", "印出(%数目)\n名字")),
+    # Windows newlines.
+    ((2, 1, 2, 1, "x = 1\r\n"), SOURCE.replace("\n\n", "\nx = 1\n\n")),
+])
+def test_edit(edit, source):
+    compiler = IncrementalCompiler(SOURCE)
+    compiler.compile()
+
+    assert compileIncrementally(lambda: compiler.edit(*edit)) == compileAll(source)
+    assert "".join(compiler.lines) == source.replace("\r\n", "\n")
+
+def test_editBeforeCompile():
+    compiler = IncrementalCompiler(SOURCE)
+    assert compiler.edit(1, 6, 1, 7, "2") == mock_compiler.compile(SOURCE.replace("数目 = 1", "数目 = 2"))
+
+def test_editReusesCachedStatements():
+    compiler = IncrementalCompiler(SOURCE)
+    compiler.compile()
+    lastStatement = compiler.statements[-1]
+    lastLineTokens = compiler.lineTokens[9]
+
+    compiler.edit(1, 1, 1, 1, "x = 2\n")
+
+    assert compiler.statements[-1] is lastStatement
+    assert (lastStatement.startLine, lastStatement.lastLine) == (11, 13)
+    assert compiler.lineTokens[10] is lastLineTokens
+
+def test_editFixesError():
+    compiler = IncrementalCompiler(SOURCE)
+    compiler.compile()
+    lastStatement = compiler.statements[-1]
+
+    with pytest.raises(SystemExit) as output:
+        compiler.edit(8, 4, 8, 4, "?")
+    assert str(output.value) == "Lexing error. Unknown token: ? (line 8, column 4)"
+
+    # The statements after the error are still reused once it is fixed.
+    assert compiler.edit(8, 4, 8, 5, "") == mock_compiler.compile(SOURCE)
+    assert compiler.statements[-1] is lastStatement
+
+def test_editDeclaresVariable():
+    compiler = IncrementalCompiler("印出(x)\n印出(x)\n")
+    with pytest.raises(SystemExit) as output:
+        compiler.compile()
+    assert str(output.value) == "Error. Referencing variable before assignment: x"
+
+    assert compiler.edit(1, 1, 1, 1, "x = 1\n") == "x=1\nprint(x)\nprint(x)\n"
+
+@pytest.mark.parametrize("edit", [(0, 1, 0, 1), (1, 0, 1, 1), (2, 1, 1, 1), (1, 9, 1, 9), (12, 1, 12, 1)])
+def test_editOutsideSource(edit):
+    compiler = IncrementalCompiler(SOURCE)
+    with pytest.raises(SystemExit) as output:
+        compiler.edit(*edit, "x")
+
+    assert str(output.value).startswith("Error: Edit range")
@@ -0,0 +1,239 @@
+import os
+import sys
+
+# appending the directory of lex.py in the sys.path list
+sys.path.append(f"{os.path.dirname(__file__)}/../src")
+from lex import Lexer, Token, TokenType
+
+import pytest
+
+def lexAll(source, engine):
+    """
+    Return the token stream of the source as (kind, text, count) tuples,
+    ending with the lexing error message if there is one.
+    """
+    lexer = Lexer(source, engine)
+    tokens = []
+    try:
+        token = lexer.getToken()
+        while token.kind != TokenType.EOF:
+            tokens.append((token.kind, token.text, token.count))
+            token = lexer.getToken()
+    except SystemExit as error:
+        tokens.append(("ERROR", str(error.code)))
+    return tokens
+
+SOURCES = [
+    "",
+    "1+1*1/1",
+    "(((((1)))))",
+    "数目 = 1\n数目+1*数目/1",
+    "如果 1 > 2:\n    印出(\"1 > 2\")\n或则 3 >= 4:\n  印出(\"你好\")\n否则:\n\t印出(\"boop\")",
+    "当 真 与 非 假:\n    中断\n    继续",
+    "x = 1.5 # comment\n    # indented comment\n# comment",
+    "a1 != b2 <= c3 == d4 < e5",
+    "  \r\n\t x\r\n",
+    "数目abc123数目 = 12.25",
+    "123abc",
+    "\"a b c\" + \"\"",
+]
+
+ERROR_SOURCES = [
+    "1.",
+    "1.a",
+    "\"abc",
+    "\"a%b\"",
+    "\"a\\tb\"",
+    "a_b",
+    "!x",
+    "x = 1 ? 2",
+]
+
+EXOTIC_SOURCES = [
+    "12²",
+    "é = 1",
+    "abcé",
+    "数目٣",
+    "1.٣",
+    "１２",
+    "x\0y",
+]
+
+@pytest.mark.parametrize("source", SOURCES + ERROR_SOURCES + EXOTIC_SOURCES)
+def test_enginesProduceSameTokens(source):
+    assert lexAll(source, Lexer.REGEX_ENGINE) == lexAll(source, Lexer.CHAR_ENGINE)
+
+def test_tokens():
+    actual = lexAll("如果 x >= 1.5:\n  印出(\"hi\")", Lexer.REGEX_ENGINE)
+    expected = [
+        (TokenType.IF, "如果", 1),
+        (TokenType.IDENT, "x", 1),
+        (TokenType.GTEQ, ">=", 1),
+        (TokenType.NUMBER, "1.5", 1),
+        (TokenType.COLON, ":", 1),
+        (TokenType.NEWLINE, "\n", 1),
+        (TokenType.SPACE, " ", 2),
+        (TokenType.PRINT, "印出", 1),
+        (TokenType.OPEN_BRACKET, "(", 1),
+        (TokenType.STRING, "hi", 1),
+        (TokenType.CLOSE_BRACKET, ")", 1),
+        (TokenType.NEWLINE, "\n", 1),
+    ]
+    assert actual == expected
+
+@pytest.mark.parametrize("source", ERROR_SOURCES)
+def test_lexingError(source):
+    assert lexAll(source, Lexer.REGEX_ENGINE)[-1][0] == "ERROR"
+
+def test_unknownEngineError():
+    with pytest.raises(SystemExit) as output:
+        Lexer("1", "unknown")
+
+    assert output.type == SystemExit
+
+@pytest.mark.parametrize("char", ["数", "㐀", "䶿", "豈", "\U00020000", "\U0002a6df", "\U0002f800"])
+def test_ischinese(char):
+    assert Lexer.ischinese(char)
+
+@pytest.mark.parametrize("char", ["a", "1", " ", "\0", "，", "㏿", "\U0002a6e0"])
+def test_isNotChinese(char):
+    assert not Lexer.ischinese(char)
+
+def test_ischineseInString():
+    assert Lexer.ischinese("abc数目")
+    assert not Lexer.ischinese("abc")
+
+def test_extensionIdentifier():
+    actual = lexAll("㐀 = 豈\U00020000", Lexer.REGEX_ENGINE)
+    expected = [
+        (TokenType.IDENT, "㐀", 1),
+        (TokenType.EQ, "=", 1),
+        (TokenType.IDENT, "豈\U00020000", 1),
+        (TokenType.NEWLINE, "\n", 1),
+    ]
+    assert actual == expected
+
+def test_wordKinds():
+    assert Token.checkIfKeyword("如果") == TokenType.IF
+    assert Token.checkIfKeyword("与") is None
+    assert Token.checkIfLogicalOperator("与") == TokenType.AND
+    assert Token.checkIfBoolean("假") == TokenType.FALSE
+    assert Token.checkIfBoolean("数目") is None
+
+def tokenizeAll(source, engine, workers = 1, minChunkSize = Lexer.MIN_CHUNK_SIZE):
+    """
+    Return the token stream read from Lexer.tokenize like lexAll does.
+    """
+    buffer = Lexer(source, engine).tokenize(workers, minChunkSize)
+    tokens = []
+    try:
+        token = buffer.getToken()
+        while token.kind != TokenType.EOF:
+            tokens.append((token.kind, token.text, token.count))
+            token = buffer.getToken()
+    except SystemExit as error:
+        tokens.append(("ERROR", str(error.code)))
+    return tokens
+
+@pytest.mark.parametrize("engine", [Lexer.REGEX_ENGINE, Lexer.CHAR_ENGINE])
+@pytest.mark.parametrize("source", SOURCES + ERROR_SOURCES + EXOTIC_SOURCES)
+def test_tokenize(source, engine):
+    assert tokenizeAll(source, engine) == lexAll(source, engine)
+
+def test_tokenizeErrorRaisedWhenReached():
+    tokens = Lexer("x = 1\ny = \"a%\"").tokenize()
+    assert [tokens.getToken().kind for _ in range(6)] == [
+        TokenType.IDENT, TokenType.EQ, TokenType.NUMBER, TokenType.NEWLINE, TokenType.IDENT, TokenType.EQ
+    ]
+
+    with pytest.raises(SystemExit) as output:
+        tokens.getToken()
+
+    assert str(output.value) == "Lexing error. Illegal character in string. (line 2, column 7)"
+
+@pytest.mark.parametrize("engine", [Lexer.REGEX_ENGINE, Lexer.CHAR_ENGINE])
+def test_tokenizeAfterNul(engine):
+    lexer = Lexer("x\0y\n\0", engine)
+    tokens = Lexer("x\0y\n\0", engine).tokenize()
+    assert [tokens.getToken().kind for _ in range(6)] == [lexer.getToken().kind for _ in range(6)]
+
+def test_tokenBufferGetToken():
+    tokens = Lexer("x = \"a\"").tokenize()
+    assert tokens.peek(1).kind == TokenType.EQ
+    assert [tokens.getToken().kind for _ in range(6)] == [
+        TokenType.IDENT, TokenType.EQ, TokenType.STRING, TokenType.NEWLINE, TokenType.EOF, TokenType.EOF
+    ]
+    assert tokens.peek(5).kind == TokenType.EOF
+
+def test_tokenHasNoDict():
+    assert not hasattr(Token("1", TokenType.NUMBER), "__dict__")
+
+def test_blankLinesSkipped():
+    actual = lexAll("\n  \nx\n\t\r\n   \n  y\n   ", Lexer.REGEX_ENGINE)
+    expected = [
+        (TokenType.IDENT, "x", 1),
+        (TokenType.NEWLINE, "\n", 1),
+        (TokenType.SPACE, " ", 2),
+        (TokenType.IDENT, "y", 1),
+        (TokenType.NEWLINE, "\n", 1),
+    ]
+    assert actual == expected
+
+@pytest.mark.parametrize("engine", [Lexer.REGEX_ENGINE, Lexer.CHAR_ENGINE])
+def test_tokenPositions(engine):
+    lexer = Lexer("\n数目 = \"a\"\n\n  # comment\n  数目 # comment", engine)
+    positions = []
+    token = lexer.getToken()
+    while token.kind != TokenType.EOF:
+        positions.append((token.kind, token.line, token.column))
+        token = lexer.getToken()
+    positions.append((token.kind, token.line, token.column))
+
+    expected = [
+        (TokenType.IDENT, 2, 1),
+        (TokenType.EQ, 2, 4),
+        (TokenType.STRING, 2, 6),
+        (TokenType.NEWLINE, 2, 9),
+        (TokenType.SPACE, 4, 1),
+        (TokenType.NEWLINE, 4, 12),
+        (TokenType.SPACE, 5, 1),
+        (TokenType.IDENT, 5, 3),
+        (TokenType.NEWLINE, 5, 15),
+        (TokenType.EOF, 6, 1),
+    ]
+    assert positions == expected
+
+    tokens = Lexer("\n数目 = \"a\"\n\n  # comment\n  数目 # comment", engine).tokenize()
+    assert [(tokens.kind(i), *tokens.position(i)) for i in range(len(tokens))] == expected
+
+@pytest.mark.parametrize("engine", [Lexer.REGEX_ENGINE, Lexer.CHAR_ENGINE])
+def test_lexingErrorPosition(engine):
+    lexer = Lexer("x = 1\n\ny = \"a%\"", engine)
+    with pytest.raises(SystemExit) as output:
+        while lexer.getToken().kind != TokenType.EOF:
+            pass
+
+    assert str(output.value) == "Lexing error. Illegal character in string. (line 3, column 7)"
+
+PARALLEL_SOURCE = "\n".join(SOURCES) * 3
+
+def tokenBufferContents(tokens):
+    return list(zip(tokens.kinds, tokens.starts, tokens.ends))
+
+@pytest.mark.parametrize("engine", [Lexer.REGEX_ENGINE, Lexer.CHAR_ENGINE])
+def test_tokenizeInParallel(engine):
+    sequential = Lexer(PARALLEL_SOURCE, engine).tokenize()
+    parallel = Lexer(PARALLEL_SOURCE, engine).tokenize(workers=3, minChunkSize=50)
+    assert tokenBufferContents(parallel) == tokenBufferContents(sequential)
+    assert [parallel.position(i) for i in range(len(parallel))] == \
+        [sequential.position(i) for i in range(len(sequential))]
+
+def test_tokenizeInParallelAfterNul():
+    source = PARALLEL_SOURCE + "\0" + PARALLEL_SOURCE
+    sequential = Lexer(source).tokenize()
+    parallel = Lexer(source).tokenize(workers=4, minChunkSize=50)
+    assert tokenBufferContents(parallel) == tokenBufferContents(sequential)
+
+def test_tokenizeInParallelErrorPosition():
+    source = PARALLEL_SOURCE + "y = \"a%\"\n" + PARALLEL_SOURCE + "\"b%\""
+    assert tokenizeAll(source, Lexer.REGEX_ENGINE, workers=3, minChunkSize=50) == lexAll(source, Lexer.REGEX_ENGINE)
@@ -0,0 +1,133 @@
+import os
+import sys
+import contextlib
+import io
+
+# appending the directory of optimize.py in the sys.path list
+sys.path.append(f"{os.path.dirname(__file__)}/../src")
+from mocks import mock_compiler
+from incremental import IncrementalCompiler
+from utils import getAlphaNumericVar
+
+import pytest
+
+def run(code):
+    """
+    Return what the generated code prints, followed by the name of the error it raises, if any.
+    """
+    output = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(output):
+            exec(compile(code, "<pyhan>", "exec"), {})
+    except Exception as error:
+        return output.getvalue() + type(error).__name__
+    return output.getvalue()
+
+@pytest.mark.parametrize("expression, expected", [
+    ("(((((1)))))", "1"),
+    ("2*3+4", "10"),
+    ("真 与 假", "False"),
+    ("\"a\" == \"a\"", "True"),
+    ("7/2", "3.5"),
+    ("4/2", "2.0"),
+    ("0.1+0.2", "0.30000000000000004"),
+    ("-(2-5)", "3"),
+    ("非 0", "True"),
+    ("1 与 \"b\"", "\"b\""),
+    ("\"\" 或 假", "False"),
+    ("\"ab\" + \"c\"", "\"abc\""),
+    ("\"ab\" * 2", "\"abab\""),
+    ("真 + 真", "2"),
+    ("1 < 2 < 3", "True"),
+    ("3 > 2 > 2", "False"),
+    ("2 < 1 < \"a\"", "False"),
+    # Short-circuiting skips the variables.
+    ("真 或 x", "True"),
+    ("假 与 x", "False"),
+    ("真 与 x", "x"),
+    ("x + (2*3)", "x+6"),
+    ("x * (1-2)", "x*-1"),
+    # Only literal-only subexpressions are folded, in Python's order of evaluation.
+    ("x + 1 + 2", "x+1+2"),
+    ("1 + 2 + x", "3+x"),
+    ("x 与 真", "x and True"),
+    # Errors are left for runtime.
+    ("1/0", "1/0"),
+    ("\"a\" - 1", "\"a\"-1"),
+    ("\"a\" < 1", "\"a\"<1"),
+    # Python cannot read 007, so it is not folded or dropped.
+    ("007 + 1", "007+1"),
+    ("真 或 007", "True or 007"),
+])
+def test_foldConstants(expression, expected):
+    source = f"x = 1\n印出({expression})\n"
+    assert mock_compiler.compile(source, optimize=True) == f"x=1\nprint({expected})\n"
+    assert run(mock_compiler.compile(source, optimize=True)) == run(mock_compiler.compile(source))
+
+@pytest.mark.parametrize("expression", ["\"ab\" * 4000000000", "4000000000 * \"ab\""])
+def test_hugeRepetitionIsNotFolded(expression):
+    code = mock_compiler.compile(f"印出({expression})\n", optimize=True)
+    assert code == f"print({expression.replace(' ', '')})\n"
+    compile(code, "<pyhan>", "exec")
+
+def test_foldConstantsInBlocks():
+    source = """\
+数目 = 0
+当 数目 < 2*3:
+    如果 数目 == (1+1):
+        印出("二" + "!")
+    或则 数目 > 10/4:
+        印出(数目 * (真 + 1))
+    否则:
+        数目 + (1 - 1)
+    数目 = 数目 + 1
+"""
+    name = getAlphaNumericVar("数目")
+    assert mock_compiler.compile(source, optimize=True) == f"""\
+{name}=0
+while {name}<6:
+    if {name}==2:
+        print("二!")
+    elif {name}>2.5:
+        print({name}*2)
+    else:
+        {name}+0
+    {name}={name}+1
+"""
+    assert run(mock_compiler.compile(source, optimize=True)) == run(mock_compiler.compile(source))
+
+def test_optimizeIsOffByDefault():
+    source = "印出(2*3+4)\n"
+    assert mock_compiler.compile(source) == "print(2*3+4)\n"
+
+def test_incrementalOptimize():
+    compiler = IncrementalCompiler("x = 1 + 1\n印出(x)\n", optimize=True)
+    assert compiler.compile() == "x=2\nprint(x)\n"
+    assert compiler.edit(1, 9, 1, 10, "2") == "x=3\nprint(x)\n"
+
+@pytest.mark.parametrize("source, expected", [
+    # Unreachable 或则/否则 arms are dropped.
+    ("如果 x:\n    印出(1)\n或则 假:\n    印出(2)\n否则:\n    印出(3)\n", "if x:\n    print(1)\nelse:\n    print(3)\n"),
+    ("如果 x:\n    印出(1)\n或则 1 == 1:\n    印出(2)\n或则 x:\n    印出(3)\n否则:\n    印出(4)\n", "if x:\n    print(1)\nelse:\n    print(2)\n"),
+    ("如果 假:\n    印出(1)\n或则 x:\n    印出(2)\n", "if x:\n    print(2)\n"),
+    # A branch that always runs takes the place of the if statement.
+    ("如果 真:\n    印出(1)\n    如果 x:\n        印出(2)\n否则:\n    印出(3)\n", "print(1)\nif x:\n    print(2)\n"),
+    ("如果 2 < 1:\n    印出(1)\n否则:\n    印出(2)\n", "print(2)\n"),
+    ("如果 假:\n    印出(1)\n印出(2)\n", "print(2)\n"),
+    # Loops that never run are removed.
+    ("当 假:\n    印出(1)\n印出(2)\n", "print(2)\n"),
+    ("当 x:\n    当 0:\n        印出(1)\n", "while x:\n    pass\n"),
+    ("当 真:\n    印出(1)\n    中断\n", "while True:\n    print(1)\n    break\n"),
+    # Statements after an unconditional 中断/继续 never run.
+    ("当 x:\n    中断\n    印出(1)\n    x = 2\n", "while x:\n    break\n"),
+    ("当 x:\n    继续\n    当 x:\n        印出(1)\n", "while x:\n    continue\n"),
+    ("当 x:\n    如果 真:\n        印出(1)\n    中断\n    印出(2)\n印出(3)\n", "while x:\n    print(1)\n    break\nprint(3)\n"),
+    # Python cannot read 007, so its syntax error is kept.
+    ("如果 假:\n    印出(007)\n", "if False:\n    print(007)\n"),
+    ("如果 真:\n    印出(1)\n或则 007:\n    印出(2)\n", "if True:\n    print(1)\nelif 007:\n    print(2)\n"),
+    ("当 x:\n    中断\n    印出(007)\n", "while x:\n    break\n    print(007)\n"),
+])
+def test_removeDeadCode(source, expected):
+    source = "x = 0\n" + source
+    assert mock_compiler.compile(source, optimize=True) == "x=0\n" + expected
+    assert run(mock_compiler.compile(source, optimize=True)) == run(mock_compiler.compile(source))
@@ -0,0 +1,110 @@
+import os
+import sys
+
+# appending the directory of mock_compiler.py in the sys.path list
+sys.path.append(f"{os.path.dirname(__file__)}/../src")
+from mocks import mock_compiler
+from lex import Lexer, TokenType
+from emit import Emitter
+from parse import Parser, BINDING_POWERS, PREFIX_POWERS, INFIX_POWERS, TOKEN_CLASSES, COMPARISON_OPERATOR, ARITHMETIC_OPERATOR, LOGICAL_OPERATOR
+
+import pytest
+
+INPUT = """\
+数目 = 1
+当 数目 < 5:
+    如果 数目 == 2 与 非 假:
+        印出(数目)
+    印出("你好" + "世界")
+    数目 = 数目 + 1\
+"""
+
+def test_parseTokenBuffer(tmp_path):
+    outputPath = tmp_path / "out.py"
+    emitter = Emitter(str(outputPath))
+    parser = Parser(Lexer(INPUT).tokenize(), emitter)
+    parser.program()
+    emitter.writeFile()
+
+    assert outputPath.read_text() == mock_compiler.compile(INPUT)
+
+def test_lookAhead():
+    parser = Parser(Lexer("数目 = 1 + 2").tokenize(), Emitter(""))
+    assert parser.lookAhead(0).kind == TokenType.IDENT
+    assert parser.lookAhead(1).kind == TokenType.EQ
+    assert parser.lookAhead(2).kind == TokenType.NUMBER
+    assert parser.lookAhead(3).kind == TokenType.PLUS
+    assert parser.lookAhead(100).kind == TokenType.EOF
+
+    parser.nextToken()
+    assert parser.lookAhead(3).text == "2"
+
+def test_bindingPowersHaveParsers():
+    parser = Parser(Lexer(""), Emitter(""))
+    for kind, (prefixPower, infixPower) in BINDING_POWERS.items():
+        assert (prefixPower is not None) == (kind in parser.prefixParsers)
+        assert (infixPower is not None) == (kind in parser.infixParsers)
+
+def test_tokenClasses():
+    for kind, (prefixPower, infixPower) in BINDING_POWERS.items():
+        assert PREFIX_POWERS.get(kind) == prefixPower
+        assert INFIX_POWERS.get(kind) == infixPower
+
+    # Each class is the operators of one level of the grammar.
+    assert {kind for kind in TokenType if TOKEN_CLASSES[kind] & COMPARISON_OPERATOR} == {kind for kind in INFIX_POWERS if INFIX_POWERS[kind] == 4}
+    assert {kind for kind in TokenType if TOKEN_CLASSES[kind] & ARITHMETIC_OPERATOR} == {kind for kind in INFIX_POWERS if INFIX_POWERS[kind] in (5, 6)}
+    assert {kind for kind in TokenType if TOKEN_CLASSES[kind] & LOGICAL_OPERATOR} == {TokenType.AND, TokenType.OR, TokenType.NOT}
+
+@pytest.mark.parametrize("source", ["x = 1\n印出(x + 与 x)\n", "x = 1\n印出(x < 或 x)\n", "x = 1\n印出(x * 非 x)\n"])
+def test_operatorBeforeLogicalOperator(source):
+    with pytest.raises(SystemExit, match="SyntaxError: invalid syntax"):
+        mock_compiler.compile(source)
+
+@pytest.mark.parametrize("expression, expected", [
+    ("1 + 2 * 3 - 4 / 5", "1+2*3-4/5"),
+    ("x 或 非 x 与 x == 1 < 2 + -3 * 4", "x or not x and x==1<2+-3*4"),
+    ("非 x == 1 与 x", "not x==1 and x"),
+    ("(x 或 x) 与 x", "(x or x) and x"),
+])
+def test_parseExpressionByBindingPower(expression, expected):
+    assert mock_compiler.compile(f"x = 1\n印出({expression})\n") == f"x=1\nprint({expected})\n"
+
+def compileOrError(source, iterative):
+    """
+    Return the generated code of the source, or the error the compiler exits with.
+    """
+    try:
+        return mock_compiler.compile(source, iterative=iterative)
+    except SystemExit as error:
+        return str(error.code)
+
+@pytest.mark.parametrize("source", [
+    INPUT,
+    "x = 1\n如果 x:\n    当 x:\n        如果 x:\n            x = 3\n        或则 非 x:\n            印出(x)\n        否则:\n            x = 2\n        中断\n或则 x:\n  印出(x)\n否则:\n    印出(-(x) * (1 + (x < 2 与 x)))\n",
+    "x = 1\n当 x:\n  如果 x:\n     x = 2\n  或则 x:\n     x = 3\n  印出(x)\n印出(x)\n",
+    # Errors come out the same, at the same place.
+    "x = 1\n如果 x:\n    中断\n",
+    "x = 1\n当 x:\n印出(x)\n",
+    "x = 1\n当 x:\n    印出(x)\n      印出(x)\n",
+    "x = 1\n如果 x:\n    印出(x)\n否则:\n    印出(x)\n否则:\n    印出(x)\n",
+    "x = 1\n印出(((x + 1) * 2)\n",
+    "x = 1\n印出(非 非 x)\n",
+    "x = 1\n印出(非 -x)\n",
+    "x = 1\n印出(x < 非 x)\n",
+    "x = 1\n印出(- (x 或 y))\n",
+])
+def test_iterativeParsesLikeRecursive(source):
+    assert compileOrError(source, True) == compileOrError(source, False)
+
+def test_iterativeDeepNesting():
+    depth = 20000
+    source = "x = 1\n印出(" + "(" * depth + "-x" + ")" * depth + ")\n"
+    assert mock_compiler.compile(source, iterative=True) == "x=1\nprint(" + "(" * depth + "-x" + ")" * depth + ")\n"
+    with pytest.raises(RecursionError):
+        mock_compiler.compile(source)
+
+    # Each block is indented one space more than the one it is in.
+    depth = 2000
+    source = "x = 1\n" + "".join(" " * level + "当 x:\n" for level in range(depth)) + " " * depth + "中断\n"
+    expected = "x=1\n" + "".join(" " * level + "while x:\n" for level in range(depth)) + " " * depth + "break\n"
+    assert mock_compiler.compile(source, iterative=True) == expected
@@ -0,0 +1,68 @@
+import os
+import sys
+
+# appending the directory of project.py in the sys.path list
+sys.path.append(f"{os.path.dirname(__file__)}/../src")
+from project import buildProject, MANIFEST_FILE
+
+import pytest
+
+SOURCES = {
+    "main.pyhan": "印出(1)\n",
+    "lib/数目.pyhan": "数目 = 2\n印出(数目)\n",
+    "lib/deep/loop.pyhan": "x = 0\n当 x < 3:\n    x = x + 1\n",
+}
+
+@pytest.fixture
+def sourceDir(tmp_path):
+    for path, source in SOURCES.items():
+        (tmp_path / "src" / path).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / "src" / path).write_text(source, encoding='utf-8')
+    return tmp_path / "src"
+
+def outputs(outputDir) -> list:
+    return sorted(os.path.relpath(os.path.join(directory, name), outputDir)
+                  for directory, _, names in os.walk(outputDir) for name in names if name != MANIFEST_FILE)
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_buildMirrorsLayout(tmp_path, sourceDir, jobs):
+    result = buildProject(str(sourceDir), str(tmp_path / "out"), jobs=jobs)
+
+    assert (result.built, result.upToDate, result.errors) == (3, 0, {})
+    assert outputs(tmp_path / "out") == ["lib/deep/loop.py", "lib/数目.py", "main.py"]
+    assert (tmp_path / "out" / "main.py").read_text(encoding='utf-8') == "print(1)\n"
+
+def test_upToDateFilesAreSkipped(tmp_path, sourceDir):
+    outputDir = str(tmp_path / "out")
+    buildProject(str(sourceDir), outputDir)
+    (sourceDir / "main.pyhan").write_text("印出(1)\n", encoding='utf-8')   # Touched, with the same contents.
+    (sourceDir / "lib" / "deep" / "loop.pyhan").write_text("印出(3)\n", encoding='utf-8')
+
+    result = buildProject(str(sourceDir), outputDir)
+    assert (result.built, result.upToDate) == (1, 2)
+    assert (tmp_path / "out" / "lib" / "deep" / "loop.py").read_text(encoding='utf-8') == "print(3)\n"
+
+    # Outputs that were removed, or built with other options, are built again.
+    os.remove(tmp_path / "out" / "main.py")
+    assert buildProject(str(sourceDir), outputDir).built == 1
+    assert buildProject(str(sourceDir), outputDir, optimize=True).built == 3
+
+def test_errorsArePerFile(tmp_path, sourceDir):
+    (sourceDir / "lib" / "bad.pyhan").write_text("x = (\n", encoding='utf-8')
+    outputDir = str(tmp_path / "out")
+
+    result = buildProject(str(sourceDir), outputDir)
+    assert (result.built, list(result.errors)) == (3, [os.path.join("lib", "bad.pyhan")])
+    assert result.errors[os.path.join("lib", "bad.pyhan")].startswith("Error")
+    assert "3 built, 0 up to date, 1 failed" in result.summary()
+
+    # A file that failed is compiled again by the next build.
+    assert len(buildProject(str(sourceDir), outputDir).errors) == 1
+
+def test_outputDirectoryInsideSourceIsSkipped(sourceDir):
+    outputDir = sourceDir / "out"
+    buildProject(str(sourceDir), str(outputDir))
+    (outputDir / "stray.pyhan").write_text("印出(1)\n", encoding='utf-8')
+
+    result = buildProject(str(sourceDir), str(outputDir))
+    assert (result.built, result.upToDate) == (0, 3)
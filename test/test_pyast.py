@@ -0,0 +1,127 @@
+import os
+import sys
+import contextlib
+import io
+import subprocess
+import traceback
+
+# appending the directory of pyast.py in the sys.path list
+sys.path.append(f"{os.path.dirname(__file__)}/../src")
+from mocks import mock_compiler
+from lex import Lexer
+from emit import Emitter
+from parse import Parser
+from pyast import AstGenerator
+import compiler
+
+import pytest
+
+SOURCE = """\
+数目 = 0
+当 数目 < 5:
+    如果 数目 == 2:
+        印出("二")
+    或则 数目 > 3 与 非 假:
+        印出(数目 / 2)
+    否则:
+        印出(-数目)
+    数目 = 数目 + 1
+印出(1 < 数目 <= 5 或 "否")
+"""
+
+def generate(source, optimize=False):
+    """
+    Return the AstGenerator of the source after parsing it.
+    """
+    generator = AstGenerator("test.pyhan", source)
+    Parser(Lexer(source), Emitter(""), optimize, generator).program()
+    return generator
+
+def run(code):
+    """
+    Return what a code object, or Python code, prints.
+    """
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        exec(code, {})
+    return output.getvalue()
+
+@pytest.mark.parametrize("optimize", [False, True])
+def test_runsLikeGeneratedCode(optimize):
+    assert run(generate(SOURCE, optimize).code()) == run(mock_compiler.compile(SOURCE, optimize))
+
+def test_nativeNames(tmp_path):
+    inputPath = tmp_path / "input.pyhan"
+    inputPath.write_text(SOURCE, encoding='utf-8')
+
+    code = compiler.compileToCode(str(inputPath), nativeNames=True)
+    assert code.co_names == ('数目', 'print')
+    assert run(code) == run(mock_compiler.compile(SOURCE, nativeNames=True)) == run(mock_compiler.compile(SOURCE))
+
+def test_positions():
+    module = generate(SOURCE).module
+    loop = module.body[1]
+    assert (loop.lineno, loop.col_offset) == (2, 0)
+
+    elifBranch = loop.body[0].orelse[0]
+    division = elifBranch.body[0].value.args[0]
+    # Columns are UTF-8 offsets: 印出( is 7 bytes and 数目 6 bytes.
+    assert (division.lineno, division.col_offset, division.end_col_offset) == (6, 15, 25)
+    # An elif starts at its test, after 或则.
+    assert (elifBranch.lineno, elifBranch.col_offset) == (5, 11)
+
+def test_tracebackPointsToSource():
+    with pytest.raises(ZeroDivisionError) as error:
+        run(generate("x = 0\n\n印出(1 / x)\n").code())
+
+    frame = traceback.extract_tb(error.value.__traceback__)[-1]
+    assert (frame.filename, frame.lineno) == ("test.pyhan", 3)
+
+def test_syntaxErrorAfterParsing():
+    generator = generate("印出(007)\n印出(１)\n")
+    with pytest.raises(SyntaxError) as error:
+        generator.code()
+    assert (error.value.lineno, error.value.offset) == (1, 4)
+
+    # Like the generated code, the PyHan error comes first.
+    with pytest.raises(SystemExit):
+        generate("印出(007)\n印出(x)\n")
+
+@pytest.mark.parametrize("source", ["印出(007 + 008)\n", "印出(007 < 008)\n"])
+def test_firstSyntaxErrorInSourceOrder(source):
+    with pytest.raises(SyntaxError) as error:
+        generate(source).code()
+    with pytest.raises(SyntaxError) as expected:
+        compile(mock_compiler.compile(source), "<pyhan>", "exec")
+    assert (error.value.lineno, error.value.offset) == (1, 4)
+    assert error.value.msg == expected.value.msg
+
+def test_compileToCode(tmp_path):
+    inputPath = tmp_path / "input.pyhan"
+    inputPath.write_text(SOURCE, encoding='utf-8')
+
+    code = compiler.compileToCode(str(inputPath))
+    assert code.co_filename == str(inputPath)
+    assert run(code) == run(mock_compiler.compile(SOURCE))
+
+def test_compileToBytecode(tmp_path):
+    inputPath = tmp_path / "input.pyhan"
+    outputPath = tmp_path / "output.pyc"
+    inputPath.write_text(SOURCE, encoding='utf-8')
+
+    compiler.compile(str(inputPath), str(outputPath))
+
+    output = subprocess.run([sys.executable, str(outputPath)], capture_output=True, check=True, encoding='utf-8')
+    assert output.stdout == run(mock_compiler.compile(SOURCE))
+
+    # Compiling the same source again leaves the bytecode as it is.
+    os.utime(outputPath, ns=(0, 0))
+    compiler.compile(str(inputPath), str(outputPath))
+    assert outputPath.stat().st_mtime_ns == 0
+
+def test_run(tmp_path, capsys):
+    inputPath = tmp_path / "input.pyhan"
+    inputPath.write_text(SOURCE, encoding='utf-8')
+
+    compiler.run(str(inputPath))
+    assert capsys.readouterr().out == run(mock_compiler.compile(SOURCE))
@@ -0,0 +1,34 @@
+import os
+import sys
+
+# appending the directory of compiler.py in the sys.path list
+sys.path.append(f"{os.path.dirname(__file__)}/../src")
+import compiler
+from source import readSource
+
+def test_readSource(tmp_path):
+    inputPath = tmp_path / "input.pyhan"
+    inputPath.write_bytes("数目 = 1\n印出(数目)\n".encode('utf-8'))
+
+    assert readSource(str(inputPath)) == "数目 = 1\n印出(数目)\n"
+
+def test_readSourceNewlines(tmp_path):
+    inputPath = tmp_path / "input.pyhan"
+    inputPath.write_bytes(b"x = 1\r\ny = 2\rz = 3\n")
+
+    assert readSource(str(inputPath)) == "x = 1\ny = 2\nz = 3\n"
+
+def test_readEmptySource(tmp_path):
+    inputPath = tmp_path / "input.pyhan"
+    inputPath.write_bytes(b"")
+
+    assert readSource(str(inputPath)) == ""
+
+def test_compileWithBlankLines(tmp_path):
+    inputPath = tmp_path / "input.pyhan"
+    outputPath = tmp_path / "output.py"
+    inputPath.write_text("\n\nx = 1\n   \n当 x < 5:\n\n    x = x + 1\n  \t\n")
+
+    compiler.compile(str(inputPath), str(outputPath))
+
+    assert outputPath.read_text() == "x=1\nwhile x<5:\n    x=x+1\n"
@@ -0,0 +1,89 @@
+import os
+import sys
+import cProfile
+import pstats
+import subprocess
+
+# appending the directory of sourcemap.py in the sys.path list
+sys.path.append(f"{os.path.dirname(__file__)}/../src")
+from sourcemap import SourceMap, mapPath, rewriteTraceback, rewriteStats
+import compiler
+
+import pytest
+
+SOURCE = """\
+数目 = 1
+
+当 数目 < 3:
+    如果 数目 == 1:
+        印出("一")
+    或则 数目 == 2:
+        印出("二")
+    否则:
+
+        印出("三")
+    数目 = 数目 + 1
+印出(1/0)
+"""
+
+def compileWithSourceMap(tmp_path, **options) -> str:
+    inputPath = tmp_path / "input.pyhan"
+    inputPath.write_text(SOURCE, encoding='utf-8')
+    outputPath = str(tmp_path / "output.py")
+    compiler.compile(str(inputPath), outputPath, sourceMap=True, **options)
+    return outputPath
+
+@pytest.mark.parametrize("options", [{}, {'stream': True}, {'nameHeader': True}])
+def test_sourceMapLines(tmp_path, options):
+    outputPath = compileWithSourceMap(tmp_path, **options)
+    sourceMap = SourceMap.load(mapPath(outputPath))
+    offset = 1 if options.get('nameHeader') else 0
+
+    assert sourceMap.source == str(tmp_path / "input.pyhan")
+    assert sourceMap.offset == offset
+    # Blank lines of the source are kept in the line numbers. 'elif' is at its condition and 'else' at the
+    # first statement of its block.
+    assert [sourceMap.position(line + offset) for line in range(1, 11)] == [
+        (1, 1), (3, 1), (4, 5), (5, 9), (6, 8), (7, 9), (10, 9), (10, 9), (11, 5), (12, 1)]
+    assert sourceMap.position(11 + offset) is None
+
+def test_noSourceMapByDefault(tmp_path):
+    inputPath = tmp_path / "input.pyhan"
+    inputPath.write_text(SOURCE, encoding='utf-8')
+    compiler.compile(str(inputPath), str(tmp_path / "output.py"))
+
+    assert sorted(os.listdir(tmp_path)) == ["input.pyhan", "output.py"]
+
+def test_rewriteTraceback(tmp_path):
+    outputPath = compileWithSourceMap(tmp_path)
+    output = subprocess.run([sys.executable, outputPath], capture_output=True, encoding='utf-8')
+
+    assert rewriteTraceback(output.stderr) == f"""\
+Traceback (most recent call last):
+  File "{tmp_path / 'input.pyhan'}", line 12, in <module>
+    印出(1/0)
+ZeroDivisionError: division by zero
+"""
+
+def test_rewriteTracebackLeavesOtherFiles():
+    text = """\
+Traceback (most recent call last):
+  File "/no/such/file.py", line 3, in <module>
+    print(1/0)
+          ~^~
+ZeroDivisionError: division by zero
+"""
+    assert rewriteTraceback(text) == text
+
+def test_rewriteStats(tmp_path):
+    outputPath = compileWithSourceMap(tmp_path)
+    with open(outputPath, 'r', encoding='utf-8') as outputFile:
+        code = compile(outputFile.read(), outputPath, 'exec')
+
+    profile = cProfile.Profile()
+    with pytest.raises(ZeroDivisionError):
+        profile.runctx(code, {}, {})
+    stats = rewriteStats(pstats.Stats(profile))
+
+    assert (str(tmp_path / "input.pyhan"), 1, '<module>') in stats.stats
+    assert not any(path == outputPath for path, _, _ in stats.stats)
@@ -0,0 +1,27 @@
+import os
+import sys
+import subprocess
+
+# appending the directory of startup_benchmark.py in the sys.path list
+sys.path.append(f"{os.path.dirname(__file__)}/../bench")
+from startup_benchmark import parseImportTimes, eagerModules
+
+def test_nestedEagerImportIsFound(tmp_path):
+    # A module imported by another module, like pypinyin through compiler, parse and utils.
+    (tmp_path / "outer.py").write_text("import inner\n")
+    (tmp_path / "inner.py").write_text("import json\n")
+    output = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import outer'],
+                            cwd=tmp_path, capture_output=True, text=True, check=True)
+
+    imports = parseImportTimes(output.stderr)
+    assert {'outer', 'inner', 'json'} <= set(imports)
+    assert 'json' in eagerModules(imports)
+
+def test_parseImportTimes():
+    output = """\
+import time: self [us] | cumulative | imported package
+import time:       120 |        450 | outer
+import time:       200 |        330 |   inner
+import time:       130 |        130 |     json
+"""
+    assert parseImportTimes(output) == {'outer': 0.45, 'inner': 0.33, 'json': 0.13}
@@ -0,0 +1,82 @@
+import io
+import os
+import sys
+
+# appending the directory of compiler.py in the sys.path list
+sys.path.append(f"{os.path.dirname(__file__)}/../src")
+import compiler
+from mocks import mock_compiler
+from lex import Lexer, StreamLexer, TokenType
+from emit import StreamEmitter
+
+import pytest
+
+INPUT = """\
+数目 = 1
+
+# 累加
+当 数目 < 5:
+    如果 数目 == 2 与 非 假:
+        印出(数目)
+
+    印出("你好" + "世界")
+    数目 = 数目 + 1
+印出(数目)\
+"""
+
+def tokens(lexer):
+    return [(token.kind, token.text, token.count, token.line, token.column) for token in lexer]
+
+def test_streamLexerTokens():
+    lexer = Lexer(INPUT)
+    expected = []
+    token = lexer.getToken()
+    while token.kind != TokenType.EOF:
+        expected.append((token.kind, token.text, token.count, token.line, token.column))
+        token = lexer.getToken()
+    expected.append((token.kind, token.text, token.count, token.line, token.column))
+
+    assert tokens(StreamLexer(io.StringIO(INPUT))) == expected
+
+def test_streamLexerGetTokenAfterEOF():
+    lexer = StreamLexer(io.StringIO("x\n"))
+    assert [lexer.getToken().kind for _ in range(4)] == [TokenType.IDENT, TokenType.NEWLINE, TokenType.EOF, TokenType.EOF]
+
+def test_streamLexerAfterNul():
+    lexer = Lexer("x\ny\0z\nw\n")
+    assert [token[0] for token in tokens(StreamLexer(io.StringIO("x\ny\0z\nw\n")))] == [
+        lexer.getToken().kind for _ in range(9)
+    ]
+
+def test_compileStream(tmp_path):
+    inputPath = tmp_path / "input.pyhan"
+    outputPath = tmp_path / "output.py"
+    inputPath.write_text(INPUT, encoding='utf-8')
+
+    compiler.compile(str(inputPath), str(outputPath), stream=True)
+
+    assert outputPath.read_text() == mock_compiler.compile(INPUT)
+
+def test_compileStreamError(tmp_path):
+    inputPath = tmp_path / "input.pyhan"
+    outputPath = tmp_path / "output.py"
+    inputPath.write_text("x = 1\n\ny = \"a%\"", encoding='utf-8')
+
+    with pytest.raises(SystemExit) as output:
+        compiler.compile(str(inputPath), str(outputPath), stream=True)
+
+    assert str(output.value) == "Lexing error. Illegal character in string. (line 3, column 7)"
+
+def test_streamEmitterFlush(tmp_path):
+    outputPath = tmp_path / "output.py"
+    emitter = StreamEmitter(str(outputPath))
+    emitter.headerLine("# header")
+    emitter.emitLine("x=1")
+    emitter.flush()
+
+    assert emitter.code == ""
+
+    emitter.emitLine("y=2")
+    emitter.writeFile()
+
+    assert outputPath.read_text() == "# header\nx=1\ny=2\n"
@@ -0,0 +1,58 @@
+import os
+import sys
+import io
+
+# appending the directory of tracer.py in the sys.path list
+sys.path.append(f"{os.path.dirname(__file__)}/../src")
+from lex import Lexer
+from emit import Emitter
+from parse import Parser, PRODUCTIONS
+from tracer import Tracer
+import compiler
+
+import pytest
+
+def test_noTracerNoWrappers():
+    parser = Parser(Lexer(""), Emitter(""))
+    for production in PRODUCTIONS:
+        assert getattr(parser, production).__func__ is getattr(Parser, production)
+
+@pytest.mark.parametrize("iterative", [False, True])
+def test_traceProductions(iterative):
+    tracer = Tracer()
+    emitter = Emitter("")
+    Parser(Lexer("x = 1\n印出(x)\n"), emitter, iterative=iterative, tracer=tracer).program()
+    assert emitter.code == "x=1\nprint(x)\n"
+
+    lines = tracer.lines()
+    assert lines[0] == "enter program at line 1, column 1: 'x'"
+    assert lines[-1] == "exit  program at line 3, column 1: ''"
+    assert "enter simpleStatement at line 2, column 1: '印出'" in [line.strip() for line in lines]
+    assert tracer.depth == 0
+
+def test_ringBufferKeepsLatestEvents():
+    tracer = Tracer(size=4)
+    Parser(Lexer("x = 1\n" * 10), Emitter(""), tracer=tracer).program()
+    assert len(tracer.events) == 4
+    assert tracer.lines()[-1] == "exit  program at line 11, column 1: ''"
+
+def test_dumpOnError(tmp_path, capsys):
+    inputPath = tmp_path / "input.pyhan"
+    inputPath.write_text("x = 1\n印出(x + )\n", encoding='utf-8')
+
+    with pytest.raises(SystemExit):
+        compiler.compile(str(inputPath), str(tmp_path / "output.py"), trace=True)
+    dump = capsys.readouterr().err.splitlines()
+    # The productions the error was found in are not exited.
+    assert dump[-1].strip() == "enter primitive at line 2, column 8: ')'"
+
+    with pytest.raises(SystemExit):
+        compiler.compile(str(inputPath), str(tmp_path / "output.py"))
+    assert capsys.readouterr().err == ""
+
+def test_dump():
+    tracer = Tracer()
+    Parser(Lexer("x = 1\n"), Emitter(""), tracer=tracer).program()
+    output = io.StringIO()
+    tracer.dump(output)
+    assert output.getvalue().splitlines() == [f"Last {len(tracer.events)} parser events:"] + tracer.lines()
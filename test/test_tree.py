@@ -0,0 +1,93 @@
+import os
+import sys
+
+# appending the directory of tree.py in the sys.path list
+sys.path.append(f"{os.path.dirname(__file__)}/../src")
+from mocks import mock_compiler
+from lex import Lexer, TokenType
+from emit import Emitter
+from parse import Parser
+from generate import CodeGenerator
+from tree import *
+
+import pytest
+
+def parseStatement(source):
+    """
+    Return the syntax tree of the first statement of the source.
+    """
+    parser = Parser(Lexer(source), Emitter(""))
+    parser.symbols.update(["x", "数目"])
+    return parser.statement()
+
+def dump(node):
+    """
+    Return the syntax tree of an expression as nested tuples.
+    """
+    if isinstance(node, (Number, String)):
+        return node.text
+    if isinstance(node, Boolean):
+        return node.value
+    if isinstance(node, Name):
+        return node.name
+    if isinstance(node, Group):
+        return ("()", dump(node.expression))
+    if isinstance(node, UnaryOp):
+        return (node.op, dump(node.operand))
+    if isinstance(node, BinOp):
+        return (dump(node.left), node.op, dump(node.right))
+    if isinstance(node, BoolOp):
+        return (node.op, [dump(value) for value in node.values])
+    return (dump(node.left), list(zip(node.ops, map(dump, node.comparators))))
+
+@pytest.mark.parametrize("source, expected", [
+    ("1 + 2 * 3", ("1", TokenType.PLUS, ("2", TokenType.ASTERISK, "3"))),
+    ("1 - 2 - 3", (("1", TokenType.MINUS, "2"), TokenType.MINUS, "3")),
+    ("-x * 2", ((TokenType.MINUS, "x"), TokenType.ASTERISK, "2")),
+    ("x == 1 + 2", ("x", [(TokenType.EQEQ, ("1", TokenType.PLUS, "2"))])),
+    ("1 < x <= 3", ("1", [(TokenType.LT, "x"), (TokenType.LTEQ, "3")])),
+    ("x 或 真 与 假", (TokenType.OR, ["x", (TokenType.AND, [True, False])])),
+    ("非 x == 1 与 数目", (TokenType.AND, [(TokenType.NOT, ("x", [(TokenType.EQEQ, "1")])), "数目"])),
+    ("(1 + 2) * \"a\"", (("()", ("1", TokenType.PLUS, "2")), TokenType.ASTERISK, "a")),
+])
+def test_expressionTree(source, expected):
+    statement = parseStatement(source)
+    assert isinstance(statement, ExpressionStatement)
+    assert dump(statement.value) == expected
+
+@pytest.mark.parametrize("source", ["非 -x", "非 非 x"])
+def test_notFollowedByUnaryError(source):
+    with pytest.raises(SystemExit) as output:
+        parseStatement(source)
+
+    assert str(output.value).startswith("Error. Unexpected token at")
+
+def test_statementTree():
+    statement = parseStatement("如果 x:\n  印出(x)\n或则 数目:\n  数目 = 2\n否则:\n  x\n")
+    assert isinstance(statement, If)
+    assert [dump(test) for test, body in statement.branches] == ["x", "数目"]
+    assert [type(body[0]) for test, body in statement.branches] == [Print, Assign]
+    assert statement.branches[1][1][0].name == "数目"
+    assert statement.branches[1][1][0].indentation == 2
+    assert isinstance(statement.orelse[0], ExpressionStatement)
+
+def test_nodePositions():
+    statement = parseStatement("当 x < 5:\n    x = 1 + (2)\n")
+    assert (statement.line, statement.column) == (1, 1)
+    assert (statement.test.line, statement.test.column) == (1, 3)
+    assignment = statement.body[0]
+    assert (assignment.line, assignment.column) == (2, 5)
+    assert (assignment.value.right.line, assignment.value.right.column) == (2, 13)
+
+def test_nodeHasNoDict():
+    assert not hasattr(parseStatement("x + 1").value, '__dict__')
+
+def test_generateStatement():
+    source = "数目 = 1\n当 数目 < 5 与 非 假:\n    如果 数目 == 2:\n        印出(数目)\n    否则:\n        印出(0)\n    数目 = 数目 + 1\n"
+    emitter = Emitter("")
+    parser = Parser(Lexer(source), emitter)
+    generator = CodeGenerator(emitter)
+    generator.statement(parser.statement())
+    generator.statement(parser.statement())
+
+    assert emitter.code == mock_compiler.compile(source)
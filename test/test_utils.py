@@ -0,0 +1,102 @@
+import os
+import sys
+import json
+import subprocess
+
+# appending the directory of utils.py in the sys.path list
+sys.path.append(f"{os.path.dirname(__file__)}/../src")
+import utils
+from utils import MangledNames, NameTable, getAlphaNumericVar, getNativeVar, mangle
+
+import pytest
+
+@pytest.fixture
+def mangledNames(monkeypatch):
+    """
+    Give getAlphaNumericVar an empty cache for the test.
+    """
+    names = MangledNames(size=2)
+    monkeypatch.setattr(utils, 'mangledNames', names)
+    return names
+
+def test_cachedNamesAreTheSame(mangledNames):
+    name = getAlphaNumericVar("阳")
+    assert name == mangle("阳") == "yang_65e20c27a154dfe12117f65b731513990bddf795faeb56db0a733734373aef17"
+    assert getAlphaNumericVar("阳") == name
+    assert getAlphaNumericVar("x") == "x"
+    assert mangledNames.stats() == {'hits': 1, 'misses': 2, 'names': 2, 'size': 2}
+
+def test_leastRecentlyUsedIsDropped(mangledNames):
+    getAlphaNumericVar("阳")
+    getAlphaNumericVar("洋")
+    getAlphaNumericVar("阳")
+    getAlphaNumericVar("数目")
+    assert list(mangledNames.names) == ["阳", "数目"]
+
+def test_saveAndLoad(mangledNames, tmp_path):
+    path = str(tmp_path / "names.json")
+    getAlphaNumericVar("阳")
+    mangledNames.save(path)
+
+    loaded = MangledNames()
+    loaded.load(path)
+    assert loaded.get("阳") == mangle("阳")
+    assert os.listdir(tmp_path) == ["names.json"]
+
+@pytest.mark.parametrize("content", [
+    "not json",
+    json.dumps({'pypinyin': "0.0.0", 'names': {"阳": "wrong"}}),
+    json.dumps(["阳"]),
+])
+def test_loadSkipsUnusableFiles(tmp_path, content):
+    path = tmp_path / "names.json"
+    path.write_text(content, encoding='utf-8')
+
+    names = MangledNames()
+    names.load(str(path))
+    names.load(str(tmp_path / "missing.json"))
+    assert not names.names
+
+@pytest.mark.parametrize("var, expected", [
+    ("数目", "数目"),
+    ("x", "x"),
+    ("𠀀", "𠀀"),
+    # A CJK compatibility ideograph, which Python would read as 豈 (U+8C48).
+    ("\uF900", mangle("\uF900")),
+    # Not Chinese, so left as it is, for Python to reject like without native names.
+    ("x²", "x²"),
+])
+def test_nativeVar(var, expected):
+    assert getNativeVar(var) == expected
+
+def test_shortNames():
+    table = NameTable()
+    assert table.get("阳") == "yang_6"
+    assert table.get("洋") == "yang_4"
+    assert table.get("x") == "x"
+    assert table.get("阳") == "yang_6"
+    assert table.mangled() == {"阳": "yang_6", "洋": "yang_4"}
+
+    # Another variable already has the name, so one more digit of the hash is taken.
+    table = NameTable()
+    table.taken.add("yang_6")
+    assert table.get("阳") == "yang_65"
+
+def test_fullNames():
+    table = NameTable(short=False)
+    assert table.get("阳") == getAlphaNumericVar("阳")
+    assert table.mangled() == {"阳": getAlphaNumericVar("阳")}
+
+def test_pinyinLoadedOnlyWhenNeeded(tmp_path):
+    inputPath = tmp_path / "input.pyhan"
+    check = f"""
+import sys
+sys.path.append({os.path.dirname(__file__) + '/../src'!r})
+import compiler
+compiler.run({str(inputPath)!r})
+print('pypinyin' in sys.modules)
+"""
+    for source, loaded in (("x = 1\n印出(x)\n", "False"), ("数目 = 1\n印出(数目)\n", "True")):
+        inputPath.write_text(source, encoding='utf-8')
+        output = subprocess.run([sys.executable, "-c", check], capture_output=True, check=True, encoding='utf-8')
+        assert output.stdout == f"1\n{loaded}\n"